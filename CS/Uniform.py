@@ -13,7 +13,19 @@ project_root = os.path.dirname(current_dir)
 if project_root not in sys.path:
     sys.path.append(project_root)
 
-from utils.logger import update_log_file, get_player_stats
+from utils.logger import update_log_file_async, close_log_writer, get_player_stats, generate_uid
+from utils.event_log import record_event, flush_event_log
+from utils.prefetch import PuzzlePool, SHOW_POOL_STATS
+from utils import profiling
+from utils.hand import ONE, pack
+from CS.tenpai_gen import sample_tenpai
+from CS.waits import wait_structures
+from CS.puzzle_bank import load_bank, wait_pattern
+from utils.difficulty import LEVEL
+from utils.scheduler import SCHEDULER_ENABLED, ReviewScheduler
+
+# 离线题库（python CS/puzzle_bank.py build 生成），不存在时为 None
+PUZZLE_BANK = load_bank()
 
 def get_full_deck():
     """生成一副清一色麻将牌（1-9各4张）"""
@@ -34,23 +46,20 @@ def is_hu(hand):
     """
     if len(hand) != 14:
         return False, []
-    
-    # 统计每张牌的数量
-    counts = {}
-    for card in hand:
-        counts[card] = counts.get(card, 0) + 1
-    
-    # 尝试每一张牌作为将牌
-    for card in sorted(counts.keys()):
-        if counts[card] >= 2:
-            # 复制一份牌的统计，避免修改原数据
-            temp_counts = counts.copy()
-            temp_counts[card] -= 2
-            
-            # 检查剩余的12张牌是否能组成4句话
-            result, sets = get_hu_structure(temp_counts, 4)
-            if result:
-                return True, [{"type": "pair", "card": card}] + sets
+    return hu_structure_packed(pack(hand, offset=1))
+
+def hu_structure_packed(packed):
+    """
+    同 is_hu，手牌为打包计数（utils.hand.pack(hand, offset=1)，牌 c 在下标 c-1）
+    Returns: (bool, structure_info)
+    """
+    # 尝试每一张牌作为将牌（从小到大，结构与原来逐张尝试的顺序一致）
+    for i in range(9):
+        if (packed >> (3 * i)) & 7 >= 2:
+            # 减去两张即可，原手牌不受影响
+            sets = _sets_packed(packed - 2 * ONE[i], 4)
+            if sets is not None:
+                return True, [{"type": "pair", "card": i + 1}] + sets
     return False, []
 
 def check_sets(counts, sets_needed):
@@ -67,79 +76,60 @@ def get_hu_structure(counts, sets_needed):
     sets_needed: 需要组成的句子数量
     Return: (bool, list_of_sets)
     """
-    if sets_needed == 0:
-        return True, []
+    packed = 0
+    for card, c in counts.items():
+        if 1 <= card <= 9 and c > 0:
+            packed += c * ONE[card - 1]
+    sets = _sets_packed(packed, sets_needed)
+    if sets is None:
+        return False, []
+    return True, sets
+
+def _sets_packed(packed, sets_needed):
+    """
+    get_hu_structure 的打包版本：先试刻子再试顺子
+    return: 句子列表；拆不出来时为 None
+    """
+    if sets_needed == 0 or packed == 0:
+        return []
     
     # 找到最小的一张牌
-    first_card = -1
-    for card in range(1, 10):
-        if counts.get(card, 0) > 0:
-            first_card = card
-            break
+    i = 0
+    while not (packed >> (3 * i)) & 7:
+        i += 1
     
-    if first_card == -1:
-        return True, [] 
-
     # 尝试组成刻子 (AAA)
-    if counts[first_card] >= 3:
-        counts[first_card] -= 3
-        res, sets = get_hu_structure(counts, sets_needed - 1)
-        if res:
-            return True, [{"type": "triplet", "card": first_card}] + sets
-        counts[first_card] += 3 # 回溯
-
+    if (packed >> (3 * i)) & 7 >= 3:
+        sets = _sets_packed(packed - 3 * ONE[i], sets_needed - 1)
+        if sets is not None:
+            return [{"type": "triplet", "card": i + 1}] + sets
+    
     # 尝试组成顺子 (ABC)
-    if (first_card + 1 in counts and counts[first_card + 1] > 0 and 
-        first_card + 2 in counts and counts[first_card + 2] > 0):
-        
-        counts[first_card] -= 1
-        counts[first_card + 1] -= 1
-        counts[first_card + 2] -= 1
-        
-        res, sets = get_hu_structure(counts, sets_needed - 1)
-        if res:
-            return True, [{"type": "sequence", "start": first_card}] + sets
-            
-        # 回溯
-        counts[first_card] += 1
-        counts[first_card + 1] += 1
-        counts[first_card + 2] += 1
-        
-    return False, []
+    if i <= 6 and (packed >> (3 * i + 3)) & 7 and (packed >> (3 * i + 6)) & 7:
+        sets = _sets_packed(packed - ONE[i] - ONE[i + 1] - ONE[i + 2], sets_needed - 1)
+        if sets is not None:
+            return [{"type": "sequence", "start": i + 1}] + sets
+    
+    return None
 
 def get_waiting_cards(hand):
     """
     计算当前手牌（13张）听哪些牌
+    手里已有4张的牌不能再作为有效进张；见 CS/waits.py，一次拆解求出全部听牌
     """
-    waiting = []
-    hand_counts = {}
-    for card in hand:
-        hand_counts[card] = hand_counts.get(card, 0) + 1
-        
-    for card in range(1, 10):
-        # 检查是否已经有4张了，如果有4张则不可能再摸到（但在纯听牌逻辑中，有时也会算作听，只是摸不到。
-        # 题目要求“提供给玩家的13张牌...判断胡哪些数字”。
-        # 如果手牌已有4张，实际上无法胡这张（除非杠？题目未提）。
-        # 这里假设如果手牌已有4张，则不能再作为有效进张。
-        if hand_counts.get(card, 0) == 4:
-            continue
-            
-        # 尝试加入这张牌
-        temp_hand = sorted(hand + [card])
-        is_hu_res, _ = is_hu(temp_hand)
-        if is_hu_res:
-            waiting.append(card)
-            
-    return waiting
+    return list(wait_structures(hand))
 
 def explain_hu(hand, waiting_cards):
     """
     解释为什么听这些牌
     """
     print("\n💡 提示分析：")
+    # 听牌时已经拆出了每张听牌的胡牌结构（有缓存），不用再逐张搜索
+    structures = wait_structures(hand)
     for card in waiting_cards:
-        temp_hand = sorted(hand + [card])
-        _, structure = is_hu(temp_hand)
+        structure = structures.get(card)
+        if structure is None:
+            _, structure = is_hu(sorted(hand + [card]))
         
         # 格式化输出
         parts = []
@@ -155,6 +145,24 @@ def explain_hu(hand, waiting_cards):
         
         print(f"{' + '.join(parts)}")
 
+def generate_puzzle():
+    """
+    生成一道听牌题（13张手牌 + 听牌）
+    有题库文件时直接按权重抽一条记录（答案已离线算好，见 puzzle_bank），
+    否则按“随机发牌且有听”的分布构造听牌手牌，不再发牌后因死胡而重发，
+    见 tenpai_gen.sample_tenpai
+    设置了 MAHJONG_LEVEL 时只从题库里该档难度的题中抽（没有题库时不分难度）
+    return: (hand, waiting_cards)
+    """
+    if PUZZLE_BANK is not None:
+        return PUZZLE_BANK.sample(level=LEVEL)
+    return sample_tenpai()
+
+# 开启剖析（MAHJONG_PROFILE=1 或 --profile）时给热点函数套上计时/计数，默认不做任何替换
+profiling.instrument(globals(), [
+    "is_hu", "hu_structure_packed", "_sets_packed", "get_waiting_cards", "explain_hu", "generate_puzzle",
+], root="generate_puzzle")
+
 def main():
     print("=== 麻将清一色听牌训练 ===")
     player_name = input("请输入玩家名称: ").strip()
@@ -175,6 +183,17 @@ def main():
     print("      输入 'h' 查看提示。")
     print("-" * 40)
     
+    # 间隔重复调度：按听牌形状（如 147）记住掌握程度，到期的形状优先出题（指定了 MAHJONG_LEVEL 时不调度）
+    scheduler = None
+    if SCHEDULER_ENABLED and not LEVEL and PUZZLE_BANK is not None:
+        try:
+            scheduler = ReviewScheduler(player_name, "Uniform")
+            weak = scheduler.weakest()
+            if weak:
+                print("薄弱听牌形状: " + "，".join(f"{shape} 型 {correct}/{seen}" for shape, seen, correct in weak))
+        except Exception as e:
+            print(f"出题调度不可用: {e}")
+    
     # 本次会话的统计
     session_count = 0
     session_correct = 0
@@ -182,20 +201,25 @@ def main():
     
     # 记录会话开始时间，用于生成固定的UID
     session_start_time = datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+    session_uid = generate_uid(player_name, session_start_time)
+    
+    # 后台线程预先发牌并算好听牌，玩家思考时补满队列
+    pool = PuzzlePool(generate_puzzle, name="Uniform")
     
     while True:
-        hand = generate_hand()
-        # 确保生成的手牌是有听牌的（可选，为了训练效率，如果随机生成的牌没听，可能体验不好？
-        # 但完全随机也是一种训练，先保持完全随机）
-        
-        # 计算正确答案
-        correct_waiting = get_waiting_cards(hand)
-        
-        # 如果是死胡（没听），重新发牌，保证有题可做
-        if not correct_waiting:
-            continue
+        review_shape = scheduler.due_shape() if scheduler is not None else None
+        puzzle = None
+        if review_shape is not None:
+            # 到期复习的形状直接从题库抽，不走预生成队列
+            t0 = time.perf_counter()
+            puzzle = pool.run_exclusive(PUZZLE_BANK.sample_pattern, review_shape)
+            compute_time = time.perf_counter() - t0
+        if puzzle is None:
+            review_shape = None
+            puzzle, compute_time = pool.get_timed()
+        hand, correct_waiting = puzzle
             
-        print(f"\n当前手牌: {hand}")
+        print(f"\n当前手牌: {hand}" + ("（复习题）" if review_shape is not None else ""))
         
         start_time = time.time()
         
@@ -205,6 +229,11 @@ def main():
             end_time = time.time()
             
             if user_input.lower() == 'q':
+                if SHOW_POOL_STATS:
+                    print(pool.stats_str())
+                pool.stop()
+                close_log_writer()
+                flush_event_log()
                 sys.exit(0) # 直接退出程序
             
             if user_input.lower() == 'h':
@@ -246,9 +275,20 @@ def main():
         total_acc_correct = hist_correct + session_correct
         total_acc_time = hist_total_time + session_total_time
 
+        # 逐题事件日志：答案按听牌位掩码记录（第 i 位表示 i+1）
+        answer_mask = sum(1 << (c - 1) for c in user_waiting if 1 <= c <= 9)
+        record_event(session_uid, "Uniform", hand, answer_mask, is_correct, duration, compute_time)
+        profiling.record_question(compute_time, duration)
+        if scheduler is not None:
+            try:
+                scheduler.record(wait_pattern(correct_waiting), is_correct)
+            except Exception as e:
+                print(f"出题调度不可用: {e}")
+                scheduler = None
+
         # 记录日志
         # 传入 session_start_time，确保同一次会话只更新同一行
-        update_log_file(player_name, session_count, session_correct, session_total_time, session_start_time, mode="Uniform")
+        update_log_file_async(player_name, session_count, session_correct, session_total_time, session_start_time, mode="Uniform")
         
         avg_time = session_total_time / session_count
         overall_avg_time = total_acc_time / total_acc_count
@@ -258,4 +298,5 @@ def main():
         print(f"历史累计: {total_acc_correct}/{total_acc_count} ({total_acc_correct/total_acc_count:.1%}) | 总平均耗时: {overall_avg_time:.2f}秒")
 
 if __name__ == "__main__":
+    profiling.enable_from_argv(sys.argv[1:])
     main()
@@ -0,0 +1,248 @@
+"""
+清一色题库：穷举全部 13 张牌型，离线算好听牌，存成定长记录的二进制文件
+
+1-9 每种最多 4 张、共 13 张的牌型一共 93600 种。每种牌型存一条 12 字节的记录：
+    hand_index : uint32  9 格计数按 5 进制展开的编号（同 HZ/laizi_table 的索引方式）
+    wait_mask  : uint16  听牌集合，第 i 位表示听 i+1（来自 get_waiting_cards）
+    weight     : uint32  随机发牌得到这手牌的方法数 prod C(4, c_i)
+    difficulty : uint16  难度分（见 difficulty_score，没听的牌型为 0）
+另存一列 uint64 累积权重（只累加有听的牌型），出题时一次加权二分即可按随机发牌的分布抽题，
+按编号取任意一题是 O(1) 的定长偏移。
+有听的牌型按难度分成 levels 档，文件末尾是分档索引（utils.difficulty），指定难度抽题也是 O(1)。
+
+文件布局：
+    header (20 字节) | cum_weights: count * uint64 | records: count * 12 字节 | 分档索引
+
+命令行：
+    python CS/puzzle_bank.py build     # 生成题库文件
+    python CS/puzzle_bank.py stats     # 打印题库统计
+"""
+import bisect
+import itertools
+import mmap
+import os
+import random
+import struct
+import sys
+import time
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+project_root = os.path.dirname(current_dir)
+if project_root not in sys.path:
+    sys.path.append(project_root)
+
+from utils.difficulty import LEVELS, LevelIndex, assign_levels, pack_index
+
+BANK_FILE = os.path.join(current_dir, "puzzle_bank.bin")
+
+MAGIC = b"CSPB"
+VERSION = 2
+HEADER = struct.Struct("<4sIIII")   # magic, version, count, tenpai_count, levels
+RECORD = struct.Struct("<IHIH")     # hand_index, wait_mask, weight, difficulty
+CUM = struct.Struct("<Q")
+
+POW5 = [5 ** i for i in range(9)]
+
+
+def counts_to_index(counts):
+    idx = 0
+    for i in range(9):
+        idx += counts[i] * POW5[i]
+    return idx
+
+
+def index_to_counts(idx):
+    c = []
+    for _ in range(9):
+        idx, d = divmod(idx, 5)
+        c.append(d)
+    return tuple(c)
+
+
+def waits_to_mask(waits):
+    mask = 0
+    for card in waits:
+        mask |= 1 << (card - 1)
+    return mask
+
+
+def mask_to_waits(mask):
+    return [i + 1 for i in range(9) if mask >> i & 1]
+
+
+def wait_pattern(waits):
+    """听牌形状：整体平移到从 1 开始，如 [2, 5, 8] -> "147"，[3, 4] -> "12"（出题调度的牌型类别）"""
+    return "".join(str(card - waits[0] + 1) for card in waits)
+
+
+def all_hand_counts(size=13):
+    """所有 size 张的清一色牌型（9 格计数，字典序）"""
+    for counts in itertools.product(range(5), repeat=9):
+        if sum(counts) == size:
+            yield counts
+
+
+def difficulty_score(num_waits, num_structures):
+    """
+    难度分：听的牌越多越难；同样听数下，胡牌拆法越多（同一张听牌有几种看法）越容易漏看
+    num_waits, num_structures: 见 CS.waits.wait_features
+    """
+    return 4 * num_waits + (num_structures - num_waits)
+
+
+def build_bank(path=BANK_FILE, levels=LEVELS):
+    """
+    穷举全部牌型并写入题库文件
+    levels: 难度分几档
+    return: (牌型数, 有听的牌型数, 耗时秒)
+    """
+    from CS.Uniform import get_waiting_cards
+    from CS.tenpai_gen import deal_weight, counts_to_hand
+    from CS.waits import wait_features
+
+    start = time.perf_counter()
+    rows = []
+    cum_weights = []
+    tenpai_ids = []
+    scores = []
+    total = 0
+    for counts in all_hand_counts():
+        hand = counts_to_hand(counts)
+        waits = get_waiting_cards(hand)
+        weight = deal_weight(counts)
+        score = 0
+        if waits:
+            score = difficulty_score(*wait_features(hand))
+            tenpai_ids.append(len(rows))
+            scores.append(score)
+            total += weight
+        rows.append((counts_to_index(counts), waits_to_mask(waits), weight, score))
+        cum_weights.append(total)
+    item_levels = assign_levels(scores, levels)
+    num_levels = max(item_levels, default=0)
+    index = pack_index(item_levels, tenpai_ids)
+
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(HEADER.pack(MAGIC, VERSION, len(rows), len(tenpai_ids), num_levels))
+        f.write(struct.pack(f"<{len(cum_weights)}Q", *cum_weights))
+        f.write(b"".join(RECORD.pack(*row) for row in rows))
+        f.write(index)
+    os.replace(tmp_path, path)
+    return len(rows), len(tenpai_ids), time.perf_counter() - start
+
+
+class PuzzleBank:
+    """
+    只读题库（mmap）
+        bank[i]             -> (hand, waiting_cards, weight)
+        bank.sample()       -> (hand, waiting_cards)，按随机发牌的分布抽一道有听的题
+        bank.sample(level=N)-> 同上，但只在第 N 档难度的题里等概率抽
+        bank.sample_pattern(p) -> 同上，只在听牌形状为 p（见 wait_pattern）的题里等概率抽
+    """
+
+    def __init__(self, path=BANK_FILE):
+        with open(path, "rb") as f:
+            self._mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, count, tenpai_count, levels = HEADER.unpack_from(self._mm, 0)
+        if magic != MAGIC or version != VERSION:
+            self._mm.close()
+            raise ValueError(f"题库文件格式不符: {path}")
+        self.count = count
+        self.tenpai_count = tenpai_count
+        self._cum_offset = HEADER.size
+        self._rec_offset = self._cum_offset + count * CUM.size
+        # 累积权重列直接映射为 uint64 序列，可以直接二分
+        self._cum = memoryview(self._mm)[self._cum_offset:self._rec_offset].cast("Q")
+        self.total_weight = self._cum[count - 1] if count else 0
+        self.levels = LevelIndex(self._mm, self._rec_offset + count * RECORD.size, levels)
+        self._patterns = None
+
+    def __len__(self):
+        return self.count
+
+    def record(self, i):
+        """return: (hand_counts, wait_mask, weight)"""
+        hand_index, mask, weight, _ = RECORD.unpack_from(self._mm, self._rec_offset + i * RECORD.size)
+        return index_to_counts(hand_index), mask, weight
+
+    def __getitem__(self, i):
+        from CS.tenpai_gen import counts_to_hand
+        counts, mask, weight = self.record(i)
+        return counts_to_hand(counts), mask_to_waits(mask), weight
+
+    def sample(self, rng=random, level=None):
+        """
+        按随机发牌的分布抽一道有听的题
+        level: 可选，只抽第 level 档难度（1 最简单）的题，档内每种牌型等概率
+        return: (hand, waiting_cards)
+        """
+        if level:
+            i = self.levels.draw(level, rng)
+        else:
+            x = rng.random() * self.total_weight
+            i = bisect.bisect_right(self._cum, x)
+        hand, waits, _ = self[i]
+        return hand, waits
+
+    def sample_pattern(self, pattern, rng=random):
+        """return: (hand, waiting_cards)；没有这种听牌形状时为 None"""
+        if self._patterns is None:
+            # 第一次用时扫一遍记录，按听牌形状分组
+            patterns = {}
+            for i in range(self.count):
+                mask = RECORD.unpack_from(self._mm, self._rec_offset + i * RECORD.size)[1]
+                if mask:
+                    patterns.setdefault(mask >> ((mask & -mask).bit_length() - 1), []).append(i)
+            self._patterns = {wait_pattern(mask_to_waits(m)): ids for m, ids in patterns.items()}
+        ids = self._patterns.get(pattern)
+        if not ids:
+            return None
+        hand, waits, _ = self[ids[rng.randrange(len(ids))]]
+        return hand, waits
+
+    def close(self):
+        self._cum.release()
+        self.levels.release()
+        self._mm.close()
+
+
+def load_bank(path=BANK_FILE):
+    """题库文件存在时返回 PuzzleBank，否则返回 None"""
+    if not os.path.exists(path):
+        return None
+    try:
+        return PuzzleBank(path)
+    except (ValueError, OSError, struct.error):
+        return None
+
+
+if __name__ == "__main__":
+    cmd = sys.argv[1] if len(sys.argv) > 1 else "stats"
+    if cmd == "build":
+        count, tenpai, secs = build_bank()
+        size = os.path.getsize(BANK_FILE)
+        print(f"题库生成完成: {count} 种牌型，其中有听 {tenpai} 种，文件 {size} 字节，耗时 {secs:.1f}秒")
+    elif cmd == "stats":
+        start = time.perf_counter()
+        bank = load_bank()
+        if bank is None:
+            print(f"题库不存在，请先运行: python {os.path.relpath(__file__)} build")
+            sys.exit(1)
+        print(f"加载耗时: {(time.perf_counter() - start) * 1000:.2f}ms，牌型 {len(bank)}，有听 {bank.tenpai_count}")
+        n = 100000
+        start = time.perf_counter()
+        for _ in range(n):
+            bank.sample()
+        print(f"抽题: {n / (time.perf_counter() - start):,.0f} 题/秒")
+        for level in range(1, bank.levels.levels + 1):
+            start = time.perf_counter()
+            for _ in range(n):
+                bank.sample(level=level)
+            elapsed = time.perf_counter() - start
+            hand, waits = bank.sample(level=level)
+            print(f"第 {level} 档: {bank.levels.size(level)} 种牌型，抽题 {n / elapsed:,.0f} 题/秒，"
+                  f"例如 {''.join(map(str, hand))} 听 {waits}")
+    else:
+        print(f"未知命令: {cmd}（可用: build, stats）")
+        sys.exit(2)
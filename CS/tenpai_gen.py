@@ -0,0 +1,215 @@
+"""
+清一色听牌手牌的构造式生成（替代“随机发牌 + 没听就重发”）
+
+做法：
+1. 按结构枚举所有胡牌的 14 张牌型：4 句话（9 种刻子 + 7 种顺子任选4个，可重复）+ 1 对将，
+   每种牌不超过 4 张。
+2. 每个胡牌牌型去掉任意一张，得到全部听牌的 13 张牌型，同时记下它听哪些牌
+   （H + t 在胡牌集合中，且手里 t 不足 4 张 —— 与 get_waiting_cards 的规则一致）。
+3. 随机发牌时某个 13 张牌型出现的概率正比于 prod(C(4, c_i))（36 张实体牌里选出这手牌的方法数），
+   按这个权重做一次加权抽样，分布与“发牌直到听牌为止”完全相同，但每题只需一次二分查找。
+
+命令行：
+    python CS/tenpai_gen.py [N]       # 与原来的拒绝采样做卡方检验
+    python CS/tenpai_gen.py verify    # 穷举全部 13 张牌型，与 get_waiting_cards 逐一比对
+"""
+import bisect
+import itertools
+import math
+import os
+import random
+import sys
+import time
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+project_root = os.path.dirname(current_dir)
+if project_root not in sys.path:
+    sys.path.append(project_root)
+
+# 9 种刻子 + 7 种顺子，用 9 格计数表示
+MELDS = [tuple(3 if j == i else 0 for j in range(9)) for i in range(9)] + \
+        [tuple(1 if i <= j <= i + 2 else 0 for j in range(9)) for i in range(7)]
+
+_tenpai_hands = None   # [counts_tuple]
+_tenpai_waits = None   # [[card, ...]]
+_cum_weights = None    # 累积权重
+
+
+def deal_weight(counts):
+    """36 张牌中发出这手牌（按计数）的方法数 = prod C(4, c_i)"""
+    w = 1
+    for c in counts:
+        w *= math.comb(4, c)
+    return w
+
+
+def winning_hands():
+    """所有胡牌的 14 张牌型（9 格计数 tuple 的集合）"""
+    result = set()
+    for combo in itertools.combinations_with_replacement(MELDS, 4):
+        body = [sum(m[i] for m in combo) for i in range(9)]
+        if max(body) > 4:
+            continue
+        for pair in range(9):
+            if body[pair] + 2 > 4:
+                continue
+            counts = list(body)
+            counts[pair] += 2
+            result.add(tuple(counts))
+    return result
+
+
+def build_tenpai_index():
+    """
+    生成全部听牌的 13 张牌型、各自听的牌以及抽样用的累积权重
+    return: (hands, waits, cum_weights)
+    """
+    winners = winning_hands()
+    tenpai = set()
+    for w in winners:
+        for i in range(9):
+            if w[i] > 0:
+                h = list(w)
+                h[i] -= 1
+                tenpai.add(tuple(h))
+
+    hands = sorted(tenpai)
+    waits = []
+    cum_weights = []
+    total = 0
+    for h in hands:
+        cards = []
+        for i in range(9):
+            if h[i] == 4:
+                continue
+            h2 = list(h)
+            h2[i] += 1
+            if tuple(h2) in winners:
+                cards.append(i + 1)
+        waits.append(cards)
+        total += deal_weight(h)
+        cum_weights.append(total)
+    return hands, waits, cum_weights
+
+
+def _ensure_index():
+    global _tenpai_hands, _tenpai_waits, _cum_weights
+    if _tenpai_hands is None:
+        _tenpai_hands, _tenpai_waits, _cum_weights = build_tenpai_index()
+
+
+def counts_to_hand(counts):
+    """9 格计数 -> 排序后的牌列表（1-9）"""
+    return [i + 1 for i in range(9) for _ in range(counts[i])]
+
+
+def sample_tenpai(rng=random):
+    """
+    按随机发牌的分布抽一手听牌的 13 张
+    return: (hand, waiting_cards)，hand 为排序后的列表，waiting_cards 与 get_waiting_cards 一致
+    """
+    _ensure_index()
+    x = rng.random() * _cum_weights[-1]
+    idx = bisect.bisect_right(_cum_weights, x)
+    return counts_to_hand(_tenpai_hands[idx]), list(_tenpai_waits[idx])
+
+
+def _rejection_sample(rng):
+    """原来的做法：发牌直到听牌为止"""
+    from CS.Uniform import get_full_deck, get_waiting_cards
+    deck = get_full_deck()
+    while True:
+        rng.shuffle(deck)
+        hand = sorted(deck[:13])
+        waiting = get_waiting_cards(hand)
+        if waiting:
+            return hand, waiting
+
+
+def chi_square_test(n=20000, seed=0):
+    """
+    卡方检验：按听牌集合分组，比较构造式生成与拒绝采样的分布
+    return: (chi2, 自由度, 近似 p 值, 两种方法各自的耗时)
+    """
+    rng = random.Random(seed)
+
+    start = time.perf_counter()
+    constructive = [tuple(sample_tenpai(rng)[1]) for _ in range(n)]
+    t_constructive = time.perf_counter() - start
+
+    start = time.perf_counter()
+    rejection = [tuple(_rejection_sample(rng)[1]) for _ in range(n)]
+    t_rejection = time.perf_counter() - start
+
+    # 双样本卡方（同一分组下比较两组计数）
+    keys = set(constructive) | set(rejection)
+    count_a = {k: 0 for k in keys}
+    count_b = {k: 0 for k in keys}
+    for k in constructive:
+        count_a[k] += 1
+    for k in rejection:
+        count_b[k] += 1
+
+    # 把期望过少的组合并，保证近似有效
+    small_a = small_b = 0
+    chi2 = 0.0
+    bins = 0
+    for k in keys:
+        a, b = count_a[k], count_b[k]
+        if a + b < 10:
+            small_a += a
+            small_b += b
+            continue
+        chi2 += (a - b) ** 2 / (a + b)
+        bins += 1
+    if small_a + small_b > 0:
+        chi2 += (small_a - small_b) ** 2 / (small_a + small_b)
+        bins += 1
+    dof = max(1, bins - 1)
+    return chi2, dof, _chi2_sf(chi2, dof), t_constructive, t_rejection
+
+
+def verify_exhaustive():
+    """
+    穷举所有 13 张清一色牌型，确认听牌集合及听的牌与 get_waiting_cards 完全一致
+    return: 不一致的牌型列表
+    """
+    from CS.Uniform import get_waiting_cards
+    _ensure_index()
+    index = dict(zip(_tenpai_hands, _tenpai_waits))
+    mismatches = []
+    for counts in itertools.product(range(5), repeat=9):
+        if sum(counts) != 13:
+            continue
+        if index.get(counts, []) != get_waiting_cards(counts_to_hand(counts)):
+            mismatches.append(counts)
+    return mismatches
+
+
+def _chi2_sf(x, k):
+    """卡方分布上尾概率（Wilson-Hilferty 正态近似）"""
+    if x <= 0:
+        return 1.0
+    z = ((x / k) ** (1 / 3) - (1 - 2 / (9 * k))) / math.sqrt(2 / (9 * k))
+    return 0.5 * math.erfc(z / math.sqrt(2))
+
+
+if __name__ == "__main__":
+    start = time.perf_counter()
+    _ensure_index()
+    print(f"听牌牌型: {len(_tenpai_hands)} 种，构建耗时 {time.perf_counter() - start:.2f}秒")
+    if len(sys.argv) > 1 and sys.argv[1] == "verify":
+        mismatches = verify_exhaustive()
+        if mismatches:
+            print(f"❌ {len(mismatches)} 种牌型与 get_waiting_cards 不一致，例如 {mismatches[:5]}")
+            sys.exit(1)
+        print("✅ 全部 13 张牌型与 get_waiting_cards 一致")
+        sys.exit(0)
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    chi2, dof, p, t_a, t_b = chi_square_test(n)
+    print(f"构造式: {n / t_a:,.0f} 题/秒；拒绝采样: {n / t_b:,.0f} 题/秒")
+    print(f"卡方 = {chi2:.1f}，自由度 = {dof}，p = {p:.3f}")
+    if p < 0.001:
+        print("❌ 分布与拒绝采样不一致")
+        sys.exit(1)
+    print("✅ 分布与拒绝采样一致")
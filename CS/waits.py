@@ -0,0 +1,236 @@
+"""
+清一色听牌：一次拆解求出全部听牌及胡牌结构
+
+原来的 get_waiting_cards 对 1-9 每张牌各拼一手 14 张再跑一遍 is_hu，提示时 explain_hu 又对每张听牌重跑一遍。
+这里只对 13 张手牌做一次深度优先拆解，每次从最小的一张牌开始，把它放进下面某一种组里：
+    刻子 AAA / 顺子 ABC / 将 AA（最多一个）/ 残缺形（最多一个）
+残缺形是还差一张就成组的部分：
+    单张 A    听 A    （4 句话 + 单钓，将由这张补成）
+    对子 AA   听 A    （3 句话 + 将 + 对倒，补成刻子）
+    两面 AB   听 A-1、B+1（边张时只有一侧）
+    坎张 A_C  听 B
+13 张只可能拆成“4 句话 + 单张”或“3 句话 + 将 + 两张残缺形”，拆到牌用完即得到一种听法；
+将和残缺形都定下来以后，剩下的牌只需找字典序最小的一种句子拆法，不再枚举。
+每种听法补上那张牌就是 14 张的一种胡牌结构。同一张听牌可能有多种结构，这里取 is_hu 会先找到的那一种：
+将最小，其余句子按（起始牌，刻子在顺子前）排序后字典序最小。
+因此结果与逐张 is_hu 完全一致。手里已有 4 张的牌不算听（与 get_waiting_cards 的规则相同）。
+
+结果按手牌（utils.hand 打包格式）缓存，出题时算过的手牌，提示时直接复用。
+
+命令行：
+    python CS/waits.py    # 穷举全部 13 张牌型，与逐张 is_hu 比对听牌和结构，并测速
+"""
+import itertools
+import os
+import sys
+import time
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+project_root = os.path.dirname(current_dir)
+if project_root not in sys.path:
+    sys.path.append(project_root)
+
+from utils.cache import LRUCache
+from utils.hand import ONE, pack
+from utils import profiling
+
+TRIPLET, SEQUENCE = 0, 1
+SINGLE, PAIR, ADJACENT, GAP = 0, 1, 2, 3
+
+# 手牌（packed，牌 c 在下标 c-1）-> {听的牌: 胡牌结构}
+WAIT_CACHE_SIZE = int(os.environ.get("CS_WAIT_CACHE_SIZE", "50000"))
+memo_waits = LRUCache(maxsize=WAIT_CACHE_SIZE, name="cs_waits")
+
+
+def _decompose(packed, sets, eyes, partial, out, i=0):
+    """
+    把 packed 拆成 句子 + 最多一个将 + 最多一个残缺形，拆完的结果追加到 out
+    sets: ((起始下标, TRIPLET/SEQUENCE), ...)；eyes: 将的下标或 None；partial: (形状, 起始下标) 或 None
+    i: 已知 packed 中最小的牌不小于 i
+    """
+    if packed == 0:
+        if partial is not None:
+            out.append((sets, eyes, partial))
+        return
+    if partial is not None and (eyes is not None or partial[0] == SINGLE):
+        # 将和残缺形都已确定，剩下的只能全是句子：只取字典序最小的一种拆法就够了
+        rest = _min_sets(packed, i)
+        if rest is not None:
+            out.append((sets + rest, eyes, partial))
+        return
+    while not (packed >> (3 * i)) & 7:
+        i += 1
+    c = (packed >> (3 * i)) & 7
+    has_next = i <= 7 and (packed >> (3 * i + 3)) & 7
+    has_gap = i <= 6 and (packed >> (3 * i + 6)) & 7
+
+    if c >= 3:
+        _decompose(packed - 3 * ONE[i], sets + ((i, TRIPLET),), eyes, partial, out, i)
+    if has_next and has_gap:
+        _decompose(packed - ONE[i] - ONE[i + 1] - ONE[i + 2], sets + ((i, SEQUENCE),), eyes, partial, out, i)
+    # 单钓时不能再有将（张数凑不上）
+    if c >= 2 and eyes is None and (partial is None or partial[0] != SINGLE):
+        _decompose(packed - 2 * ONE[i], sets, i, partial, out, i)
+    if partial is None:
+        if c >= 2:
+            _decompose(packed - 2 * ONE[i], sets, eyes, (PAIR, i), out, i)
+        if has_next:
+            _decompose(packed - ONE[i] - ONE[i + 1], sets, eyes, (ADJACENT, i), out, i)
+        if has_gap:
+            _decompose(packed - ONE[i] - ONE[i + 2], sets, eyes, (GAP, i), out, i)
+        if eyes is None:
+            _decompose(packed - ONE[i], sets, eyes, (SINGLE, i), out, i)
+
+
+def _min_sets(packed, i=0):
+    """
+    packed 全部拆成句子，返回字典序最小的拆法 ((起始下标, TRIPLET/SEQUENCE), ...)；拆不开时为 None
+    与 is_hu 相同，从最小的牌起先试刻子再试顺子，第一个找到的就是字典序最小的
+    i: 同 _decompose
+    """
+    if packed == 0:
+        return ()
+    while not (packed >> (3 * i)) & 7:
+        i += 1
+    if (packed >> (3 * i)) & 7 >= 3:
+        rest = _min_sets(packed - 3 * ONE[i], i)
+        if rest is not None:
+            return ((i, TRIPLET),) + rest
+    if i <= 6 and (packed >> (3 * i + 3)) & 7 and (packed >> (3 * i + 6)) & 7:
+        rest = _min_sets(packed - ONE[i] - ONE[i + 1] - ONE[i + 2], i)
+        if rest is not None:
+            return ((i, SEQUENCE),) + rest
+    return None
+
+
+def _completions(sets, eyes, partial):
+    """一种拆法 -> [(听的下标, 将下标, 补齐后的句子)]"""
+    shape, i = partial
+    if shape == SINGLE:
+        return [(i, i, sets)]
+    if shape == PAIR:
+        return [(i, eyes, sets + ((i, TRIPLET),))]
+    if shape == GAP:
+        return [(i + 1, eyes, sets + ((i, SEQUENCE),))]
+    result = []
+    if i >= 1:
+        result.append((i - 1, eyes, sets + ((i - 1, SEQUENCE),)))
+    if i + 2 <= 8:
+        result.append((i + 2, eyes, sets + ((i, SEQUENCE),)))
+    return result
+
+
+def _structure(eyes, sets):
+    """内部表示 -> is_hu 返回的结构格式"""
+    structure = [{"type": "pair", "card": eyes + 1}]
+    for start, kind in sets:
+        if kind == TRIPLET:
+            structure.append({"type": "triplet", "card": start + 1})
+        else:
+            structure.append({"type": "sequence", "start": start + 1})
+    return structure
+
+
+def waits_from_packed(packed):
+    """
+    packed: 13 张手牌（utils.hand.pack(hand, offset=1)）
+    return: {听的牌(1-9): 胡牌结构}，按牌从小到大；结构与 is_hu(手牌 + 这张) 返回的相同
+    返回值可能被缓存共享，调用方不要修改
+    """
+    result = memo_waits.get(packed)
+    if result is not None:
+        return result
+
+    decompositions = []
+    _decompose(packed, (), None, None, decompositions)
+    best = {}
+    for sets, eyes, partial in decompositions:
+        for wait, pair, full_sets in _completions(sets, eyes, partial):
+            # 手里已有 4 张的牌摸不到
+            if (packed >> (3 * wait)) & 7 == 4:
+                continue
+            key = (pair, tuple(sorted(full_sets)))
+            if wait not in best or key < best[wait]:
+                best[wait] = key
+    result = {wait + 1: _structure(*best[wait]) for wait in sorted(best)}
+    memo_waits[packed] = result
+    return result
+
+
+def _count_hu(packed, eyes_free, i=0):
+    """packed 拆成句子 +（eyes_free 时）一对将的不同拆法个数；从最小的牌起枚举，每种拆法只数一次"""
+    if packed == 0:
+        return 0 if eyes_free else 1
+    while not (packed >> (3 * i)) & 7:
+        i += 1
+    c = (packed >> (3 * i)) & 7
+    n = 0
+    if c >= 3:
+        n += _count_hu(packed - 3 * ONE[i], eyes_free, i)
+    if i <= 6 and (packed >> (3 * i + 3)) & 7 and (packed >> (3 * i + 6)) & 7:
+        n += _count_hu(packed - ONE[i] - ONE[i + 1] - ONE[i + 2], eyes_free, i)
+    if c >= 2 and eyes_free:
+        n += _count_hu(packed - 2 * ONE[i], False, i)
+    return n
+
+
+def wait_features(hand):
+    """
+    出题难度用的特征（见 puzzle_bank）
+    return: (听几种牌, 胡牌拆法总数)；拆法总数为补上各张听牌后不同拆法的个数之和，大于听牌数说明有多种拆法
+    """
+    packed = pack(hand, offset=1)
+    waits = waits_from_packed(packed)
+    return len(waits), sum(_count_hu(packed + ONE[card - 1], True) for card in waits)
+
+
+def wait_structures(hand):
+    """
+    hand: 13 张手牌（1-9 的列表）
+    return: 同 waits_from_packed
+    """
+    return waits_from_packed(pack(hand, offset=1))
+
+
+profiling.instrument(globals(), ["waits_from_packed", "_decompose"])
+profiling.register_cache(memo_waits)
+
+
+if __name__ == "__main__":
+    from CS.Uniform import is_hu
+
+    def reference(hand):
+        """原来的做法：逐张补成 14 张跑 is_hu"""
+        result = {}
+        for card in range(1, 10):
+            if hand.count(card) == 4:
+                continue
+            ok, structure = is_hu(sorted(hand + [card]))
+            if ok:
+                result[card] = structure
+        return result
+
+    hands = []
+    for counts in itertools.product(range(5), repeat=9):
+        if sum(counts) == 13:
+            hands.append([card for card in range(1, 10) for _ in range(counts[card - 1])])
+
+    mismatches = []
+    new_time = old_time = 0.0
+    for hand in hands:
+        start = time.perf_counter()
+        expected = reference(hand)
+        old_time += time.perf_counter() - start
+        memo_waits.clear()
+        start = time.perf_counter()
+        result = wait_structures(hand)
+        new_time += time.perf_counter() - start
+        if result != expected:
+            mismatches.append(hand)
+
+    tenpai = sum(1 for hand in hands if wait_structures(hand))
+    print(f"13 张牌型 {len(hands)} 种（听牌 {tenpai} 种），听牌或结构不一致: {len(mismatches)}")
+    print(f"逐张 is_hu 平均 {old_time / len(hands) * 1e6:.1f}µs；一次拆解 平均 {new_time / len(hands) * 1e6:.1f}µs")
+    if mismatches:
+        print(f"例如: {mismatches[:5]}")
+    sys.exit(1 if mismatches else 0)
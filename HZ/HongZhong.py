@@ -12,11 +12,26 @@ if project_root not in sys.path:
     sys.path.append(project_root)
 
 try:
-    from utils.logger import update_log_file, get_player_stats
+    from utils.logger import update_log_file_async, close_log_writer, get_player_stats, generate_uid
+    from utils.event_log import record_event, flush_event_log
 except ImportError:
     # 兼容如果没有 utils 模块的情况（虽然根据任务应该有）
     pass
 
+from utils.cache import LRUCache
+from utils.prefetch import PuzzlePool, SHOW_POOL_STATS
+from utils import profiling
+from HZ.laizi_table import load_table, counts_to_index
+from HZ.shanten import analyze_shanten, pick_best_discards
+from HZ.canonical import CanonicalCache
+from HZ.puzzle_bank import load_bank, difficulty_score
+from utils.difficulty import LEVEL
+from utils.scheduler import SCHEDULER_ENABLED, ReviewScheduler
+from utils.hand import ONE, SUIT_BITS, SUIT_MASK, pack, pack_counts, red_count, suit_index, suit_tuple
+
+# 单花色癞子代价查表（mmap），每个花色一次索引即可得到 3n / 3n+2 代价
+LAIZI_TABLE = load_table()
+
 # 牌的定义
 # 0-8: 1-9万
 # 9-17: 1-9条
@@ -266,10 +281,20 @@ def calc_need_laizi(counts):
 
 # 优化版：带缓存的 DP
 # 由于 counts 是可变的，转为 tuple 作为 key
-memo_laizi = {}
+# 缓存有容量上限（LRU淘汰），可通过环境变量调整：
+#   HZ_LAIZI_CACHE_SIZE : 最大条目数（默认 200000，<=0 表示不限）
+#   HZ_LAIZI_CACHE_FILE : 快照文件路径，设置后启动时预热、退出时保存
+LAIZI_CACHE_SIZE = int(os.environ.get("HZ_LAIZI_CACHE_SIZE", "200000"))
+LAIZI_CACHE_FILE = os.environ.get("HZ_LAIZI_CACHE_FILE", "")
+
+memo_laizi = LRUCache(maxsize=LAIZI_CACHE_SIZE, name="laizi_cost")
+if LAIZI_CACHE_FILE:
+    memo_laizi.enable_snapshot(LAIZI_CACHE_FILE)
+
 def get_laizi_cost(counts_tuple):
-    if counts_tuple in memo_laizi:
-        return memo_laizi[counts_tuple]
+    cached = memo_laizi.get(counts_tuple)
+    if cached is not None:
+        return cached
     
     idx = -1
     for i in range(9):
@@ -319,73 +344,50 @@ def get_laizi_cost(counts_tuple):
         if dec2: c_list[idx+2] += 1
         if dec1: c_list[idx+1] += 1
         c_list[idx] += 1
+    else:
+        # 最小的牌是 8 或 9：只能组成 789，缺的 7（或 7、8）用癞子补
+        # （以最小牌开头的顺子在这里越界，需单独处理，否则 89+红中 不算一句话）
+        need = 0
+        taken = []
+        for j in range(6, 9):
+            if j >= idx and c_list[j] > 0:
+                c_list[j] -= 1
+                taken.append(j)
+            else:
+                need += 1
+        res = min(res, need + get_laizi_cost(tuple(c_list)))
+        for j in taken:
+            c_list[j] += 1
         
     memo_laizi[counts_tuple] = res
     return res
 
-def is_hu_with_laizi(hand):
+def suit_counts(hand):
+    """将手牌转为三个花色的计数数组 (tuple, 长度9) 和红中数量"""
+    wan = [0] * 9
+    tiao = [0] * 9
+    tong = [0] * 9
+    hongzhong = 0
+    for t in hand:
+        if t < 9:
+            wan[t] += 1
+        elif t < 18:
+            tiao[t - 9] += 1
+        elif t < 27:
+            tong[t - 18] += 1
+        elif t == RED_DRAGON:
+            hongzhong += 1
+    return tuple(wan), tuple(tiao), tuple(tong), hongzhong
+
+def suit_costs_slow(counts_tuple):
     """
-    判断是否胡牌（带红中）
-    hand: 14张牌的列表
+    递归计算单花色的 (3n代价, 3n+2做将代价)，不依赖查表
+    用于查表覆盖不到的计数（某张牌超过4张，例如已有4张再摸同一张）以及校验
     """
-    wan, tiao, tong, laizi_count = split_suits(hand)
-    
-    # 将各花色转为计数数组
-    def to_counts(tiles):
-        c = [0] * 9
-        for t in tiles:
-            c[t] += 1
-        return tuple(c)
-        
-    wan_counts = to_counts(wan)
-    tiao_counts = to_counts(tiao)
-    tong_counts = to_counts(tong)
-    
-    # 计算各花色凑成 3n 所需的癞子数
-    # cost_3n = get_laizi_cost(counts)
-    
-    # 我们需要遍历哪一种花色做“将” (2, 5, 8, 11, 14...)
-    # 做将意味着：先拿出一对（需0-2癞子），剩下的凑3n
-    # 剩下的花色直接凑3n
-    
-    # 1. 计算每个花色纯3n的代价
-    cost_wan_3n = get_laizi_cost(wan_counts)
-    cost_tiao_3n = get_laizi_cost(tiao_counts)
-    cost_tong_3n = get_laizi_cost(tong_counts)
-    
-    # 2. 尝试万做将
-    # 遍历万的每一种牌作为将
-    # 如果该牌有2张，消耗0癞子；1张，消耗1癞子；0张，消耗2癞子
-    min_laizi_needed = 99
-    
-    # 优化：只尝试手牌里有的牌做将，或者如果不缺癞子，可以尝试任意牌做将
-    # 但由于癞子可以变任意牌，如果手牌里没有1万，我们也可以用2个癞子变1万做将。
-    # 只要总癞子够就行。
-    # 实际上，如果手牌里有某张牌，用它做将最省。
-    # 如果全都靠癞子做将，那消耗2个癞子。
-    
-    # 尝试万做将
-    for i in range(9):
-        # 假设用 i 做将
-        c_list = list(wan_counts)
-        need_for_pair = 0
-        if c_list[i] >= 2:
-            c_list[i] -= 2
-        elif c_list[i] == 1:
-            c_list[i] -= 1
-            need_for_pair = 1
-        else:
-            # 没有这张牌，强行做将需2癞子
-            need_for_pair = 2
-        
-        cost_body = get_laizi_cost(tuple(c_list))
-        total = need_for_pair + cost_body + cost_tiao_3n + cost_tong_3n
-        if total <= laizi_count:
-            return True
-            
-    # 尝试条做将
+    cost_3n = get_laizi_cost(counts_tuple)
+    cost_pair = 99
     for i in range(9):
-        c_list = list(tiao_counts)
+        c_list = list(counts_tuple)
         need_for_pair = 0
         if c_list[i] >= 2:
             c_list[i] -= 2
@@ -394,91 +396,249 @@ def is_hu_with_laizi(hand):
             need_for_pair = 1
         else:
             need_for_pair = 2
-            
-        cost_body = get_laizi_cost(tuple(c_list))
-        total = need_for_pair + cost_body + cost_wan_3n + cost_tong_3n
-        if total <= laizi_count:
-            return True
+        cost_pair = min(cost_pair, need_for_pair + get_laizi_cost(tuple(c_list)))
+    return cost_3n, cost_pair
 
-    # 尝试筒做将
-    for i in range(9):
-        c_list = list(tong_counts)
-        need_for_pair = 0
-        if c_list[i] >= 2:
-            c_list[i] -= 2
-        elif c_list[i] == 1:
-            c_list[i] -= 1
-            need_for_pair = 1
-        else:
-            need_for_pair = 2
-            
-        cost_body = get_laizi_cost(tuple(c_list))
-        total = need_for_pair + cost_body + cost_wan_3n + cost_tiao_3n
-        if total <= laizi_count:
-            return True
-            
-    # 特殊情况：红中做将
-    # 如果红中做将，需要2个红中。
-    # 剩下的全都要凑3n
-    if laizi_count >= 2:
-        total = cost_wan_3n + cost_tiao_3n + cost_tong_3n
-        if total <= (laizi_count - 2):
-            return True
-            
-    return False
+def suit_costs(counts_tuple):
+    """
+    查表得到单花色的 (3n代价, 3n+2做将代价)
+    等价于 get_laizi_cost(counts) 以及遍历9种牌做将的最小值
+    """
+    if max(counts_tuple) > 4:
+        return suit_costs_slow(counts_tuple)
+    return LAIZI_TABLE.lookup_index(counts_to_index(counts_tuple))
 
-def get_valid_ting_counts(hand_13):
+def suit_costs_key(key):
     """
-    计算打出某张牌后，能听多少张牌（有效张数）
-    return: int (有效张数)
+    同 suit_costs，参数为单花色的打包计数（utils.hand.suit_key，每种牌 3 位）
+    不用拼 tuple，直接按 9 位一段查小表换算成 5 进制编号
+    """
+    idx = suit_index(key)
+    if idx < 0:
+        return suit_costs_slow(suit_tuple(key))
+    return LAIZI_TABLE.lookup_index(idx)
+
+def hu_need_from_costs(costs):
+    """
+    costs: 三个花色的 (cost_3n, cost_pair)
+    return: 胡牌所需的最少癞子数（将可以在任一花色，也可以由两张红中充当）
     """
-    # 遍历所有可能的34种牌 + 红中? 
-    # 红中算听牌吗？算。
-    # 34种常规牌 + 红中 = 35种
+    (w3, wp), (t3, tp), (b3, bp) = costs
+    base = w3 + t3 + b3
+    need = base + 2  # 红中做将
+    alt = base - w3 + wp
+    if alt < need: need = alt
+    alt = base - t3 + tp
+    if alt < need: need = alt
+    alt = base - b3 + bp
+    if alt < need: need = alt
+    return need
+
+def is_hu_with_laizi(hand):
+    """
+    判断是否胡牌（带红中）
+    hand: 14张牌的列表
     
-    # 统计手牌已有数量，用于计算有效张数
-    hand_counts = Counter(hand_13)
+    每个花色查表得到两项代价：
+      - 纯3n所需癞子数
+      - 在该花色取一对做将后凑3n所需癞子数（已遍历9种牌做将取最小）
+    然后枚举哪个花色做将（或红中做将），只要所需癞子数不超过红中数即胡牌。
+    查表结果与 get_laizi_cost 递归完全一致，见 laizi_table.verify_table。
+    """
+    packed = pack(hand)
+    costs = (suit_costs_key(packed & SUIT_MASK),
+             suit_costs_key((packed >> SUIT_BITS) & SUIT_MASK),
+             suit_costs_key((packed >> (2 * SUIT_BITS)) & SUIT_MASK))
+    return hu_need_from_costs(costs) <= red_count(packed)
+
+def hand_to_counts(hand):
+    """手牌列表 -> 长度28的计数列表"""
+    counts = [0] * 28
+    for t in hand:
+        counts[t] += 1
+    return counts
+
+def suit_draw_costs(key, suit_memo):
+    """
+    单花色的代价及“再摸一张该花色的牌”后的代价
+    key: 单花色的打包计数（utils.hand.suit_key）
+    return: (当前 (3n, 3n+2) 代价, [摸 i 后的代价 for i in 0..8])
+    
+    结果按花色计数缓存在 suit_memo 中：打出/摸入只会改变一个花色，
+    其余两个花色的计数不变，直接复用缓存即可。
+    """
+    info = suit_memo.get(key)
+    if info is None:
+        # 摸入第 i 张只是 key + ONE[i]，不用复制计数
+        draws = [suit_costs_key(key + ONE[i]) for i in range(9)]
+        info = (suit_costs_key(key), draws)
+        suit_memo[key] = info
+    return info
+
+def get_ting_list_from_counts(counts, suit_memo=None):
+    """
+    counts: 长度28的计数列表（13张）
+    return: 听牌列表（按牌ID升序，与逐张调用 is_hu_with_laizi 的结果一致）
+    """
+    return get_ting_list_from_packed(pack_counts(counts), suit_memo)
+
+def get_ting_list_from_packed(packed, suit_memo=None):
+    """
+    同 get_ting_list_from_counts，参数为打包的手牌（utils.hand.pack）
+    """
+    if suit_memo is None:
+        suit_memo = {}
+    infos = (suit_draw_costs(packed & SUIT_MASK, suit_memo),
+             suit_draw_costs((packed >> SUIT_BITS) & SUIT_MASK, suit_memo),
+             suit_draw_costs((packed >> (2 * SUIT_BITS)) & SUIT_MASK, suit_memo))
+    base = [infos[0][0], infos[1][0], infos[2][0]]
+    laizi_count = red_count(packed)
     
     ting_list = []
-    # 遍历 0-26 (常规) + 27 (红中)
-    for tile in range(28):
-        # 检查是否胡牌
-        if is_hu_with_laizi(hand_13 + [tile]):
-            ting_list.append(tile)
-            
-    # 计算有效张数
+    for s in range(3):
+        costs = list(base)
+        offset = s * 9
+        for i, drawn in enumerate(infos[s][1]):
+            # 只有摸到的那个花色代价变化
+            costs[s] = drawn
+            if hu_need_from_costs(costs) <= laizi_count:
+                ting_list.append(offset + i)
+    # 摸到红中：花色不变，癞子 +1
+    if hu_need_from_costs(base) <= laizi_count + 1:
+        ting_list.append(RED_DRAGON)
+    return ting_list
+
+def count_valid_tiles(ting_list, counts, remaining=None):
+    """
+    有效张数
+    remaining: 可选，长度28的实际剩余张数（扣除已见过的牌）；
+               不给时按 4 - 手里已有的张数 计算
+    """
     valid_count = 0
     for t in ting_list:
-        already_have = hand_counts[t]
-        # 总张数4 - 手里有的
-        left = 4 - already_have
+        left = remaining[t] if remaining is not None else 4 - counts[t]
         if left > 0:
             valid_count += left
-            
-    return valid_count, ting_list
+    return valid_count
 
-def analyze_hand(hand_14):
+def count_valid_tiles_packed(ting_list, packed, remaining=None):
+    """同 count_valid_tiles，手牌为打包形式"""
+    valid_count = 0
+    for t in ting_list:
+        left = remaining[t] if remaining is not None else 4 - ((packed >> (3 * t)) & 7)
+        if left > 0:
+            valid_count += left
+    return valid_count
+
+def get_valid_ting_counts(hand_13, suit_memo=None, remaining=None):
+    """
+    计算打出某张牌后，能听多少张牌（有效张数）
+    return: (有效张数, 听牌列表)
+    """
+    # 遍历 0-26 (常规) + 27 (红中)，红中也算听牌
+    # 每个花色只算一次代价，摸牌时只更新被摸到的花色
+    packed = pack(hand_13)
+    ting_list = get_ting_list_from_packed(packed, suit_memo)
+    return count_valid_tiles_packed(ting_list, packed, remaining), ting_list
+
+def analyze_hand(hand_14, remaining=None):
     """
     分析手牌，返回每种打法的听牌数
+    remaining: 可选，长度28的实际剩余张数，见 count_valid_tiles
     return: dict { discard_tile: (valid_count, ting_list) }
+    
+    增量计算：整手牌只转一次计数，打出某张牌只改动一个计数，
+    各花色的代价（含摸牌后的代价）在所有打法间共享缓存。
     """
     results = {}
-    unique_tiles = sorted(list(set(hand_14)))
+    packed = pack(hand_14)
+    suit_memo = {}
     
-    for discard in unique_tiles:
-        # 临时移除这张牌
-        temp_hand = list(hand_14)
-        temp_hand.remove(discard)
+    for discard in sorted(set(hand_14)):
+        # 打出这张牌只是减去一个位段，整手牌不用复制
+        after = packed - ONE[discard]
+        tings = get_ting_list_from_packed(after, suit_memo)
+        count = count_valid_tiles_packed(tings, after, remaining)
         
-        count, tings = get_valid_ting_counts(temp_hand)
         if count > 0:
             results[discard] = (count, tings)
             
     return results
 
+# 整手牌分析结果缓存：万/条/筒互换后结果相同，按规范形式缓存，命中时映射回真实花色
+#   HZ_ANALYSIS_CACHE_SIZE : 最多缓存的规范手牌数（默认 50000）
+#   HZ_ANALYSIS_CACHE_FILE : 快照文件路径，设置后启动时预热、退出时保存
+# 只适用于不带 remaining 的分析（remaining 随实际见过的牌变化，不能按花色置换共享）
+ANALYSIS_CACHE_SIZE = int(os.environ.get("HZ_ANALYSIS_CACHE_SIZE", "50000"))
+ANALYSIS_CACHE_FILE = os.environ.get("HZ_ANALYSIS_CACHE_FILE", "")
+
+# 用 lambda 在调用时再取全局函数，开启剖析后包装过的函数也能计入统计
+cached_analyze_hand = CanonicalCache(lambda hand: analyze_hand(hand), name="hz_analysis",
+                                     maxsize=ANALYSIS_CACHE_SIZE, snapshot_file=ANALYSIS_CACHE_FILE)
+cached_analyze_shanten = CanonicalCache(lambda hand: analyze_shanten(hand), name="hz_shanten_analysis",
+                                        maxsize=ANALYSIS_CACHE_SIZE,
+                                        snapshot_file=ANALYSIS_CACHE_FILE + ".shanten" if ANALYSIS_CACHE_FILE else "")
+
+# 分级题库（python HZ/puzzle_bank.py build 生成），不存在时为 None
+PUZZLE_BANK = load_bank()
+
+def generate_puzzle(level=None):
+    """
+    发一手14张牌并算好答案
+    level: 可选，从分级题库的这一档里抽（默认为 MAHJONG_LEVEL，0 表示随机发牌）；没有题库时忽略
+    return: (hand, analysis, shanten_analysis)
+        analysis: analyze_hand 的结果
+        shanten_analysis: 打哪张都不听时为 analyze_shanten 的结果，否则为 None
+    """
+    level = level or LEVEL
+    if level and PUZZLE_BANK is not None:
+        hand = PUZZLE_BANK.sample(level=level)
+    else:
+        full_deck = get_full_deck()
+        random.shuffle(full_deck)
+        hand = sorted(full_deck[:14])
+    
+    # DEBUG: Force specific hand
+    # 234m, 13457789s, 678p
+    # hand = [1, 2, 3, 9, 11, 12, 13, 15, 15, 16, 17, 23, 24, 25]
+    
+    # 计算最佳打法
+    # 为了不让用户等太久，这里做了增量计算：
+    # 每个花色的代价（含摸入任一张后的代价）只查一次表并在各打法间共享，
+    # 每个打法只需组合三个花色的代价，不再做 14 * 28 次完整的胡牌判定
+    analysis = cached_analyze_hand(hand)
+    
+    # 打啥都不听时不再重新发牌，改用向听数 + 有效进张评分
+    shanten_analysis = None
+    if not analysis:
+        shanten_analysis = cached_analyze_shanten(hand)
+    return hand, analysis, shanten_analysis
+
+def puzzle_shape(puzzle):
+    """出题调度用的牌型类别：题目所在的难度档（需要分级题库）"""
+    _, analysis, shanten_analysis = puzzle
+    return str(PUZZLE_BANK.level_of(difficulty_score(analysis, shanten_analysis)))
+
+# 开启剖析（MAHJONG_PROFILE=1 或 --profile）时给热点函数套上计时/计数，默认不做任何替换
+profiling.instrument(globals(), [
+    "get_laizi_cost", "suit_costs", "suit_costs_slow", "is_hu_with_laizi",
+    "suit_costs_key", "suit_draw_costs", "get_ting_list_from_packed", "get_valid_ting_counts",
+    "analyze_hand", "analyze_shanten", "generate_puzzle",
+], root="generate_puzzle")
+profiling.register_cache(memo_laizi)
+profiling.register_cache(cached_analyze_hand.cache)
+profiling.register_cache(cached_analyze_shanten.cache)
+
+# 高级模式：有效张数并列最多的打法之间，再比之后 k 次摸牌内的自摸概率（见 winprob.py），0 为关闭
+#   HZ_WINPROB_DRAWS=2 或 3
+WINPROB_DRAWS = int(os.environ.get("HZ_WINPROB_DRAWS", "0"))
+
 def main():
     print("=== 红中麻将听牌训练 ===")
     print("规则：手牌14张（含红中），选择打出一张牌，使听牌有效张数最多。")
+    if WINPROB_DRAWS > 0:
+        from HZ.winprob import best_by_win_probability
+        print(f"高级模式：有效张数并列时，{WINPROB_DRAWS} 次摸牌内自摸概率更高的打法才算对。")
     print("输入牌名（如 1万, 2条, 5筒, 红中），输入 'q' 退出。")
     print("-" * 50)
     
@@ -495,49 +655,63 @@ def main():
         print(f"读取历史记录失败: {e}")
 
     session_start_time = datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+    session_uid = generate_uid(player_name, session_start_time)
     
     session_count = 0
     session_correct = 0
     session_total_time = 0.0
     
+    # 间隔重复调度：按难度档记住掌握程度，到期的档位优先出题（指定了 MAHJONG_LEVEL 时不调度）
+    scheduler = None
+    if SCHEDULER_ENABLED and not LEVEL and PUZZLE_BANK is not None:
+        try:
+            scheduler = ReviewScheduler(player_name, "HongZhong")
+            weak = scheduler.weakest()
+            if weak:
+                print("薄弱难度档: " + "，".join(f"第 {shape} 档 {correct}/{seen}" for shape, seen, correct in weak))
+        except Exception as e:
+            print(f"出题调度不可用: {e}")
+    
+    # 后台线程预先发牌并算好答案，玩家思考时补满队列
+    pool = PuzzlePool(generate_puzzle, name="HongZhong")
+    
     while True:
-        # 发牌
-        full_deck = get_full_deck()
-        random.shuffle(full_deck)
-        hand = sorted(full_deck[:14])
+        review_shape = scheduler.due_shape() if scheduler is not None else None
+        if review_shape is not None:
+            # 到期复习的档位直接从题库抽，不走预生成队列；分析缓存不加锁，用 run_exclusive 与预生成线程错开
+            t0 = time.perf_counter()
+            puzzle = pool.run_exclusive(generate_puzzle, int(review_shape))
+            compute_time = time.perf_counter() - t0
+        else:
+            puzzle, compute_time = pool.get_timed()
+        hand, analysis, shanten_analysis = puzzle
         
-        # DEBUG: Force specific hand
-        # 234m, 13457789s, 678p
-        # hand = [1, 2, 3, 9, 11, 12, 13, 15, 15, 16, 17, 23, 24, 25]
+        print(f"\n当前手牌: {hand_to_str(hand)}" + ("（复习题）" if review_shape is not None else ""))
         
-        # 打印 "思考中..."
+        win_probs = None
+        if shanten_analysis is None:
+            # 找出最大听牌数
+            max_score = max(v[0] for v in analysis.values())
+            best_discards = [k for k, v in analysis.items() if v[0] == max_score]
+            if WINPROB_DRAWS > 0 and len(best_discards) > 1:
+                # 胜率评估与预生成线程共用不加锁的向听缓存，用 run_exclusive 错开
+                best_discards, win_probs = pool.run_exclusive(best_by_win_probability, hand, best_discards, WINPROB_DRAWS)
+        else:
+            best_discards, (best_shanten, best_count) = pick_best_discards(shanten_analysis)
+            print("（这手牌打哪张都不能听牌，请选择向听数最小、有效进张最多的打法）")
         
         start_time = time.time()
         
-        # 计算最佳打法
-        # 为了不让用户等太久，这里可能需要优化
-        # 目前算法复杂度：
-        # 14次循环 (打每一张) * 28次循环 (摸每一张) * 胡牌判定 (3次DP)
-        # 14 * 28 * small_constant ~ 400次小运算，应该很快 (<0.1s)
-        
-        analysis = analyze_hand(hand)
-        
-        # 找出最大听牌数
-        if not analysis:
-            # 这种情况极少见（相公？），或者这把牌烂到打啥都不听
-            # 重新发牌
-            continue
-            
-        print(f"\n当前手牌: {hand_to_str(hand)}")
-        
-        max_score = max(v[0] for v in analysis.values())
-        best_discards = [k for k, v in analysis.items() if v[0] == max_score]
-        
         while True:
             user_input = input("请打出一张牌：").strip()
             end_time = time.time()
             
             if user_input.lower() == 'q':
+                if SHOW_POOL_STATS:
+                    print(pool.stats_str())
+                pool.stop()
+                close_log_writer()
+                flush_event_log()
                 return
                 
             discard_tile = parse_input(user_input)
@@ -554,35 +728,60 @@ def main():
             session_count += 1
             session_total_time += duration
             
-            user_score = 0
-            if discard_tile in analysis:
-                user_score = analysis[discard_tile][0]
-            
-            is_correct = (user_score == max_score)
-            
-            if is_correct:
-                print(f"✅ 回答正确！打出【{tile_to_str(discard_tile)}】听 {user_score} 张牌。")
-                if user_score > 0 and discard_tile in analysis:
-                    print(f"   听牌详情: {' '.join([tile_to_str(t) for t in analysis[discard_tile][1]])}")
-                session_correct += 1
+            if shanten_analysis is not None:
+                user_shanten, user_count, _ = shanten_analysis[discard_tile]
+                is_correct = (user_shanten, user_count) == (best_shanten, best_count)
+                
+                if is_correct:
+                    print(f"✅ 回答正确！打出【{tile_to_str(discard_tile)}】{user_shanten} 向听，有效进张 {user_count} 张。")
+                    session_correct += 1
+                else:
+                    print(f"❌ 回答错误。打出【{tile_to_str(discard_tile)}】{user_shanten} 向听，有效进张 {user_count} 张。")
+                    print(f"最优解是打出：{' 或 '.join([tile_to_str(t) for t in best_discards])}，{best_shanten} 向听，有效进张 {best_count} 张。")
+                for best in best_discards:
+                    print(f"   打出【{tile_to_str(best)}】进张: {' '.join([tile_to_str(t) for t in shanten_analysis[best][2]])}")
             else:
-                print(f"❌ 回答错误。打出【{tile_to_str(discard_tile)}】听 {user_score} 张牌。")
+                user_score = 0
                 if discard_tile in analysis:
-                     print(f"   你的打法听: {' '.join([tile_to_str(t) for t in analysis[discard_tile][1]])}")
+                    user_score = analysis[discard_tile][0]
                 
-                print(f"最优解是打出：{' 或 '.join([tile_to_str(t) for t in best_discards])}，能听 {max_score} 张。")
-                for best in best_discards:
-                    if best in analysis:
-                        print(f"   打出【{tile_to_str(best)}】听: {' '.join([tile_to_str(t) for t in analysis[best][1]])}")
+                is_correct = discard_tile in best_discards
+                
+                if is_correct:
+                    print(f"✅ 回答正确！打出【{tile_to_str(discard_tile)}】听 {user_score} 张牌。")
+                    if user_score > 0 and discard_tile in analysis:
+                        print(f"   听牌详情: {' '.join([tile_to_str(t) for t in analysis[discard_tile][1]])}")
+                    session_correct += 1
+                else:
+                    print(f"❌ 回答错误。打出【{tile_to_str(discard_tile)}】听 {user_score} 张牌。")
+                    if discard_tile in analysis:
+                         print(f"   你的打法听: {' '.join([tile_to_str(t) for t in analysis[discard_tile][1]])}")
+                    
+                    print(f"最优解是打出：{' 或 '.join([tile_to_str(t) for t in best_discards])}，能听 {max_score} 张。")
+                    for best in best_discards:
+                        if best in analysis:
+                            print(f"   打出【{tile_to_str(best)}】听: {' '.join([tile_to_str(t) for t in analysis[best][1]])}")
+                
+                if win_probs is not None:
+                    print(f"   有效张数并列的打法，{WINPROB_DRAWS} 次摸牌内自摸概率：" +
+                          "，".join(f"{tile_to_str(t)} {p:.1%}" for t, p in win_probs.items()))
                 
             # 显示详细听牌信息（可选）
             # print(f"听牌详情: {[tile_to_str(t) for t in analysis[discard_tile][1]]}")
             
             # 记录日志
+            record_event(session_uid, "HongZhong", hand, discard_tile, is_correct, duration, compute_time)
+            profiling.record_question(compute_time, duration)
             try:
-                update_log_file(player_name, session_count, session_correct, session_total_time, session_start_time, mode="HongZhong")
+                update_log_file_async(player_name, session_count, session_correct, session_total_time, session_start_time, mode="HongZhong")
             except Exception:
                 pass
+            if scheduler is not None:
+                try:
+                    scheduler.record(puzzle_shape(puzzle), is_correct)
+                except Exception as e:
+                    print(f"出题调度不可用: {e}")
+                    scheduler = None
                 
             avg_time = session_total_time / session_count
             print(f"本次成绩: {session_correct}/{session_count} ({session_correct/session_count:.1%}) | 平均耗时: {avg_time:.2f}秒")
@@ -590,4 +789,8 @@ def main():
             break
 
 if __name__ == "__main__":
+    # 直接运行时本模块名为 __main__；登记成 HZ.HongZhong，main 里 import HZ.winprob 时复用本模块，
+    # 不再加载第二份（第二份查表、题库、缓存和快照退出钩子）
+    sys.modules.setdefault("HZ.HongZhong", sys.modules[__name__])
+    profiling.enable_from_argv(sys.argv[1:])
     main()
@@ -0,0 +1,142 @@
+"""
+红中麻将批量胡牌判定（NumPy 向量化）
+
+一次传入 N 手牌，返回长度 N 的结果数组，单花色代价直接用数组索引查
+laizi_table，不再逐手牌做 Python 循环。
+
+输入两种形式：
+    counts: (N, 28) 计数矩阵，第 j 列为牌 j 的张数（27 为红中）
+    hands : (N, 14) 牌ID数组（打包的手牌），先用 hands_to_counts 转换
+每种牌最多 4 张（即从真实牌堆发出的手牌），超过 4 张的计数不在查表范围内。
+
+命令行基准（与逐手 is_hu_with_laizi 对比并校验结果一致）：
+    python HZ/batch.py [N]
+"""
+import os
+import sys
+import time
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+project_root = os.path.dirname(current_dir)
+if project_root not in sys.path:
+    sys.path.append(project_root)
+
+from HZ.laizi_table import load_table, POW5
+
+NUM_KINDS = 28
+RED_DRAGON = 27
+
+_cost_array = None
+
+
+def _require_numpy():
+    if np is None:
+        raise ImportError("批量接口需要 numpy，请先 pip install numpy")
+
+
+def _costs():
+    """整张查表的 numpy 视图，形状 (5**9, 2)，首次调用时加载"""
+    global _cost_array
+    if _cost_array is None:
+        _require_numpy()
+        _cost_array = load_table().as_array()
+    return _cost_array
+
+
+def hands_to_counts(hands):
+    """
+    (N, k) 牌ID数组 -> (N, 28) 计数矩阵
+    hands 可以是二维数组或等长列表的列表
+    """
+    _require_numpy()
+    hands = np.asarray(hands, dtype=np.intp)
+    n = hands.shape[0]
+    # 每行偏移 28，展平后一次 bincount 完成所有手牌的计数
+    flat = (hands + (np.arange(n, dtype=np.intp) * NUM_KINDS)[:, None]).ravel()
+    counts = np.bincount(flat, minlength=n * NUM_KINDS)
+    return counts.reshape(n, NUM_KINDS).astype(np.uint8)
+
+
+def suit_indices(counts):
+    """(N, 28) 计数矩阵 -> (N, 3) 每个花色在查表中的索引"""
+    _require_numpy()
+    counts = np.asarray(counts)
+    suits = counts[:, :27].reshape(-1, 3, 9).astype(np.int64)
+    return suits @ np.asarray(POW5, dtype=np.int64)
+
+
+def batch_hu_need(counts):
+    """
+    counts: (N, 28) 计数矩阵
+    return: (N,) int 数组，每手牌胡牌所需的最少癞子数（不含已有红中）
+    规则与 is_hu_with_laizi 相同：将在任一花色，或由两张红中充当。
+    """
+    costs = _costs()[suit_indices(counts)].astype(np.int16)  # (N, 3, 2)
+    cost_3n = costs[:, :, 0]
+    cost_pair = costs[:, :, 1]
+    base = cost_3n.sum(axis=1)
+    # 某花色做将的额外代价 = cost_pair - cost_3n；红中做将额外代价为 2
+    extra = np.minimum((cost_pair - cost_3n).min(axis=1), 2)
+    return base + extra
+
+
+def batch_is_hu(counts):
+    """
+    counts: (N, 28) 计数矩阵
+    return: (N,) bool 数组
+    """
+    _require_numpy()
+    counts = np.asarray(counts)
+    return batch_hu_need(counts) <= counts[:, RED_DRAGON]
+
+
+def batch_is_hu_hands(hands):
+    """hands: (N, 14) 牌ID数组 -> (N,) bool 数组"""
+    return batch_is_hu(hands_to_counts(hands))
+
+
+def benchmark(n=200000, seed=0):
+    """随机发 n 手牌，比较批量接口与逐手 is_hu_with_laizi 的耗时并校验结果"""
+    _require_numpy()
+    from HZ.HongZhong import get_full_deck, is_hu_with_laizi
+
+    rng = np.random.default_rng(seed)
+    deck = np.asarray(get_full_deck(), dtype=np.intp)
+    # 每行独立洗牌取前14张
+    keys = rng.random((n, deck.size))
+    hands = deck[np.argsort(keys, axis=1)[:, :14]]
+
+    _costs()  # 预先加载，不计入计时
+    start = time.perf_counter()
+    batch_res = batch_is_hu_hands(hands)
+    batch_secs = time.perf_counter() - start
+
+    hand_lists = hands.tolist()
+    start = time.perf_counter()
+    scalar_res = [is_hu_with_laizi(h) for h in hand_lists]
+    scalar_secs = time.perf_counter() - start
+
+    mismatches = int((batch_res != np.asarray(scalar_res)).sum())
+    return {
+        "n": n,
+        "batch_seconds": batch_secs,
+        "scalar_seconds": scalar_secs,
+        "speedup": scalar_secs / batch_secs if batch_secs > 0 else float("inf"),
+        "hu_count": int(batch_res.sum()),
+        "mismatches": mismatches,
+    }
+
+
+if __name__ == "__main__":
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 200000
+    r = benchmark(n)
+    print(f"手牌数: {r['n']}，胡牌: {r['hu_count']}")
+    print(f"批量: {r['batch_seconds']:.3f}秒 ({r['n'] / r['batch_seconds']:,.0f} 手/秒)")
+    print(f"逐手: {r['scalar_seconds']:.3f}秒 ({r['n'] / r['scalar_seconds']:,.0f} 手/秒)")
+    print(f"加速比: {r['speedup']:.1f}x，不一致: {r['mismatches']}")
+    sys.exit(1 if r["mismatches"] else 0)
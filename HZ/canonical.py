@@ -0,0 +1,132 @@
+"""
+红中麻将手牌按花色置换规范化 + 分析结果缓存
+
+万/条/筒三门只是名字不同，互换后 analyze_hand / analyze_shanten 的结果只差一个花色映射。
+把手牌的三门按计数向量排序得到规范形式，以它为键缓存分析结果；命中时把结果里的牌ID
+映射回真实花色即可，不用重新计算。红中（27）不参与置换。
+
+命令行：
+    python HZ/canonical.py [N]    # 随机发 N 手牌，校验缓存结果与直接计算一致，并打印命中率
+"""
+import os
+import random
+import sys
+import time
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+project_root = os.path.dirname(current_dir)
+if project_root not in sys.path:
+    sys.path.append(project_root)
+
+from utils.cache import LRUCache
+
+RED_DRAGON = 27
+
+
+def canonical_form(counts):
+    """
+    长度28的计数 -> (规范键, perm)
+        规范键: 三门计数 tuple 按从大到小排序后拼接，再加红中数（长度28的 tuple）
+        perm[i]: 规范形式的第 i 门对应原手牌的哪一门
+    """
+    suits = [tuple(counts[s * 9:s * 9 + 9]) for s in range(3)]
+    perm = sorted(range(3), key=lambda s: suits[s], reverse=True)
+    key = suits[perm[0]] + suits[perm[1]] + suits[perm[2]] + (counts[RED_DRAGON],)
+    return key, perm
+
+
+def relabel_tile(tile, perm):
+    """规范形式中的牌ID -> 原手牌中的牌ID"""
+    if tile == RED_DRAGON:
+        return tile
+    suit, rank = divmod(tile, 9)
+    return perm[suit] * 9 + rank
+
+
+def relabel_result(result, perm):
+    """
+    把规范形式下的分析结果映射回原花色（总是返回新对象，不会改动缓存里的值）
+    result: {打出的牌: (..., 牌ID列表)}，即 analyze_hand / analyze_shanten 的返回格式
+    """
+    mapped = {}
+    for discard, value in result.items():
+        tiles = sorted(relabel_tile(t, perm) for t in value[-1])
+        mapped[relabel_tile(discard, perm)] = value[:-1] + (tiles,)
+    # 与直接计算一样按打出的牌排序
+    return {k: mapped[k] for k in sorted(mapped)}
+
+
+class CanonicalCache:
+    """
+    以规范手牌为键的分析结果缓存
+
+    cache = CanonicalCache(analyze_hand, name="hz_analysis")
+    cache(hand_14)  # 结果与 analyze_hand(hand_14) 相同
+
+    Args:
+        compute: 分析函数，参数为 14 张手牌列表，返回 {打出的牌: (..., 牌ID列表)}
+        maxsize: 最多缓存的规范手牌数
+        snapshot_file: 设置后启动时从该文件预热、退出时保存（见 LRUCache.enable_snapshot）
+    """
+
+    def __init__(self, compute, name="canonical", maxsize=50000, snapshot_file=""):
+        self.compute = compute
+        self.cache = LRUCache(maxsize=maxsize, name=name)
+        if snapshot_file:
+            self.cache.enable_snapshot(snapshot_file)
+
+    def __call__(self, hand):
+        counts = [0] * 28
+        for t in hand:
+            counts[t] += 1
+        key, perm = canonical_form(counts)
+        result = self.cache.get(key)
+        if result is None:
+            canonical_hand = [i for i in range(28) for _ in range(key[i])]
+            result = self.compute(canonical_hand)
+            self.cache[key] = result
+        return relabel_result(result, perm)
+
+    def stats_str(self):
+        return self.cache.stats_str()
+
+
+if __name__ == "__main__":
+    from HZ.HongZhong import get_full_deck, analyze_hand, cached_analyze_hand
+
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 5000
+    rng = random.Random(0)
+    deck = get_full_deck()
+    hands = []
+    for _ in range(n):
+        rng.shuffle(deck)
+        hands.append(sorted(deck[:14]))
+    # 模拟批量数据里同一手牌以不同花色重复出现
+    for hand in hands[:n // 5]:
+        perm = rng.sample(range(3), 3)
+        hands.append(sorted(relabel_tile(t, perm) for t in hand))
+    rng.shuffle(hands)
+
+    mismatches = 0
+    hit_times, miss_times, direct_times = [], [], []
+    cache = cached_analyze_hand.cache
+    for hand in hands:
+        hits = cache.hits
+        start = time.perf_counter()
+        result = cached_analyze_hand(hand)
+        elapsed = time.perf_counter() - start
+        (hit_times if cache.hits > hits else miss_times).append(elapsed)
+        start = time.perf_counter()
+        expected = analyze_hand(hand)
+        direct_times.append(time.perf_counter() - start)
+        if result != expected:
+            mismatches += 1
+
+    def avg_us(values):
+        return sum(values) / len(values) * 1e6 if values else 0.0
+
+    print(f"{len(hands)} 手牌（其中 {n // 5} 手为换花色的重复），不一致: {mismatches}")
+    print(f"直接计算 平均 {avg_us(direct_times):.0f}µs；缓存未命中 {avg_us(miss_times):.0f}µs，"
+          f"命中 {avg_us(hit_times):.1f}µs")
+    print(cached_analyze_hand.stats_str())
+    sys.exit(1 if mismatches else 0)
@@ -0,0 +1,309 @@
+"""
+单花色癞子代价查表
+
+对每个花色的 9 格计数向量（每格 0-4 张）离线算出两项代价：
+    cost_3n   : 凑成全刻子/顺子（3n）所需的最少癞子数，与 get_laizi_cost 一致
+    cost_pair : 在该花色中取一对做将后，剩余牌凑成 3n 所需的最少癞子数（3n+2）
+
+每格超过 4 张（例如已有 4 张再摸同一张）不在表内，调用方需回退到递归计算。
+
+索引方式：counts 按 5 进制展开 index = sum(c[i] * 5**i)，共 5**9 项，
+每项 2 字节（cost_3n, cost_pair），整表约 3.9MB，存为二进制文件后用 mmap 只读映射，
+查表即一次索引，不再递归。
+
+命令行：
+    python HZ/laizi_table.py build    # 生成（或重建）表文件
+    python HZ/laizi_table.py verify   # 与 get_laizi_cost 交叉校验
+"""
+import mmap
+import os
+import random
+import struct
+import sys
+import tempfile
+import time
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+project_root = os.path.dirname(current_dir)
+if project_root not in sys.path:
+    sys.path.append(project_root)
+
+from utils.filelock import FileLock
+
+TABLE_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "laizi_table.bin")
+
+MAGIC = b"HZLT"
+VERSION = 2  # 2: 补上 89/9 + 癞子 组成 789 的情况
+HEADER = struct.Struct("<4sII")  # magic, version, entry_count
+HEADER_SIZE = HEADER.size
+
+SLOTS = 9
+BASE = 5
+POW5 = [BASE ** i for i in range(SLOTS)]
+TABLE_SIZE = BASE ** SLOTS
+
+# 最近一次构建/加载的耗时（秒），供调用方打印或统计
+build_seconds = 0.0
+load_seconds = 0.0
+
+
+def counts_to_index(counts):
+    """9 格计数 -> 表索引"""
+    idx = 0
+    for i in range(SLOTS):
+        idx += counts[i] * POW5[i]
+    return idx
+
+
+def index_to_counts(idx):
+    """表索引 -> 9 格计数（tuple）"""
+    c = []
+    for _ in range(SLOTS):
+        idx, d = divmod(idx, BASE)
+        c.append(d)
+    return tuple(c)
+
+
+def build_table():
+    """
+    自底向上生成整张表
+    拆牌递推与 get_laizi_cost 完全相同：取最小的一张，尝试刻子 / 顺子（含 789 边张）。
+    拿掉牌后的索引一定更小，所以按索引递增顺序计算即可直接复用前面的结果。
+    return: bytearray，长度 2 * 5**9，交错存放 (cost_3n, cost_pair)
+    """
+    global build_seconds
+    start = time.perf_counter()
+
+    cost3 = bytearray(TABLE_SIZE)
+    costp = bytearray(TABLE_SIZE)
+    c = [0] * SLOTS
+
+    for v in range(TABLE_SIZE):
+        if v:
+            # 5 进制里程表式 +1，避免每项都做一次完整的 divmod 展开
+            i = 0
+            while c[i] == 4:
+                c[i] = 0
+                i += 1
+            c[i] += 1
+
+            idx = 0
+            while c[idx] == 0:
+                idx += 1
+            p = POW5[idx]
+            ci = c[idx]
+
+            # 1. 刻子（不足3张补癞子）
+            if ci >= 3:
+                res = cost3[v - 3 * p]
+            else:
+                res = (3 - ci) + cost3[v - ci * p]
+
+            # 2. 顺子（缺的张用癞子补）
+            if idx + 2 < SLOTS:
+                nv = v - p
+                need = 0
+                if c[idx + 1] > 0:
+                    nv -= POW5[idx + 1]
+                else:
+                    need += 1
+                if c[idx + 2] > 0:
+                    nv -= POW5[idx + 2]
+                else:
+                    need += 1
+                alt = need + cost3[nv]
+                if alt < res:
+                    res = alt
+            else:
+                # 最小的牌是 8 或 9：只能组成 789，缺的张用癞子补
+                nv = v
+                need = 0
+                for j in range(6, SLOTS):
+                    if j >= idx and c[j] > 0:
+                        nv -= POW5[j]
+                    else:
+                        need += 1
+                alt = need + cost3[nv]
+                if alt < res:
+                    res = alt
+            cost3[v] = res
+
+        # 做将：遍历 9 种牌做将，与 is_hu_with_laizi 中的循环一致
+        best = 255
+        for i in range(SLOTS):
+            ci = c[i]
+            if ci >= 2:
+                alt = cost3[v - 2 * POW5[i]]
+            elif ci == 1:
+                alt = 1 + cost3[v - POW5[i]]
+            else:
+                alt = 2 + cost3[v]
+            if alt < best:
+                best = alt
+        costp[v] = best
+
+    table = bytearray(2 * TABLE_SIZE)
+    table[0::2] = cost3
+    table[1::2] = costp
+
+    build_seconds = time.perf_counter() - start
+    return table
+
+
+def save_table(table, path=TABLE_FILE):
+    """写入二进制表文件（先写同目录下的唯一临时文件再替换，避免半截文件，多个进程同时写也互不覆盖）"""
+    fd, tmp_path = tempfile.mkstemp(prefix=os.path.basename(path) + ".", suffix=".tmp",
+                                    dir=os.path.dirname(path) or ".")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(HEADER.pack(MAGIC, VERSION, TABLE_SIZE))
+            f.write(table)
+        os.replace(tmp_path, path)
+    except BaseException:
+        try:
+            os.remove(tmp_path)
+        except OSError:
+            pass
+        raise
+
+
+class LaiziTable:
+    """
+    只读的查表对象，底层是 mmap（或内存中的 bytearray）
+    用法：
+        table = load_table()
+        cost_3n, cost_pair = table.lookup(counts)
+    """
+
+    def __init__(self, buf, offset=0, source=None):
+        self.buf = buf
+        self.offset = offset
+        self.source = source
+
+    def lookup_index(self, idx):
+        pos = self.offset + 2 * idx
+        return self.buf[pos], self.buf[pos + 1]
+
+    def lookup(self, counts):
+        return self.lookup_index(counts_to_index(counts))
+
+    def cost_3n(self, counts):
+        return self.buf[self.offset + 2 * counts_to_index(counts)]
+
+    def cost_pair(self, counts):
+        return self.buf[self.offset + 2 * counts_to_index(counts) + 1]
+
+    def as_array(self):
+        """
+        以 numpy 数组方式访问整张表（不拷贝），形状 (5**9, 2)
+        需要 numpy；没有安装时抛出 ImportError
+        """
+        import numpy as np
+        arr = np.frombuffer(self.buf, dtype=np.uint8, count=2 * TABLE_SIZE, offset=self.offset)
+        return arr.reshape(TABLE_SIZE, 2)
+
+
+def _map_table(path):
+    """映射并校验表文件；不存在或不符时返回 None"""
+    if os.path.exists(path):
+        with open(path, "rb") as f:
+            try:
+                mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            except ValueError:
+                mm = None
+        if mm is not None and len(mm) == HEADER_SIZE + 2 * TABLE_SIZE:
+            magic, version, count = HEADER.unpack_from(mm, 0)
+            if magic == MAGIC and version == VERSION and count == TABLE_SIZE:
+                return LaiziTable(mm, HEADER_SIZE, source=path)
+        if mm is not None:
+            mm.close()
+    return None
+
+
+def load_table(path=TABLE_FILE, build_if_missing=True):
+    """
+    映射表文件；文件不存在（或版本不符）时按需现场生成并保存
+    生成时持有跨进程文件锁（path + ".lock"），多个进程同时首次运行时只有一个生成，其余等它写完直接映射
+    提示信息输出到 stderr，不混进批处理等工具的 stdout
+    return: LaiziTable
+    """
+    global load_seconds
+    start = time.perf_counter()
+
+    table = _map_table(path)
+    if table is not None:
+        load_seconds = time.perf_counter() - start
+        return table
+    if not build_if_missing:
+        raise FileNotFoundError(f"癞子查表文件不存在或已损坏: {path}")
+
+    try:
+        lock = FileLock(path)
+        lock.acquire()
+    except OSError:
+        # 目录不可写、连锁文件都建不了：不加锁，下面保存也会失败，只在内存中使用
+        lock = None
+    try:
+        # 等锁期间别的进程可能已经生成好了
+        table = _map_table(path)
+        if table is not None:
+            load_seconds = time.perf_counter() - start
+            return table
+        print("正在生成癞子查表（仅首次运行需要）...", file=sys.stderr)
+        table = build_table()
+        try:
+            save_table(table, path)
+        except OSError as e:
+            # 目录不可写时仍可在内存中使用
+            print(f"保存癞子查表失败: {e}", file=sys.stderr)
+            load_seconds = time.perf_counter() - start
+            return LaiziTable(table, 0, source=None)
+    finally:
+        if lock is not None:
+            lock.release()
+    return load_table(path, build_if_missing=False)
+
+
+def verify_table(table, samples=20000, max_exhaustive_sum=6, seed=0):
+    """
+    与原有递归实现 get_laizi_cost 交叉校验
+    - 所有张数 <= max_exhaustive_sum 的向量全部比对
+    - 另外随机抽 samples 个向量比对
+    return: (不一致的向量列表, 比对总数)，列表为空表示通过
+    """
+    from HZ.HongZhong import suit_costs_slow as reference
+
+    rng = random.Random(seed)
+    candidates = [v for v in range(TABLE_SIZE) if sum(index_to_counts(v)) <= max_exhaustive_sum]
+    candidates += [rng.randrange(TABLE_SIZE) for _ in range(samples)]
+
+    mismatches = []
+    for v in candidates:
+        counts = index_to_counts(v)
+        if table.lookup_index(v) != reference(counts):
+            mismatches.append(counts)
+    return mismatches, len(candidates)
+
+
+def main(argv):
+    cmd = argv[1] if len(argv) > 1 else "verify"
+    if cmd == "build":
+        table = build_table()
+        save_table(table)
+        print(f"生成完成: {TABLE_FILE} ({len(table)} 字节)，耗时 {build_seconds:.2f}秒")
+    elif cmd == "verify":
+        table = load_table()
+        print(f"加载耗时: {load_seconds * 1000:.2f}ms")
+        mismatches, checked = verify_table(table)
+        if mismatches:
+            print(f"❌ 校验失败: {len(mismatches)}/{checked} 不一致，例如 {mismatches[:5]}")
+            return 1
+        print(f"✅ 校验通过: {checked} 个向量与 get_laizi_cost 一致")
+    else:
+        print(f"未知命令: {cmd}（可用: build, verify）")
+        return 2
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv))
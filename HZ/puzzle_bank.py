@@ -0,0 +1,176 @@
+"""
+红中麻将分级题库：固定种子发一批 14 张手牌，离线算好难度分，按难度分档存成二进制文件
+
+红中的牌型太多没法穷举（清一色的题库见 CS/puzzle_bank.py），这里存一个抽样的题池。
+每手牌存一条 14 字节的记录：
+    hand_lo    : uint64  utils.hand 打包格式的低 64 位
+    hand_hi    : uint32  高 20 位
+    difficulty : uint16  难度分（见 difficulty_score）
+文件末尾是分档索引（utils.difficulty），抽某一档的题是 O(1)；答案不入库，出题时照常走 cached_analyze_hand。
+
+文件布局：
+    header (16 字节) | records: count * 14 字节 | 分档索引
+
+命令行：
+    python HZ/puzzle_bank.py build [N]    # 生成题库文件（默认 20000 手）
+    python HZ/puzzle_bank.py stats        # 打印各档统计
+"""
+import bisect
+import mmap
+import os
+import random
+import struct
+import sys
+import time
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+project_root = os.path.dirname(current_dir)
+if project_root not in sys.path:
+    sys.path.append(project_root)
+
+from utils.difficulty import LEVELS, LevelIndex, assign_levels, pack_index
+from utils.hand import pack, to_tiles
+
+BANK_FILE = os.path.join(current_dir, "puzzle_bank.bin")
+SEED = 20261018
+DEFAULT_SIZE = 20000
+
+MAGIC = b"HZPB"
+VERSION = 1
+HEADER = struct.Struct("<4sIII")    # magic, version, count, levels
+RECORD = struct.Struct("<QIH")      # hand_lo, hand_hi, difficulty
+LOW_MASK = (1 << 64) - 1
+
+# 有效张数与最优打法差这么多以内的打法算“干扰项”
+NEAR_MARGIN = 4
+
+
+def difficulty_score(analysis, shanten_analysis):
+    """
+    难度分，参数同 generate_puzzle 的返回值：
+        - 干扰项（与最优打法差 NEAR_MARGIN 张以内的次优打法）越多越难，每个 3 分
+        - 能达到最优向听数的打法越多、最优打法的有效牌种类越多越难，各 1 分
+        - 向听数每多一向听 2 分
+    """
+    if analysis:
+        shanten = 0
+        candidates = {d: (v[0], v[1]) for d, v in analysis.items()}
+    else:
+        shanten = min(v[0] for v in shanten_analysis.values())
+        candidates = {d: (v[1], v[2]) for d, v in shanten_analysis.items() if v[0] == shanten}
+    best = max(v[0] for v in candidates.values())
+    near = sum(1 for v in candidates.values() if best - NEAR_MARGIN <= v[0] < best)
+    kinds = max(len(v[1]) for v in candidates.values() if v[0] == best)
+    return 3 * near + len(candidates) + kinds + 2 * shanten
+
+
+def build_bank(size=DEFAULT_SIZE, path=BANK_FILE, seed=SEED, levels=LEVELS):
+    """
+    用固定种子发 size 手牌、打分并写入题库文件
+    return: (手牌数, 档数, 耗时秒)
+    """
+    from HZ.HongZhong import get_full_deck, cached_analyze_hand, cached_analyze_shanten
+
+    start = time.perf_counter()
+    rng = random.Random(seed)
+    deck = get_full_deck()
+    records = []
+    scores = []
+    for _ in range(size):
+        rng.shuffle(deck)
+        hand = sorted(deck[:14])
+        analysis = cached_analyze_hand(hand)
+        shanten_analysis = None if analysis else cached_analyze_shanten(hand)
+        score = difficulty_score(analysis, shanten_analysis)
+        packed = pack(hand)
+        records.append(RECORD.pack(packed & LOW_MASK, packed >> 64, score))
+        scores.append(score)
+    item_levels = assign_levels(scores, levels)
+    num_levels = max(item_levels, default=0)
+
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(HEADER.pack(MAGIC, VERSION, len(records), num_levels))
+        f.write(b"".join(records))
+        f.write(pack_index(item_levels))
+    os.replace(tmp_path, path)
+    return len(records), num_levels, time.perf_counter() - start
+
+
+class PuzzleBank:
+    """
+    只读题库（mmap）
+        bank[i]                -> (hand, difficulty)
+        bank.sample(level=N)   -> 第 N 档（1 最简单）随机一手 14 张牌
+        bank.level_of(score)   -> 难度分对应的档位（题库外的手牌也能分档）
+    """
+
+    def __init__(self, path=BANK_FILE):
+        with open(path, "rb") as f:
+            self._mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, count, levels = HEADER.unpack_from(self._mm, 0)
+        if magic != MAGIC or version != VERSION:
+            self._mm.close()
+            raise ValueError(f"题库文件格式不符: {path}")
+        self.count = count
+        self.levels = LevelIndex(self._mm, HEADER.size + count * RECORD.size, levels)
+        self._level_bounds = None
+
+    def __len__(self):
+        return self.count
+
+    def __getitem__(self, i):
+        lo, hi, score = RECORD.unpack_from(self._mm, HEADER.size + i * RECORD.size)
+        return to_tiles(lo | (hi << 64)), score
+
+    def sample(self, rng=random, level=1):
+        """return: 第 level 档的一手 14 张牌（已排序）"""
+        return self[self.levels.draw(level, rng)][0]
+
+    def level_of(self, score):
+        """各档的难度分区间互不重叠（同分同档），按每档的最低分二分"""
+        if self._level_bounds is None:
+            self._level_bounds = [min(self[i][1] for i in self.levels.items(level))
+                                  for level in range(1, self.levels.levels + 1)]
+        return max(1, bisect.bisect_right(self._level_bounds, score))
+
+    def close(self):
+        self.levels.release()
+        self._mm.close()
+
+
+def load_bank(path=BANK_FILE):
+    """题库文件存在时返回 PuzzleBank，否则返回 None"""
+    if not os.path.exists(path):
+        return None
+    try:
+        return PuzzleBank(path)
+    except (ValueError, OSError, struct.error):
+        return None
+
+
+if __name__ == "__main__":
+    cmd = sys.argv[1] if len(sys.argv) > 1 else "stats"
+    if cmd == "build":
+        size = int(sys.argv[2]) if len(sys.argv) > 2 else DEFAULT_SIZE
+        count, levels, secs = build_bank(size)
+        print(f"题库生成完成: {count} 手，分 {levels} 档，文件 {os.path.getsize(BANK_FILE)} 字节，耗时 {secs:.1f}秒")
+    elif cmd == "stats":
+        bank = load_bank()
+        if bank is None:
+            print(f"题库不存在，请先运行: python {os.path.relpath(__file__)} build")
+            sys.exit(1)
+        from HZ.HongZhong import hand_to_str
+
+        n = 100000
+        for level in range(1, bank.levels.levels + 1):
+            start = time.perf_counter()
+            for _ in range(n):
+                bank.sample(level=level)
+            elapsed = time.perf_counter() - start
+            scores = [bank[bank.levels.draw(level)][1] for _ in range(1000)]
+            print(f"第 {level} 档: {bank.levels.size(level)} 手，难度分 {min(scores)}-{max(scores)}，"
+                  f"抽题 {n / elapsed:,.0f} 题/秒，例如 {hand_to_str(bank.sample(level=level))}")
+    else:
+        print(f"未知命令: {cmd}（可用: build, stats）")
+        sys.exit(2)
@@ -0,0 +1,173 @@
+"""
+红中麻将多轮对局中的手牌状态（增量更新听牌 / 有效进张）
+
+HandSession 保存当前手牌和各种牌的剩余张数（扣掉手牌和场上已见过的牌），随着摸牌、打牌、看到别人打出的牌逐步更新：
+    - 有效张数按真正剩下的张数计算（4 - 手里已有 - 已见过），而不是 4 - 手里已有
+    - 各花色的代价缓存在整局内共享，每次摸/打只会改动一个花色，其余直接复用
+    - 13 张状态的听牌结果按手牌计数缓存，回到同一手牌时不再重算
+    - 还没听牌时给出向听数和有效进张（见 shanten.py）
+
+用法：
+    session = HandSession(hand_14)
+    session.analyze()          # 14 张：每种打法的 (有效张数, 听牌列表)
+    session.discard(tile)      # 自己打出
+    session.see(tile)          # 别人打出 / 亮出的牌
+    session.draw(tile)         # 摸牌
+    session.ting()             # 13 张：(有效张数, 听牌列表)
+"""
+import os
+import sys
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+project_root = os.path.dirname(current_dir)
+if project_root not in sys.path:
+    sys.path.append(project_root)
+
+from utils.cache import LRUCache
+from HZ.HongZhong import (hand_to_counts, get_ting_list_from_counts,
+                          count_valid_tiles, tile_to_str)
+from HZ.shanten import get_effective_tiles_from_counts
+
+SESSION_CACHE_SIZE = 20000
+
+
+class HandSession:
+    """
+    一局中的手牌状态
+    Args:
+        hand: 初始手牌（13 或 14 张）
+        seen: 可选，开局时已经见过的其他牌（牌ID列表）
+    """
+
+    def __init__(self, hand, seen=None):
+        self.counts = hand_to_counts(hand)
+        self.remaining = [4 - c for c in self.counts]
+        for tile in seen or []:
+            self.see(tile)
+        # 花色代价缓存：整局共享，摸/打只会改变一个花色
+        self.suit_memo = LRUCache(maxsize=SESSION_CACHE_SIZE, name="session_suits")
+        # 13 张状态 -> 听牌列表
+        self._ting_cache = LRUCache(maxsize=SESSION_CACHE_SIZE, name="session_ting")
+        self.turns = 0
+
+    # ---------- 状态变化 ----------
+    @property
+    def size(self):
+        return sum(self.counts)
+
+    def hand(self):
+        """当前手牌（排序后的牌ID列表）"""
+        return [t for t in range(28) for _ in range(self.counts[t])]
+
+    def draw(self, tile):
+        """从牌墙摸到一张牌"""
+        if self.remaining[tile] <= 0:
+            raise ValueError(f"{tile_to_str(tile)} 已经没有剩余了")
+        self.counts[tile] += 1
+        self.remaining[tile] -= 1
+        self.turns += 1
+
+    def discard(self, tile):
+        """自己打出一张牌（打出后算作已见过，剩余张数不变）"""
+        if self.counts[tile] <= 0:
+            raise ValueError(f"手里没有 {tile_to_str(tile)}")
+        self.counts[tile] -= 1
+
+    def see(self, tile):
+        """看到别人打出 / 亮出的一张牌"""
+        if self.remaining[tile] <= 0:
+            raise ValueError(f"{tile_to_str(tile)} 已经没有剩余了")
+        self.remaining[tile] -= 1
+
+    # ---------- 分析 ----------
+    def _ting_list(self):
+        key = tuple(self.counts)
+        ting_list = self._ting_cache.get(key)
+        if ting_list is None:
+            ting_list = get_ting_list_from_counts(self.counts, self.suit_memo)
+            self._ting_cache[key] = ting_list
+        return ting_list
+
+    def ting(self):
+        """
+        13 张时的听牌情况
+        return: (有效张数, 听牌列表)，有效张数按实际剩余计算
+        """
+        ting_list = self._ting_list()
+        return count_valid_tiles(ting_list, self.counts, self.remaining), ting_list
+
+    def analyze(self):
+        """
+        14 张时每种打法的听牌情况，与 analyze_hand 相同的返回格式
+        return: dict { discard_tile: (valid_count, ting_list) }（只包含能听牌的打法）
+        """
+        results = {}
+        for discard in range(28):
+            if self.counts[discard] == 0:
+                continue
+            self.counts[discard] -= 1
+            ting_list = self._ting_list()
+            count = count_valid_tiles(ting_list, self.counts, self.remaining)
+            self.counts[discard] += 1
+            if count > 0:
+                results[discard] = (count, ting_list)
+        return results
+
+    def analyze_shanten(self):
+        """
+        14 张时每种打法的向听数与有效进张（按实际剩余计算）
+        return: dict { discard_tile: (shanten, valid_count, effective_tiles) }
+        """
+        results = {}
+        for discard in range(28):
+            if self.counts[discard] == 0:
+                continue
+            self.counts[discard] -= 1
+            results[discard] = get_effective_tiles_from_counts(self.counts, self.remaining)
+            self.counts[discard] += 1
+        return results
+
+    def is_hu(self):
+        """14 张时是否已经胡牌：少一张时听牌且最后一张在听牌列表中"""
+        for tile in range(28):
+            if self.counts[tile] == 0:
+                continue
+            self.counts[tile] -= 1
+            ting_list = self._ting_list()
+            self.counts[tile] += 1
+            return tile in ting_list
+        return False
+
+    def cache_stats(self):
+        return [self.suit_memo.stats(), self._ting_cache.stats()]
+
+
+if __name__ == "__main__":
+    # 简单演示：随机发牌后每轮摸一张、打出有效张数最多的一张
+    import random
+    from HZ.HongZhong import get_full_deck, hand_to_str
+
+    deck = get_full_deck()
+    random.shuffle(deck)
+    session = HandSession(deck[:14])
+    wall = deck[14:]
+    for turn in range(10):
+        analysis = session.analyze()
+        if analysis:
+            tile = max(analysis, key=lambda t: analysis[t][0])
+            info = f"听 {analysis[tile][0]} 张"
+        else:
+            shanten_analysis = session.analyze_shanten()
+            tile = min(shanten_analysis, key=lambda t: (shanten_analysis[t][0], -shanten_analysis[t][1]))
+            info = f"{shanten_analysis[tile][0]} 向听，进张 {shanten_analysis[tile][1]} 张"
+        print(f"第{turn + 1}轮 {hand_to_str(session.hand())} -> 打 {tile_to_str(tile)}（{info}）")
+        session.discard(tile)
+        # 对手打出三张
+        for _ in range(3):
+            session.see(wall.pop())
+        session.draw(wall.pop())
+        if session.is_hu():
+            print(f"胡牌！{hand_to_str(session.hand())}")
+            break
+    for s in session.cache_stats():
+        print(s)
@@ -0,0 +1,277 @@
+"""
+红中麻将向听数计算（红中为癞子）
+
+与 get_laizi_cost 相同，按花色的 9 格计数向量拆分，但这里统计“搭子”：
+胡牌 = 4 个面子位 + 1 个将位，每个位置可以先放一部分牌
+    面子位: AAA / ABC（3张）, AA / AB / A_C（2张）, A（1张）
+    将位  : AA（2张）, A（1张）
+设非红中牌最多能放进这些位置 U 张，红中 L 张（可补任意缺口），则
+    还差的张数 = 14 - U - L
+    向听数     = 14 - U - L - 1      （-1 表示已胡，0 表示听牌）
+14 张手牌直接代入即为“打出最优一张后”的向听数。
+
+单花色的结果是一张 5x2 的表 best[k][p]：最多用 k 个面子位、p 个将位时能放进的最多张数，
+按花色计数缓存（LRUCache），三个花色再按 k、p 合并。
+
+命令行：
+    python HZ/shanten.py          # 与 is_hu_with_laizi / 听牌结果交叉校验并测速
+"""
+import os
+import random
+import sys
+import time
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+project_root = os.path.dirname(current_dir)
+if project_root not in sys.path:
+    sys.path.append(project_root)
+
+from utils.cache import LRUCache
+from utils import profiling
+
+RED_DRAGON = 27
+MAX_MELDS = 4
+
+# 单花色搭子表缓存：counts_tuple -> best（长度10的tuple，下标 k*2+p）
+BLOCK_CACHE_SIZE = int(os.environ.get("HZ_SHANTEN_CACHE_SIZE", "200000"))
+memo_blocks = LRUCache(maxsize=BLOCK_CACHE_SIZE, name="shanten_blocks")
+# 单花色“摸入一张后”的搭子表缓存：counts_tuple -> [best_after_draw_i for i in 0..8]
+memo_block_draws = LRUCache(maxsize=BLOCK_CACHE_SIZE, name="shanten_draws")
+
+_EMPTY = (0,) * ((MAX_MELDS + 1) * 2)
+
+
+def _take(best, sub, used, dk, dp):
+    """best[k][p] = max(best[k][p], used + sub[k-dk][p-dp])"""
+    for k in range(dk, MAX_MELDS + 1):
+        for p in range(dp, 2):
+            v = used + sub[(k - dk) * 2 + p - dp]
+            if v > best[k * 2 + p]:
+                best[k * 2 + p] = v
+
+
+def suit_blocks(counts_tuple):
+    """
+    单花色搭子表
+    return: tuple 长度10，下标 k*2+p 为“最多 k 个面子位、p 个将位”能放进的最多张数
+    """
+    cached = memo_blocks.get(counts_tuple)
+    if cached is not None:
+        return cached
+
+    idx = -1
+    for i in range(9):
+        if counts_tuple[i] > 0:
+            idx = i
+            break
+    if idx == -1:
+        return _EMPTY
+
+    c = list(counts_tuple)
+    ci = c[idx]
+    best = [0] * ((MAX_MELDS + 1) * 2)
+
+    def sub_with(removals):
+        for j in removals:
+            c[j] -= 1
+        res = suit_blocks(tuple(c))
+        for j in removals:
+            c[j] += 1
+        return res
+
+    # 0. 这张牌不用（之后会被打掉）
+    _take(best, sub_with((idx,)), 0, 0, 0)
+
+    # 1. 以它为最小牌放进一个面子位
+    if ci >= 3:
+        _take(best, sub_with((idx, idx, idx)), 3, 1, 0)
+    if idx + 2 < 9 and c[idx + 1] > 0 and c[idx + 2] > 0:
+        _take(best, sub_with((idx, idx + 1, idx + 2)), 3, 1, 0)
+    if ci >= 2:
+        _take(best, sub_with((idx, idx)), 2, 1, 0)
+    if idx + 1 < 9 and c[idx + 1] > 0:
+        _take(best, sub_with((idx, idx + 1)), 2, 1, 0)
+    if idx + 2 < 9 and c[idx + 2] > 0:
+        _take(best, sub_with((idx, idx + 2)), 2, 1, 0)
+    _take(best, sub_with((idx,)), 1, 1, 0)
+
+    # 2. 放进将位
+    if ci >= 2:
+        _take(best, sub_with((idx, idx)), 2, 0, 1)
+    _take(best, sub_with((idx,)), 1, 0, 1)
+
+    result = tuple(best)
+    memo_blocks[counts_tuple] = result
+    return result
+
+
+def merge_blocks(a, b):
+    """合并两个花色的搭子表（面子位、将位在两者之间分配）"""
+    out = [0] * ((MAX_MELDS + 1) * 2)
+    for k1 in range(MAX_MELDS + 1):
+        for p1 in range(2):
+            va = a[k1 * 2 + p1]
+            for k2 in range(MAX_MELDS + 1 - k1):
+                for p2 in range(2 - p1):
+                    v = va + b[k2 * 2 + p2]
+                    pos = (k1 + k2) * 2 + p1 + p2
+                    if v > out[pos]:
+                        out[pos] = v
+    return out
+
+
+def _max_used(a, b):
+    """只求合并后 best[4][1]（完整手牌能放进的最多张数），比 merge_blocks 省很多"""
+    res = 0
+    for k1 in range(MAX_MELDS + 1):
+        k2 = MAX_MELDS - k1
+        v = a[k1 * 2] + b[k2 * 2 + 1]
+        if v > res:
+            res = v
+        v = a[k1 * 2 + 1] + b[k2 * 2]
+        if v > res:
+            res = v
+    return res
+
+
+def suit_block_draws(counts_tuple):
+    """单花色摸入第 i 张（0-8）后的搭子表列表，按花色计数缓存"""
+    cached = memo_block_draws.get(counts_tuple)
+    if cached is not None:
+        return cached
+    c = list(counts_tuple)
+    draws = []
+    for i in range(9):
+        c[i] += 1
+        draws.append(suit_blocks(tuple(c)))
+        c[i] -= 1
+    memo_block_draws[counts_tuple] = draws
+    return draws
+
+
+def _suits(counts):
+    return tuple(counts[0:9]), tuple(counts[9:18]), tuple(counts[18:27])
+
+
+def shanten_from_counts(counts):
+    """
+    counts: 长度28的计数列表（13 或 14 张）
+    return: 向听数（-1 已胡，0 听牌）
+    """
+    w, t, b = _suits(counts)
+    merged = merge_blocks(suit_blocks(w), suit_blocks(t))
+    used = _max_used(merged, suit_blocks(b))
+    return 14 - used - counts[RED_DRAGON] - 1
+
+
+def calc_shanten(hand):
+    """hand: 牌ID列表 -> 向听数"""
+    counts = [0] * 28
+    for tile in hand:
+        counts[tile] += 1
+    return shanten_from_counts(counts)
+
+
+def get_effective_tiles_from_counts(counts, remaining=None):
+    """
+    13 张手牌的向听数与有效进张
+    counts: 长度28的计数列表
+    remaining: 可选，长度28的剩余张数；不给时按 4 - 手里已有 计算
+    return: (向听数, 有效张数, 有效牌列表)
+    """
+    suits = _suits(counts)
+    blocks = [suit_blocks(s) for s in suits]
+    laizi = counts[RED_DRAGON]
+    used_now = _max_used(merge_blocks(blocks[0], blocks[1]), blocks[2])
+    shanten = 14 - used_now - laizi - 1
+
+    effective = []
+    for s in range(3):
+        others = [blocks[j] for j in range(3) if j != s]
+        rest = merge_blocks(others[0], others[1])
+        for i, drawn in enumerate(suit_block_draws(suits[s])):
+            # 摸入一张后（14张）的向听数 < 现在，则为有效进张
+            if 14 - _max_used(rest, drawn) - laizi - 1 < shanten:
+                effective.append(s * 9 + i)
+    # 红中总是有效（癞子可以补任何缺口），已胡的手牌除外
+    if shanten >= 0:
+        effective.append(RED_DRAGON)
+
+    valid_count = 0
+    for tile in effective:
+        left = remaining[tile] if remaining is not None else 4 - counts[tile]
+        if left > 0:
+            valid_count += left
+    return shanten, valid_count, effective
+
+
+def analyze_shanten(hand_14, remaining=None):
+    """
+    对14张手牌的每种打法计算向听数和有效进张
+    return: dict { discard_tile: (shanten, valid_count, effective_tiles) }
+    """
+    counts = [0] * 28
+    for tile in hand_14:
+        counts[tile] += 1
+    results = {}
+    for discard in sorted(set(hand_14)):
+        counts[discard] -= 1
+        results[discard] = get_effective_tiles_from_counts(counts, remaining)
+        counts[discard] += 1
+    return results
+
+
+def pick_best_discards(shanten_analysis):
+    """
+    向听数最小者优先，其次有效张数最多
+    return: (最优打法列表, 最优的 (shanten, valid_count))
+    """
+    best_key = min((v[0], -v[1]) for v in shanten_analysis.values())
+    best = [k for k, v in shanten_analysis.items() if (v[0], -v[1]) == best_key]
+    return best, (best_key[0], -best_key[1])
+
+
+profiling.instrument(globals(), [
+    "suit_blocks", "suit_block_draws", "shanten_from_counts", "get_effective_tiles_from_counts",
+])
+profiling.register_cache(memo_blocks)
+profiling.register_cache(memo_block_draws)
+
+
+def _self_check(num_hands=2000, seed=0):
+    """与 is_hu_with_laizi / analyze_hand 交叉校验，并统计 analyze_shanten 耗时"""
+    from HZ.HongZhong import get_full_deck, is_hu_with_laizi, get_valid_ting_counts
+
+    rng = random.Random(seed)
+    deck = get_full_deck()
+    errors = 0
+    timings = []
+    for _ in range(num_hands):
+        rng.shuffle(deck)
+        hand = deck[:14]
+        if (calc_shanten(hand) == -1) != is_hu_with_laizi(hand):
+            errors += 1
+        count, tings = get_valid_ting_counts(hand[:13])
+        counts = [0] * 28
+        for tile in hand[:13]:
+            counts[tile] += 1
+        shanten, valid_count, effective = get_effective_tiles_from_counts(counts)
+        if (shanten == 0) != bool(tings):
+            errors += 1
+        elif shanten == 0 and (effective, valid_count) != (tings, count):
+            errors += 1
+        start = time.perf_counter()
+        analyze_shanten(hand)
+        timings.append(time.perf_counter() - start)
+    timings.sort()
+    return errors, timings
+
+
+if __name__ == "__main__":
+    errors, timings = _self_check()
+    n = len(timings)
+    print(f"校验 {n} 手牌，不一致: {errors}")
+    print(f"analyze_shanten 耗时: 中位数 {timings[n // 2] * 1000:.2f}ms, "
+          f"p99 {timings[int(n * 0.99)] * 1000:.2f}ms, 最大 {timings[-1] * 1000:.2f}ms")
+    print(memo_blocks.stats_str())
+    sys.exit(1 if errors else 0)
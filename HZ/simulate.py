@@ -0,0 +1,264 @@
+"""
+红中麻将自对弈模拟（蒙特卡洛）：检验训练里“打有效张数最多的牌”在实战中的胡牌率
+
+规则（简化）：
+    - 4 人，get_full_deck 的 112 张牌洗好后每人 13 张，0 号座位为庄家先摸
+    - 轮流摸一张、打一张；摸牌后 is_hu_with_laizi 成立即自摸胡牌，本局结束
+    - 红中麻将只能自摸，这里也不做吃、碰、杠；牌墙摸完为流局
+    - 座位按局轮换（第 g 局第 i 个策略坐 (i + g) % 4 号位），抵消庄家先摸的优势
+
+打牌策略是函数 policy(hand, seen, rng) -> 打出的牌：
+    hand: 摸牌后的 14 张（已排序）；seen: 长度28，场上已打出的各种牌张数；rng: 本局的随机数发生器
+内置策略见 POLICIES，也可以写 "模块:函数" 引用自定义策略。
+
+多进程：局数按块（--chunk 局）分给进程池，每块用 (--seed, 块号) 派生独立的随机数种子，
+同样的参数无论开几个进程结果都相同。
+
+命令行：
+    python HZ/simulate.py [--games 10000] [--workers N] [--seed 20261018]
+                          [--policies max_ukeire,random,random,random]
+"""
+import argparse
+import collections
+import concurrent.futures
+import importlib
+import math
+import os
+import random
+import sys
+import time
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+project_root = os.path.dirname(current_dir)
+if project_root not in sys.path:
+    sys.path.append(project_root)
+
+from HZ.HongZhong import RED_DRAGON, get_full_deck, is_hu_with_laizi, analyze_hand
+from HZ.shanten import analyze_shanten, calc_shanten, pick_best_discards
+from HZ.winprob import best_by_win_probability
+
+SEED = 20261018
+DEFAULT_CHUNK = 100
+DEFAULT_POLICIES = "max_ukeire,max_ukeire_seen,random,random"
+
+
+# ---------- 打牌策略 ----------
+def remaining_from_seen(hand, seen):
+    """自己能看到的每种牌的剩余张数：4 - 手里 - 场上已打出"""
+    remaining = [4 - s for s in seen]
+    for tile in hand:
+        remaining[tile] -= 1
+    return remaining
+
+
+def _best_discard(hand, rng, remaining=None, winprob_draws=0):
+    """
+    听牌时打有效张数最多的，否则向听数最小、有效进张最多的；并列时随机选一张
+    winprob_draws > 0 时，听牌打法并列先按 winprob_draws 次摸牌内的自摸概率再比
+    """
+    # 14 张的向听数 > 0 时打哪张都不听，省掉一次 analyze_hand
+    if calc_shanten(hand) <= 0:
+        analysis = analyze_hand(hand, remaining)
+        if analysis:
+            max_score = max(v[0] for v in analysis.values())
+            best = [k for k, v in analysis.items() if v[0] == max_score]
+            if winprob_draws > 0 and len(best) > 1:
+                best, _ = best_by_win_probability(hand, best, winprob_draws, remaining)
+            return rng.choice(best)
+    best, _ = pick_best_discards(analyze_shanten(hand, remaining))
+    return rng.choice(best)
+
+
+def policy_max_ukeire(hand, seen, rng):
+    """训练器的标准答案：有效张数按 4 - 手里已有 计算"""
+    return _best_discard(hand, rng)
+
+
+def policy_max_ukeire_seen(hand, seen, rng):
+    """同 max_ukeire，但有效张数扣掉场上已打出的牌"""
+    return _best_discard(hand, rng, remaining_from_seen(hand, seen))
+
+
+def policy_max_ukeire_winprob(hand, seen, rng):
+    """同 max_ukeire_seen，有效张数并列时打 2 次摸牌内自摸概率最高的（见 winprob.py）"""
+    return _best_discard(hand, rng, remaining_from_seen(hand, seen), winprob_draws=2)
+
+
+def policy_random(hand, seen, rng):
+    """随机打一张（不打红中），作为基线"""
+    choices = [t for t in hand if t != RED_DRAGON]
+    return rng.choice(choices or hand)
+
+
+POLICIES = {
+    "max_ukeire": policy_max_ukeire,
+    "max_ukeire_seen": policy_max_ukeire_seen,
+    "max_ukeire_winprob": policy_max_ukeire_winprob,
+    "random": policy_random,
+}
+
+
+def resolve_policy(name):
+    """策略名或 "模块:函数" -> 策略函数"""
+    if name in POLICIES:
+        return POLICIES[name]
+    if ":" in name:
+        module_name, func_name = name.split(":", 1)
+        return getattr(importlib.import_module(module_name), func_name)
+    raise ValueError(f"未知策略: {name}（可选 {', '.join(POLICIES)}，或 模块:函数）")
+
+
+# ---------- 对局 ----------
+def play_game(policies, rng):
+    """
+    打一局
+    policies: 4 个座位的策略函数，0 号座位为庄家
+    return: (胡牌的座位，流局为 None, 胡牌者摸牌次数, 全局摸牌次数)
+    """
+    deck = get_full_deck()
+    rng.shuffle(deck)
+    hands = [deck[i * 13:(i + 1) * 13] for i in range(4)]
+    wall = deck[52:]
+    seen = [0] * 28
+    draws = [0] * 4
+    seat = 0
+    while wall:
+        hand = hands[seat]
+        hand.append(wall.pop())
+        draws[seat] += 1
+        if is_hu_with_laizi(hand):
+            return seat, draws[seat], sum(draws)
+        hand.sort()
+        tile = policies[seat](hand, seen, rng)
+        hand.remove(tile)
+        seen[tile] += 1
+        seat = (seat + 1) % 4
+    return None, 0, sum(draws)
+
+
+def new_stats(num_players):
+    return {"games": 0, "draws": 0, "tiles_drawn": 0,
+            "wins": [0] * num_players, "win_turns": [0] * num_players}
+
+
+def merge_stats(total, part):
+    total["games"] += part["games"]
+    total["draws"] += part["draws"]
+    total["tiles_drawn"] += part["tiles_drawn"]
+    for i in range(len(total["wins"])):
+        total["wins"][i] += part["wins"][i]
+        total["win_turns"][i] += part["win_turns"][i]
+    return total
+
+
+def simulate_chunk(policy_names, seed, chunk_index, games):
+    """
+    进程池任务：模拟一块对局
+    第 i 个策略在第 g 局坐 (i + g) % 4 号位，g 为全局局号，保证分块方式不影响座位分布
+    return: 统计 dict（见 new_stats）
+    """
+    rng = random.Random(seed * 1000003 + chunk_index)
+    funcs = [resolve_policy(name) for name in policy_names]
+    stats = new_stats(len(funcs))
+    first_game = chunk_index * games
+    for g in range(first_game, first_game + games):
+        seating = [0] * 4
+        for i in range(4):
+            seating[(i + g) % 4] = i
+        winner, turns, tiles_drawn = play_game([funcs[p] for p in seating], rng)
+        stats["games"] += 1
+        stats["tiles_drawn"] += tiles_drawn
+        if winner is None:
+            stats["draws"] += 1
+        else:
+            stats["wins"][seating[winner]] += 1
+            stats["win_turns"][seating[winner]] += turns
+    return stats
+
+
+def _warm_up():
+    """子进程启动时先导入引擎（加载查表），避免算在第一块上"""
+    import HZ.HongZhong  # noqa: F401
+
+
+def run(policy_names, games, workers, seed=SEED, chunk_size=DEFAULT_CHUNK, progress=None):
+    """
+    模拟 games 局（按 chunk_size 向上取整到整块）
+    progress: 可选，每完成一块调用 progress(已完成局数)
+    return: 合并后的统计
+    """
+    num_chunks = max(1, math.ceil(games / chunk_size))
+    total = new_stats(len(policy_names))
+    if workers <= 1:
+        for k in range(num_chunks):
+            merge_stats(total, simulate_chunk(policy_names, seed, k, chunk_size))
+            if progress:
+                progress(total["games"])
+        return total
+
+    max_in_flight = workers * 4
+    pending = collections.deque()
+    with concurrent.futures.ProcessPoolExecutor(max_workers=workers, initializer=_warm_up) as pool:
+        for k in range(num_chunks):
+            pending.append(pool.submit(simulate_chunk, policy_names, seed, k, chunk_size))
+            while len(pending) >= max_in_flight:
+                merge_stats(total, pending.popleft().result())
+                if progress:
+                    progress(total["games"])
+        while pending:
+            merge_stats(total, pending.popleft().result())
+            if progress:
+                progress(total["games"])
+    return total
+
+
+def report(policy_names, stats, elapsed):
+    games = stats["games"]
+    print(f"⚡ {games / elapsed:,.0f} 局/秒（{games:,} 局，耗时 {elapsed:.1f}秒）")
+    print(f"流局率 {stats['draws'] / games:.1%}，平均每局摸牌 {stats['tiles_drawn'] / games:.1f} 张")
+    print(f"{'策略':<24} | {'胡牌率':>8} | {'95% 区间':>15} | {'平均几巡胡':>8}")
+    for i, name in enumerate(policy_names):
+        wins = stats["wins"][i]
+        rate = wins / games
+        # 正态近似的置信区间
+        half = 1.96 * math.sqrt(rate * (1 - rate) / games)
+        turns = stats["win_turns"][i] / wins if wins else 0.0
+        print(f"{f'P{i + 1} {name}':<26} | {rate:>10.2%} | {max(0.0, rate - half):>7.2%} - {rate + half:>6.2%} | "
+              f"{turns:>12.1f}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="红中麻将自对弈模拟")
+    parser.add_argument("--games", type=int, default=10000, help="模拟局数（按 --chunk 向上取整）")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="进程数（1 表示不开进程池）")
+    parser.add_argument("--seed", type=int, default=SEED)
+    parser.add_argument("--chunk", type=int, default=DEFAULT_CHUNK, help="每个任务的局数")
+    parser.add_argument("--policies", default=DEFAULT_POLICIES,
+                        help=f"4 个逗号分隔的策略（可选 {', '.join(POLICIES)}，或 模块:函数）")
+    args = parser.parse_args(argv)
+
+    policy_names = [name.strip() for name in args.policies.split(",")]
+    if len(policy_names) != 4:
+        parser.error("--policies 需要正好 4 个策略")
+    try:
+        for name in policy_names:
+            resolve_policy(name)
+    except (ValueError, ImportError, AttributeError) as e:
+        parser.error(str(e))
+
+    start = time.perf_counter()
+
+    def progress(done):
+        if sys.stderr.isatty():
+            rate = done / (time.perf_counter() - start)
+            print(f"\r{done:,} 局，{rate:,.0f} 局/秒", end="", file=sys.stderr, flush=True)
+
+    stats = run(policy_names, args.games, args.workers, args.seed, max(1, args.chunk), progress)
+    if sys.stderr.isatty():
+        print(file=sys.stderr)
+    report(policy_names, stats, time.perf_counter() - start)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
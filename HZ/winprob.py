@@ -0,0 +1,184 @@
+"""
+红中麻将打法的胜率评估：打出某张后，接下来 k 次摸牌内自摸的概率
+
+analyze_hand 只比较有效张数，张数相同的打法在之后几巡内的胡牌机会可能差很多（例如听牌后能否换成更好的听）。
+这里做 k 步前瞻，每次摸牌后在所有打法里选之后胜率最高的（包括摸切、改良、进张）：
+    P_k(手牌) = Σ_胡的牌 t  r_t / N
+              + Σ_其他牌 t  r_t / N × max_打出 d P_{k-1}(手牌 + t - d)
+    r_t 为 t 的剩余张数，N 为未见的总张数（对手手牌也当作可能摸到的牌）
+近似：剩余张数在前瞻中不变，只有 N 每摸一张减 1。
+剪枝：
+    - 向听数 s 至少还要摸 s+1 张，s >= k 时概率为 0；向听数变大的打法不考虑
+    - 听牌判断只查三个花色的代价（摸红中必胡，所以听牌 <=> 多一张癞子能胡），听牌时才求听牌列表
+子问题按 (手牌, k) 记忆化，花色代价在一次评估内共享；非听牌手牌的向听数按打包手牌缓存（LRUCache）。
+
+k=2 评估全部打法约几十毫秒；k=3 开销大得多，适合只在有效张数并列的几个打法之间比较。
+
+命令行：
+    python HZ/winprob.py [k] [N]    # 随机 N 手能听牌的手牌，比较有效张数并列的打法并测速
+"""
+import os
+import random
+import sys
+import time
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+project_root = os.path.dirname(current_dir)
+if project_root not in sys.path:
+    sys.path.append(project_root)
+
+from utils.cache import LRUCache
+from utils.hand import ONE, SUIT_BITS, SUIT_MASK, pack, red_count, unpack_counts
+from utils import profiling
+from HZ.HongZhong import suit_draw_costs, get_ting_list_from_packed, hu_need_from_costs
+from HZ.shanten import shanten_from_counts
+
+# 13 张手牌（packed）-> 向听数
+SHANTEN_CACHE_SIZE = int(os.environ.get("HZ_WINPROB_CACHE_SIZE", "200000"))
+memo_shanten = LRUCache(maxsize=SHANTEN_CACHE_SIZE, name="winprob_shanten")
+
+
+class _Lookahead:
+    """一次评估（同一份剩余张数、同一个 k）内共享的记忆化前瞻"""
+
+    def __init__(self, remaining, draws):
+        self.remaining = remaining
+        self.total = sum(remaining)
+        self.draws = draws
+        self.memo = {}
+        self.suit_memo = {}
+
+    def is_tenpai(self, packed):
+        costs = (suit_draw_costs(packed & SUIT_MASK, self.suit_memo)[0],
+                 suit_draw_costs((packed >> SUIT_BITS) & SUIT_MASK, self.suit_memo)[0],
+                 suit_draw_costs((packed >> (2 * SUIT_BITS)) & SUIT_MASK, self.suit_memo)[0])
+        return hu_need_from_costs(costs) <= red_count(packed) + 1
+
+    def shanten(self, packed):
+        if self.is_tenpai(packed):
+            return 0
+        shanten = memo_shanten.get(packed)
+        if shanten is None:
+            shanten = shanten_from_counts(unpack_counts(packed))
+            memo_shanten[packed] = shanten
+        return shanten
+
+    def prob(self, packed, k):
+        """
+        packed: 13 张手牌；k: 还能摸几次
+        return: k 次摸牌内自摸的概率
+        """
+        key = (packed, k)
+        p = self.memo.get(key)
+        if p is not None:
+            return p
+
+        total = self.total - (self.draws - k)
+        tenpai = self.is_tenpai(packed)
+        if total <= 0 or (k == 1 and not tenpai):
+            p = 0.0
+        else:
+            shanten = 0 if tenpai else self.shanten(packed)
+            p = 0.0 if shanten >= k else self._expand(packed, k, tenpai, shanten) / total
+        self.memo[key] = p
+        return p
+
+    def _expand(self, packed, k, tenpai, shanten):
+        """P_k × N"""
+        winning = get_ting_list_from_packed(packed, self.suit_memo) if tenpai else ()
+        p = 0.0
+        for t in winning:
+            p += self.remaining[t]
+        if k == 1:
+            return p
+        for t in range(28):
+            left = self.remaining[t]
+            if left <= 0 or t in winning:
+                continue
+            after = packed + ONE[t]
+            best = 0.0
+            for d in range(28):
+                if not (after >> (3 * d)) & 7:
+                    continue
+                h = after - ONE[d]
+                # 只看到 k-1 = 1 时 prob 自己会判断听牌，不用先求向听数
+                if k > 2 and self.shanten(h) > shanten:
+                    continue
+                v = self.prob(h, k - 1)
+                if v > best:
+                    best = v
+            p += left * best
+        return p
+
+
+def win_probability(hand_13, draws, remaining=None):
+    """
+    13 张手牌在 draws 次摸牌内自摸的概率
+    remaining: 可选，长度28的剩余张数；不给时按 4 - 手里已有 计算
+    """
+    packed = pack(hand_13)
+    if remaining is None:
+        remaining = [4 - c for c in unpack_counts(packed)]
+    return _Lookahead(remaining, draws).prob(packed, draws)
+
+
+def evaluate_discards(hand_14, draws=2, remaining=None, discards=None):
+    """
+    14 张手牌每种打法在之后 draws 次摸牌内自摸的概率
+    remaining: 同 analyze_hand，不给时按 4 - 手里已有 计算
+    discards: 可选，只评估这些打法（默认全部）
+    return: dict { discard_tile: 概率 }，按打出的牌排序
+    """
+    packed = pack(hand_14)
+    if remaining is None:
+        remaining = [4 - c for c in unpack_counts(packed)]
+    lookahead = _Lookahead(remaining, draws)
+    return {d: lookahead.prob(packed - ONE[d], draws) for d in sorted(set(discards or hand_14))}
+
+
+def best_by_win_probability(hand_14, candidates, draws=2, remaining=None):
+    """
+    在 candidates（如有效张数并列最多的打法）中按胜率再比一次
+    return: (胜率最高的打法列表, {打法: 胜率})
+    """
+    probs = evaluate_discards(hand_14, draws, remaining, candidates)
+    top = max(probs[d] for d in candidates)
+    # 浮点误差内视为相同
+    return [d for d in candidates if probs[d] >= top - 1e-12], probs
+
+
+profiling.register_cache(memo_shanten)
+
+
+if __name__ == "__main__":
+    from HZ.HongZhong import get_full_deck, analyze_hand, hand_to_str, tile_to_str
+
+    draws = int(sys.argv[1]) if len(sys.argv) > 1 else 2
+    n = int(sys.argv[2]) if len(sys.argv) > 2 else 100
+    rng = random.Random(0)
+    deck = get_full_deck()
+    timings = []
+    changed = 0
+    while len(timings) < n:
+        rng.shuffle(deck)
+        hand = sorted(deck[:14])
+        analysis = analyze_hand(hand)
+        if not analysis:
+            continue
+        max_score = max(v[0] for v in analysis.values())
+        tied = [d for d, v in analysis.items() if v[0] == max_score]
+        start = time.perf_counter()
+        best, probs = best_by_win_probability(hand, tied, draws)
+        timings.append(time.perf_counter() - start)
+        if len(best) < len(tied):
+            changed += 1
+            if changed <= 3:
+                print(hand_to_str(hand))
+                for d in tied:
+                    print(f"   打出【{tile_to_str(d)}】听 {analysis[d][0]} 张，{draws} 次摸牌内自摸 {probs[d]:.2%}")
+
+    timings.sort()
+    print(f"k={draws}，{n} 手能听牌的手牌（只比较有效张数并列最多的打法）："
+          f"中位数 {timings[len(timings) // 2] * 1000:.1f}ms，p99 {timings[int(len(timings) * 0.99)] * 1000:.1f}ms，"
+          f"最大 {timings[-1] * 1000:.1f}ms")
+    print(f"有效张数并列、胜率能分出高下的手牌: {changed}")
@@ -0,0 +1,92 @@
+"""
+手牌表示的内存/分配基准（tracemalloc）
+
+对固定种子生成的一批手牌逐个调用引擎函数，记录：
+    - 每次调用的平均耗时
+    - 每次调用过程中的峰值临时内存（tracemalloc 峰值 - 调用前的当前值，取平均/最大）
+
+用法：
+    python bench/bench_hand.py [手牌数，默认 2000]
+"""
+import os
+import random
+import sys
+import time
+import tracemalloc
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+project_root = os.path.dirname(current_dir)
+if project_root not in sys.path:
+    sys.path.append(project_root)
+
+from HZ import HongZhong as hz
+from CS import Uniform as cs
+from CS.waits import memo_waits
+
+SEED = 20261018
+
+
+def make_hands(n):
+    rng = random.Random(SEED)
+    hz_deck = hz.get_full_deck()
+    cs_deck = cs.get_full_deck()
+    hz14, hz13, cs14, cs13 = [], [], [], []
+    for _ in range(n):
+        rng.shuffle(hz_deck)
+        hz14.append(sorted(hz_deck[:14]))
+        hz13.append(sorted(hz_deck[:13]))
+        rng.shuffle(cs_deck)
+        cs14.append(sorted(cs_deck[:14]))
+        cs13.append(sorted(cs_deck[:13]))
+    return hz14, hz13, cs14, cs13
+
+
+def measure(func, inputs, setup=None):
+    """
+    setup: 每次调用前执行（不计入耗时和内存），用于清缓存
+    return: (平均耗时 µs, 平均峰值临时内存 B, 最大峰值临时内存 B)
+    """
+    # 先不开 tracemalloc 跑一遍计时（tracemalloc 本身会拖慢分配）
+    elapsed = 0.0
+    perf = time.perf_counter
+    for arg in inputs:
+        if setup is not None:
+            setup()
+        start = perf()
+        func(arg)
+        elapsed += perf() - start
+
+    peaks = []
+    tracemalloc.start()
+    try:
+        for arg in inputs:
+            if setup is not None:
+                setup()
+            before, _ = tracemalloc.get_traced_memory()
+            tracemalloc.reset_peak()
+            func(arg)
+            _, peak = tracemalloc.get_traced_memory()
+            peaks.append(peak - before)
+    finally:
+        tracemalloc.stop()
+    return elapsed / len(inputs) * 1e6, sum(peaks) / len(peaks), max(peaks)
+
+
+def main(n):
+    hz14, hz13, cs14, cs13 = make_hands(n)
+    cases = [
+        ("hz.is_hu_with_laizi", hz.is_hu_with_laizi, hz14, None),
+        ("hz.get_valid_ting_counts", hz.get_valid_ting_counts, hz13, None),
+        ("hz.analyze_hand", hz.analyze_hand, hz14, None),
+        ("cs.is_hu", cs.is_hu, cs14, None),
+        # 听牌结果有缓存，测未命中时的开销
+        ("cs.get_waiting_cards", cs.get_waiting_cards, cs13, memo_waits.clear),
+    ]
+    print(f"{'操作':<28} | {'平均耗时':>10} | {'平均峰值内存':>12} | {'最大峰值内存':>12}")
+    for name, func, inputs, setup in cases:
+        us, avg_peak, max_peak = measure(func, inputs, setup)
+        print(f"{name:<30} | {us:>8.1f}µs | {avg_peak:>12,.0f}B | {max_peak:>12,.0f}B")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 2000)
@@ -0,0 +1,105 @@
+"""
+日志写入基准：历史行数增长时，每答一题的写日志耗时是否保持平稳
+
+在临时目录里预先写入 N 行历史记录，然后模拟一次会话连续答题，
+统计每次 update_log_file 的耗时，以及 get_player_stats / compact_log_file 的耗时。
+
+用法：
+    python bench/bench_logger.py [行数列表，默认 1000,100000,1000000] [每档答题次数，默认 200]
+    MAHJONG_LOG_BACKEND=sqlite python bench/bench_logger.py    # 测 sqlite 后端
+"""
+import contextlib
+import os
+import sys
+import tempfile
+import time
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+project_root = os.path.dirname(current_dir)
+if project_root not in sys.path:
+    sys.path.append(project_root)
+
+from utils import logger, stats_store
+
+
+def make_history(path, rows, store=None):
+    """写入 rows 行历史记录（不同玩家、不同会话）；给出 store 时写入 sqlite"""
+    if store is not None:
+        store.record_sessions(
+            (f"{i:08x}-{i % 997:06x}", f"player{i % 5000}", "Uniform", "2026-01-01 00:00:00", i % 10, 10, 5.0)
+            for i in range(rows))
+        return
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(logger.LOG_HEADER)
+        for i in range(rows):
+            f.write(f"{i:08x}-{i % 997:06x},player{i % 5000},Uniform,2026-01-01 00:00:00,{i % 10}/10,5.00\n")
+
+
+def percentile(sorted_values, q):
+    return sorted_values[min(len(sorted_values) - 1, int(len(sorted_values) * q))]
+
+
+@contextlib.contextmanager
+def temp_log(rows):
+    """
+    在临时目录里准备好 rows 行历史记录，并把 logger 指向它（退出时恢复）
+    yield: 临时 CSV 路径
+    """
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "mahjong_stats.csv")
+        old_log_file = logger.LOG_FILE
+        old_store = stats_store._store
+        logger.LOG_FILE = path
+        store = None
+        if logger.LOG_BACKEND == "sqlite":
+            store = stats_store.StatsStore(os.path.join(tmp, "mahjong_stats.db"))
+            store.set_meta("csv_imported", "0")
+            stats_store._store = store
+        make_history(path, rows, store)
+        try:
+            yield path
+        finally:
+            logger.LOG_FILE = old_log_file
+            if store is not None:
+                store.close()
+                stats_store._store = old_store
+
+
+def bench_size(rows, answers):
+    with temp_log(rows):
+        timings = []
+        total_time = 0.0
+        for n in range(1, answers + 1):
+            total_time += 3.0
+            start = time.perf_counter()
+            logger.update_log_file("bench", n, n // 2, total_time, "2026-10-18 12:00:00", mode="Uniform")
+            timings.append(time.perf_counter() - start)
+
+        start = time.perf_counter()
+        stats = logger.get_player_stats("bench", mode="Uniform")
+        t_stats = time.perf_counter() - start
+
+        start = time.perf_counter()
+        before, after = logger.compact_log_file()
+        t_compact = time.perf_counter() - start
+
+    timings.sort()
+    return {
+        "rows": rows,
+        "p50_ms": percentile(timings, 0.5) * 1000,
+        "p99_ms": percentile(timings, 0.99) * 1000,
+        "stats_ms": t_stats * 1000,
+        "compact_ms": t_compact * 1000,
+        "compacted": (before, after),
+        "player_stats": stats,
+    }
+
+
+if __name__ == "__main__":
+    sizes = [int(x) for x in sys.argv[1].split(",")] if len(sys.argv) > 1 else [1000, 100000, 1000000]
+    answers = int(sys.argv[2]) if len(sys.argv) > 2 else 200
+    print(f"{'历史行数':>10} | {'写入p50':>9} | {'写入p99':>9} | {'读统计':>9} | {'压缩':>9}")
+    for rows in sizes:
+        r = bench_size(rows, answers)
+        print(f"{r['rows']:>12,} | {r['p50_ms']:>7.3f}ms | {r['p99_ms']:>7.3f}ms | "
+              f"{r['stats_ms']:>7.1f}ms | {r['compact_ms']:>7.1f}ms")
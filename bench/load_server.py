@@ -0,0 +1,138 @@
+"""
+tools/server.py 的本地压测
+
+默认先在随机端口启动一个服务子进程，然后开 C 个保持连接的客户端，在 D 秒内按比例混合发请求：
+出题（hz/cs）、红中打法分析、清一色听牌、查询成绩。手牌由固定种子生成。
+结束后按接口打印请求数、每秒请求数、p50/p99 延迟。
+
+用法：
+    python bench/load_server.py [--concurrency 32] [--duration 10] [--workers 8]
+    python bench/load_server.py --url http://127.0.0.1:8765    # 压测已在运行的服务
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import subprocess
+import sys
+import time
+from urllib.parse import urlsplit
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+project_root = os.path.dirname(current_dir)
+if project_root not in sys.path:
+    sys.path.append(project_root)
+
+SEED = 20261018
+
+HZ_DECK = [i for i in range(27) for _ in range(4)] + [27] * 4
+CS_DECK = [i for i in range(1, 10) for _ in range(4)]
+
+# (权重, 方法, 路径, 请求体生成函数)
+MIX = [
+    (3, "GET", "/puzzle?mode=hz", None),
+    (3, "GET", "/puzzle?mode=cs", None),
+    (4, "POST", "/hz/analyze", lambda rng: {"hand": sorted(rng.sample(HZ_DECK, 14))}),
+    (4, "POST", "/cs/waits", lambda rng: {"hand": sorted(rng.sample(CS_DECK, 13))}),
+    (1, "GET", "/stats?name=Anonymous&mode=Uniform", None),
+]
+
+
+def percentile(sorted_values, q):
+    return sorted_values[min(len(sorted_values) - 1, int(len(sorted_values) * q))]
+
+
+async def request(reader, writer, host, method, path, body):
+    data = json.dumps(body).encode("utf-8") if body is not None else b""
+    writer.write((f"{method} {path} HTTP/1.1\r\nHost: {host}\r\n"
+                  f"Content-Type: application/json\r\nContent-Length: {len(data)}\r\n\r\n").encode("latin-1") + data)
+    await writer.drain()
+    head = await reader.readuntil(b"\r\n\r\n")
+    lines = head.decode("latin-1").split("\r\n")
+    status = int(lines[0].split(" ", 2)[1])
+    length = 0
+    for line in lines[1:]:
+        if line.lower().startswith("content-length:"):
+            length = int(line.split(":", 1)[1])
+    payload = await reader.readexactly(length)
+    return status, payload
+
+
+async def client(host, port, deadline, rng, results):
+    reader, writer = await asyncio.open_connection(host, port)
+    weights = [m[0] for m in MIX]
+    try:
+        while time.perf_counter() < deadline:
+            _, method, path, make_body = rng.choices(MIX, weights)[0]
+            body = make_body(rng) if make_body else None
+            start = time.perf_counter()
+            status, _ = await request(reader, writer, host, method, path, body)
+            elapsed = time.perf_counter() - start
+            results.setdefault(f"{method} {path}", []).append((elapsed, status))
+    finally:
+        writer.close()
+
+
+async def run_load(host, port, concurrency, duration):
+    results = {}
+    deadline = time.perf_counter() + duration
+    start = time.perf_counter()
+    await asyncio.gather(*(client(host, port, deadline, random.Random(SEED + i), results)
+                           for i in range(concurrency)))
+    return results, time.perf_counter() - start
+
+
+def start_server(workers):
+    proc = subprocess.Popen([sys.executable, os.path.join(project_root, "tools", "server.py"),
+                             "--port", "0", "--workers", str(workers)],
+                            stdout=subprocess.PIPE, text=True)
+    line = proc.stdout.readline()
+    if not line.startswith("listening on "):
+        proc.kill()
+        raise RuntimeError(f"服务启动失败: {line!r}")
+    return proc, line.split("listening on ", 1)[1].strip()
+
+
+def report(results, elapsed):
+    total = sum(len(v) for v in results.values())
+    errors = sum(1 for v in results.values() for _, status in v if status != 200)
+    print(f"{'接口':<40} | {'请求数':>7} | {'请求/秒':>8} | {'p50(ms)':>8} | {'p99(ms)':>8}")
+    all_latencies = []
+    for name, samples in sorted(results.items()):
+        latencies = sorted(s[0] for s in samples)
+        all_latencies.extend(latencies)
+        print(f"{name:<42} | {len(samples):>10} | {len(samples) / elapsed:>11.1f} | "
+              f"{percentile(latencies, 0.5) * 1000:>8.2f} | {percentile(latencies, 0.99) * 1000:>8.2f}")
+    all_latencies.sort()
+    print(f"{'合计':<40} | {total:>10} | {total / elapsed:>11.1f} | "
+          f"{percentile(all_latencies, 0.5) * 1000:>8.2f} | {percentile(all_latencies, 0.99) * 1000:>8.2f}")
+    print(f"非 200 响应: {errors}")
+    return errors
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="本地 JSON 服务压测")
+    parser.add_argument("--url", help="已运行的服务地址；省略时自动启动一个")
+    parser.add_argument("--concurrency", type=int, default=32, help="并发连接数")
+    parser.add_argument("--duration", type=float, default=10.0, help="压测秒数")
+    parser.add_argument("--workers", type=int, default=8, help="自动启动服务时的引擎线程数")
+    args = parser.parse_args(argv)
+
+    proc = None
+    url = args.url
+    if url is None:
+        proc, url = start_server(args.workers)
+    parts = urlsplit(url)
+    try:
+        print(f"压测 {url}，{args.concurrency} 个连接，{args.duration:.0f} 秒")
+        results, elapsed = asyncio.run(run_load(parts.hostname, parts.port, args.concurrency, args.duration))
+    finally:
+        if proc is not None:
+            proc.terminate()
+            proc.wait()
+    return 1 if report(results, elapsed) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,281 @@
+"""
+热点路径基准套件：两个训练程序的判胡/听牌计算，以及写日志、读统计
+
+所有输入由固定种子生成，多次运行测的是同一批手牌。每项操作逐次计时，打印 p50/p90/p99（微秒）。
+引擎各项先预热一轮（不计），再独立计时 --rounds 轮，取各轮 p50 的最小值（p50_min）作为对比用的指标：
+单轮的 p50 会被调度、频率波动等偶发干扰抬高，多轮取最小值才稳定。日志各项只测一轮。
+可以把结果存成基准 JSON，之后与之对比：任何一项 p50_min 比基准慢超过阈值即返回非 0
+（旧基准文件没有 p50_min 时按 p50 比）。
+每轮还会跑一段固定的纯 Python 校准负载，对比时按 当前校准耗时 / 基准校准耗时 折算，
+抵消机器整体变快变慢（共享 CI 机器、降频）的影响，只留下代码本身的退化。
+
+覆盖：
+    hz.get_laizi_cost.cold / .warm     单花色递归（清空缓存 / 缓存命中）
+    hz.is_hu_with_laizi                 14 张判胡（查表）
+    hz.get_valid_ting_counts            13 张听牌 + 有效张数
+    hz.analyze_hand.typical / .worst    14 张全部打法（随机手牌 / 4 红中、清一色长顺等最坏牌型）
+    cs.is_hu / cs.get_waiting_cards     清一色判胡 / 听牌
+    log.update_log_file.<N> / log.get_player_stats.<N>   历史 N 行时写一题 / 读玩家统计
+
+用法：
+    python bench/run_bench.py                          # 运行并打印
+    python bench/run_bench.py --save bench/baseline.json
+    python bench/run_bench.py --compare bench/baseline.json [--threshold 0.3] [--rounds 7]
+    python bench/run_bench.py --quick                  # 少量样本，日志只测 1k/100k 行
+    python bench/run_bench.py --only hz.               # 只跑名字以 hz. 开头的项
+"""
+import argparse
+import json
+import os
+import platform
+import random
+import sys
+import time
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+project_root = os.path.dirname(current_dir)
+if project_root not in sys.path:
+    sys.path.append(project_root)
+
+from HZ import HongZhong as hz
+from CS import Uniform as cs
+from CS.tenpai_gen import sample_tenpai
+from CS.waits import memo_waits
+from utils import logger
+from bench.bench_logger import temp_log
+
+SEED = 20261018
+DEFAULT_THRESHOLD = 0.3
+
+# 最坏牌型（HZ 牌ID：0-8 万，9-17 条，18-26 筒，27 红中）
+HZ_WORST_HANDS = [
+    [27, 27, 27, 27, 0, 1, 2, 3, 4, 5, 6, 7, 8, 8],            # 4 红中 + 一条龙
+    [0, 0, 0, 1, 2, 3, 4, 5, 6, 7, 8, 8, 8, 4],               # 九莲宝灯 + 1 张
+    [27, 27, 27, 27, 0, 2, 4, 9, 11, 13, 18, 20, 22, 26],     # 4 红中 + 三门散牌
+    [0, 1, 1, 2, 2, 3, 3, 4, 4, 5, 5, 6, 6, 27],              # 清一色长顺 + 红中
+    [27, 27, 27, 1, 1, 2, 2, 3, 3, 4, 5, 6, 7, 7],            # 3 红中 + 一色多面
+]
+CS_WORST_HANDS = [
+    [1, 1, 1, 2, 3, 4, 5, 6, 7, 8, 9, 9, 9],
+    [2, 2, 3, 3, 4, 4, 5, 5, 6, 6, 7, 7, 8],
+    [1, 1, 1, 2, 2, 2, 3, 3, 3, 4, 5, 6, 7],
+]
+
+
+def percentile(sorted_values, q):
+    return sorted_values[min(len(sorted_values) - 1, int(len(sorted_values) * q))]
+
+
+def time_calls(func, inputs, repeat=1, setup=None):
+    """
+    逐次计时：inputs 中每个参数调用 func 一次，共 repeat 轮
+    setup: 每次调用前执行（不计入耗时），用于清缓存等
+    return: 每次调用耗时（秒）的列表
+    """
+    timings = []
+    perf = time.perf_counter
+    for _ in range(repeat):
+        for arg in inputs:
+            if setup is not None:
+                setup()
+            start = perf()
+            func(arg)
+            timings.append(perf() - start)
+    return timings
+
+
+def summarize(rounds):
+    """rounds: 每轮的耗时列表；p50/p90/p99 按全部样本算，p50_min 为各轮 p50 的最小值"""
+    timings = sorted(t for r in rounds for t in r)
+    return {
+        "n": len(timings),
+        "rounds": len(rounds),
+        "p50_us": percentile(timings, 0.5) * 1e6,
+        "p50_min_us": min(percentile(sorted(r), 0.5) for r in rounds) * 1e6,
+        "p90_us": percentile(timings, 0.9) * 1e6,
+        "p99_us": percentile(timings, 0.99) * 1e6,
+        "mean_us": sum(timings) / len(timings) * 1e6,
+    }
+
+
+def make_inputs(rng, n):
+    deck = hz.get_full_deck()
+    hz14 = []
+    hz13 = []
+    for _ in range(n):
+        rng.shuffle(deck)
+        hz14.append(sorted(deck[:14]))
+        hz13.append(sorted(deck[:13]))
+    suits = []
+    for hand in hz14:
+        wan, tiao, tong, _ = hz.suit_counts(hand)
+        suits.extend(c for c in (wan, tiao, tong) if max(c) <= 4)
+    cs_deck = cs.get_full_deck()
+    cs14 = []
+    cs13 = []
+    for _ in range(n):
+        rng.shuffle(cs_deck)
+        cs14.append(sorted(cs_deck[:14]))
+        cs13.append(sorted(cs_deck[:13]))
+    # 一部分输入取真正胡牌 / 听牌的手牌，避免只测到提前返回的路径
+    for _ in range(n // 4):
+        hand, waits = sample_tenpai(rng)
+        cs13.append(hand)
+        cs14.append(sorted(hand + [waits[0]]))
+    return hz14, hz13, suits, cs14, cs13
+
+
+def bench_engines(n, repeat):
+    rng = random.Random(SEED)
+    hz14, hz13, suits, cs14, cs13 = make_inputs(rng, n)
+    results = {}
+
+    results["hz.get_laizi_cost.cold"] = time_calls(hz.get_laizi_cost, suits, setup=hz.memo_laizi.clear)
+    hz.memo_laizi.clear()
+    for s in suits:
+        hz.get_laizi_cost(s)
+    results["hz.get_laizi_cost.warm"] = time_calls(hz.get_laizi_cost, suits, repeat)
+    results["hz.is_hu_with_laizi"] = time_calls(hz.is_hu_with_laizi, hz14, repeat)
+    results["hz.get_valid_ting_counts"] = time_calls(hz.get_valid_ting_counts, hz13, repeat)
+    results["hz.analyze_hand.typical"] = time_calls(hz.analyze_hand, hz14, repeat)
+    # 最坏牌型只有几手，多重复几遍，样本数与随机手牌相当
+    worst_repeat = repeat * max(1, n // 5)
+    results["hz.analyze_hand.worst"] = time_calls(hz.analyze_hand, HZ_WORST_HANDS, worst_repeat)
+    results["cs.is_hu"] = time_calls(cs.is_hu, cs14, repeat)
+    # 听牌结果按手牌缓存（CS/waits.py），这里测的是未命中时的计算耗时
+    results["cs.get_waiting_cards"] = time_calls(cs.get_waiting_cards, cs13, repeat, setup=memo_waits.clear)
+    results["cs.get_waiting_cards.worst"] = time_calls(cs.get_waiting_cards, CS_WORST_HANDS,
+                                                       worst_repeat, setup=memo_waits.clear)
+    return results
+
+
+def _calibration_work():
+    """校准负载：整数运算 + dict 读写 + 排序，和引擎代码的开销构成相近"""
+    counts = {}
+    x = SEED
+    for _ in range(20000):
+        x = (x * 1103515245 + 12345) & 0x7fffffff
+        key = x & 1023
+        counts[key] = counts.get(key, 0) + 1
+    return sorted(counts.values())
+
+
+def calibrate(samples=10):
+    """return: 校准负载的最短耗时（秒）"""
+    return min(time_calls(lambda _: _calibration_work(), range(samples)))
+
+
+def bench_engines_rounds(n, repeat, rounds, calibrations):
+    """
+    先预热一轮（结果丢弃），再独立跑 rounds 轮，每轮前后各测一次校准负载（追加到 calibrations）
+    return: {name: [每轮的耗时列表]}
+    """
+    bench_engines(n, repeat)
+    results = {}
+    for _ in range(rounds):
+        calibrations.append(calibrate())
+        for name, timings in bench_engines(n, repeat).items():
+            results.setdefault(name, []).append(timings)
+        calibrations.append(calibrate())
+    return results
+
+
+def bench_log(sizes, answers, stats_calls):
+    results = {}
+    for rows in sizes:
+        with temp_log(rows):
+            total = [0.0]
+
+            def write(n):
+                total[0] += 3.0
+                logger.update_log_file("bench", n, n // 2, total[0], "2026-10-18 12:00:00", mode="Uniform")
+
+            results[f"log.update_log_file.{rows}"] = time_calls(write, range(1, answers + 1))
+            results[f"log.get_player_stats.{rows}"] = time_calls(
+                lambda _: logger.get_player_stats("bench", mode="Uniform"), range(stats_calls))
+    return results
+
+
+def compare(current, baseline, threshold, scale=1.0):
+    """
+    scale: 机器速度折算系数（当前校准耗时 / 基准校准耗时），比值 = 当前值 / (基准值 × scale)
+    return: [(name, 基准值, 当前值, 比值, 是否退化)]，只比较两边都有的项
+        两边都有 p50_min 时按 p50_min 比，否则按 p50 比
+    """
+    rows = []
+    for name, cur in current.items():
+        base = baseline.get(name)
+        if base is None:
+            continue
+        key = "p50_min_us" if "p50_min_us" in cur and "p50_min_us" in base else "p50_us"
+        ratio = cur[key] / (base[key] * scale) if base[key] > 0 else 1.0
+        rows.append((name, base[key], cur[key], ratio, ratio > 1 + threshold))
+    return rows
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="麻将训练热点路径基准")
+    parser.add_argument("--save", metavar="JSON", help="把结果保存为基准")
+    parser.add_argument("--compare", metavar="JSON", help="与基准对比，退化超过阈值时返回 1")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD,
+                        help=f"允许的 p50 退化比例（默认 {DEFAULT_THRESHOLD}）")
+    parser.add_argument("--quick", action="store_true", help="少量样本，日志只测 1k/100k 行")
+    parser.add_argument("--only", default="", help="只跑名字以此开头的项")
+    parser.add_argument("--rounds", type=int, default=None, help="引擎各项的独立计时轮数（默认 7，--quick 时 5）")
+    args = parser.parse_args(argv)
+
+    n, repeat = (200, 1) if args.quick else (1000, 1)
+    rounds = max(1, args.rounds or (5 if args.quick else 7))
+    sizes = [1000, 100000] if args.quick else [1000, 100000, 1000000]
+
+    def wanted(prefix):
+        return prefix.startswith(args.only) or args.only.startswith(prefix)
+
+    raw = {}
+    calibrations = []
+    if wanted("hz.") or wanted("cs."):
+        raw.update(bench_engines_rounds(n, repeat, rounds, calibrations))
+    if wanted("log."):
+        calibrations.append(calibrate())
+        log_results = bench_log(sizes, answers=100 if args.quick else 300, stats_calls=3 if args.quick else 5)
+        raw.update({name: [timings] for name, timings in log_results.items()})
+    results = {name: summarize(t) for name, t in raw.items() if name.startswith(args.only)}
+    # 和 p50_min 一样取各轮最小值：两边都是“机器最快时”的耗时，才能互相折算
+    calibration_us = min(calibrations) * 1e6 if calibrations else 0.0
+
+    print(f"{'操作':<34} | {'次数':>6} | {'p50(µs)':>10} | {'p50_min(µs)':>11} | {'p90(µs)':>10} | {'p99(µs)':>10}")
+    for name, r in results.items():
+        print(f"{name:<36} | {r['n']:>8} | {r['p50_us']:>10.1f} | {r['p50_min_us']:>12.1f} | "
+              f"{r['p90_us']:>10.1f} | {r['p99_us']:>10.1f}")
+
+    if args.save:
+        with open(args.save, "w", encoding="utf-8") as f:
+            json.dump({
+                "meta": {"seed": SEED, "python": platform.python_version(), "machine": platform.machine(),
+                         "date": time.strftime("%Y-%m-%d %H:%M:%S"), "quick": args.quick, "rounds": rounds,
+                         "calibration_us": calibration_us},
+                "results": results,
+            }, f, ensure_ascii=False, indent=2)
+        print(f"基准已保存: {args.save}")
+
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            saved = json.load(f)
+        baseline = saved["results"]
+        base_calibration = saved.get("meta", {}).get("calibration_us")
+        scale = calibration_us / base_calibration if base_calibration else 1.0
+        rows = compare(results, baseline, args.threshold, scale)
+        print(f"\n与基准对比（阈值 +{args.threshold:.0%}，机器速度折算 ×{scale:.2f}）:")
+        for name, base, cur, ratio, regressed in rows:
+            mark = "❌" if regressed else "  "
+            print(f"{mark} {name:<36} {base:>10.1f} -> {cur:>10.1f} µs  ({ratio - 1:+.1%})")
+        regressions = [r for r in rows if r[4]]
+        if regressions:
+            print(f"❌ {len(regressions)} 项退化超过阈值")
+            return 1
+        print("✅ 没有超过阈值的退化")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
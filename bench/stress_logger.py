@@ -0,0 +1,106 @@
+"""
+多进程并发写日志压力测试
+
+启动 P 个写进程，每个进程模拟 S 个会话、每个会话连续答 A 题（每答一题 update_log_file 一次），
+同时另起一个进程不停地 compact_log_file。全部结束后读取日志，检查每个会话的最终成绩都在、
+没有被其他进程的追加或压缩覆盖掉，并报告总写入速度。
+
+用法：
+    python bench/stress_logger.py [进程数，默认 32] [每进程会话数，默认 5] [每会话答题数，默认 40]
+    MAHJONG_LOG_LOCK=0 python bench/stress_logger.py    # 关闭文件锁对比（压缩时会丢记录）
+"""
+import multiprocessing
+import os
+import sys
+import tempfile
+import time
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+project_root = os.path.dirname(current_dir)
+if project_root not in sys.path:
+    sys.path.append(project_root)
+
+from utils import logger
+
+
+def session_start(worker, session):
+    # 每个会话的开始时间不同，保证 UID 不同
+    return f"2026-10-18 {worker % 24:02d}:{session % 60:02d}:{worker // 24:02d}.{session}"
+
+
+def writer(path, worker, sessions, answers, start_event):
+    start_event.wait()
+    for n in range(1, answers + 1):
+        for s in range(sessions):
+            logger.update_log_file(f"p{worker}", n, n // 2, n * 1.5, session_start(worker, s),
+                                   mode="Uniform", log_file=path)
+
+
+def compactor(path, stop_event, counter):
+    while not stop_event.is_set():
+        logger.compact_log_file(path)
+        with counter.get_lock():
+            counter.value += 1
+        time.sleep(0.01)
+
+
+def run(processes, sessions, answers):
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "mahjong_stats.csv")
+        start_event = multiprocessing.Event()
+        stop_event = multiprocessing.Event()
+        compactions = multiprocessing.Value("i", 0)
+
+        workers = [multiprocessing.Process(target=writer, args=(path, w, sessions, answers, start_event))
+                   for w in range(processes)]
+        for p in workers:
+            p.start()
+        comp = multiprocessing.Process(target=compactor, args=(path, stop_event, compactions))
+        comp.start()
+
+        start = time.perf_counter()
+        start_event.set()
+        for p in workers:
+            p.join()
+        elapsed = time.perf_counter() - start
+        stop_event.set()
+        comp.join()
+
+        # 检查：每个会话都应以最后一题的成绩出现，且每行格式完整
+        expected = {}
+        for w in range(processes):
+            for s in range(sessions):
+                uid = logger.generate_uid(f"p{w}", session_start(w, s))
+                expected[uid] = f"{answers // 2}/{answers}"
+        records = logger.read_latest_records(path)
+        found = {r[0]: r[4] for r in records}
+        lost = [uid for uid in expected if uid not in found]
+        stale = [uid for uid, acc in expected.items() if uid in found and found[uid] != acc]
+        with open(path, encoding="utf-8") as f:
+            malformed = sum(1 for line in f if logger.parse_log_line(line) is None) - 1   # 减去表头
+
+    writes = processes * sessions * answers
+    return {
+        "writes": writes,
+        "elapsed": elapsed,
+        "rate": writes / elapsed,
+        "compactions": compactions.value,
+        "sessions": len(expected),
+        "lost": len(lost),
+        "stale": len(stale),
+        "malformed": malformed,
+    }
+
+
+if __name__ == "__main__":
+    processes = int(sys.argv[1]) if len(sys.argv) > 1 else 32
+    sessions = int(sys.argv[2]) if len(sys.argv) > 2 else 5
+    answers = int(sys.argv[3]) if len(sys.argv) > 3 else 40
+    print(f"文件锁: {'开启' if logger.LOG_LOCKING else '关闭'}，{processes} 个进程 × {sessions} 个会话 × {answers} 题")
+    r = run(processes, sessions, answers)
+    print(f"写入 {r['writes']:,} 次，耗时 {r['elapsed']:.2f}秒，{r['rate']:,.0f} 次/秒，期间压缩 {r['compactions']} 次")
+    print(f"会话 {r['sessions']} 个：丢失 {r['lost']}，成绩不是最新 {r['stale']}，残缺行 {r['malformed']}")
+    if r["lost"] or r["stale"] or r["malformed"]:
+        print("❌ 有记录丢失或损坏")
+        sys.exit(1)
+    print("✅ 没有丢失记录")
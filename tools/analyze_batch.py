@@ -0,0 +1,231 @@
+"""
+无交互的批量分析：从文件或标准输入逐行读手牌，多进程计算，按输入顺序输出 JSONL
+
+每行一手牌，牌之间用空格或逗号分隔，可以用 NAME_TO_TILE 里的写法，也可以直接写牌ID：
+    hz 模式:  1万 2万 3万 4t 5t 6t 7b 7b 8b 9b 红中 hz 2w 3w
+              0 1 2 12 13 14 24 24 25 26 27 27 1 2
+    cs 模式:  1 1 1 2 3 4 5 6 7 8 9 9 9    或连写 1112345678999
+空行和 # 开头的行跳过（但仍占一个行号）。
+
+输出（每行一个 JSON，line 为输入行号，从 1 开始）：
+    hz 14 张: {"line", "hand", "best", "analysis": {打出的牌: {"count", "ting"}}}；
+              打哪张都不听时 analysis 为空，另给 "shanten": {打出的牌: {"shanten", "count", "tiles"}}
+    hz 13 张: {"line", "hand", "count", "ting"}
+    cs 13 张: {"line", "hand", "waits"}
+    cs 14 张: {"line", "hand", "hu"}
+    解析失败: {"line", "error"}
+
+按块（--chunk 行）分给进程池，同时在途的块数有上限（--workers 的 4 倍），
+读入、计算、输出流水进行，内存占用与输入总量无关。
+
+用法：
+    python tools/analyze_batch.py --mode hz hands.txt > result.jsonl
+    cat hands.txt | python tools/analyze_batch.py --mode cs --workers 8
+"""
+import argparse
+import collections
+import concurrent.futures
+import itertools
+import json
+import os
+import sys
+import time
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+project_root = os.path.dirname(current_dir)
+if project_root not in sys.path:
+    sys.path.append(project_root)
+
+DEFAULT_CHUNK = 256
+
+
+def parse_hand(line, mode):
+    """
+    一行文本 -> 牌ID列表（已排序）
+    无法识别时抛出 ValueError
+    """
+    return parse_tiles(line.replace(",", " ").replace("，", " ").split(), mode)
+
+
+def parse_tiles(tokens, mode):
+    """
+    牌名/牌ID 列表 -> 牌ID列表（已排序），元素可以是 int 或 str
+    cs 模式下每个元素是一张牌（1..9）；只有整手牌是一个连写的字符串（如 "1112345678999"）时才逐位拆开
+    无法识别时抛出 ValueError
+    """
+    from HZ.HongZhong import NAME_TO_TILE
+
+    if mode != "hz" and len(tokens) == 1 and isinstance(tokens[0], str) and len(tokens[0]) > 1:
+        tokens = list(tokens[0])
+    hand = []
+    for token in tokens:
+        if isinstance(token, int) and not isinstance(token, bool):
+            token = str(token)
+        if not isinstance(token, str):
+            raise ValueError(f"无法识别的牌: {token!r}")
+        if mode == "hz":
+            if token in NAME_TO_TILE:
+                hand.append(NAME_TO_TILE[token])
+            elif token.isdigit() and 0 <= int(token) <= 27:
+                hand.append(int(token))
+            else:
+                raise ValueError(f"无法识别的牌: {token}")
+        else:
+            if len(token) != 1 or not "1" <= token <= "9":
+                raise ValueError(f"无法识别的牌: {token}")
+            hand.append(int(token))
+    kinds = 28 if mode == "hz" else 10
+    counts = [0] * kinds
+    for tile in hand:
+        counts[tile] += 1
+        if counts[tile] > 4:
+            raise ValueError(f"同一种牌超过 4 张: {tile}")
+    return sorted(hand)
+
+
+def analyze_line(line, mode):
+    """return: 结果 dict（不含行号）"""
+    return analyze(parse_hand(line, mode), mode)
+
+
+def analyze(hand, mode):
+    """
+    分析一手牌（牌ID列表）
+    return: 结果 dict，格式见模块说明；张数不对时抛出 ValueError
+    """
+    if mode == "hz":
+        from HZ.HongZhong import get_valid_ting_counts, cached_analyze_hand, cached_analyze_shanten
+        if len(hand) == 13:
+            count, ting = get_valid_ting_counts(hand)
+            return {"hand": hand, "count": count, "ting": ting}
+        if len(hand) != 14:
+            raise ValueError(f"红中麻将需要 13 或 14 张，实际 {len(hand)} 张")
+        # 批量数据里同一手牌（含换花色）反复出现，用规范化缓存
+        analysis = cached_analyze_hand(hand)
+        return format_hz_analysis(hand, analysis, None if analysis else cached_analyze_shanten(hand))
+
+    from CS.Uniform import get_waiting_cards, is_hu
+    if len(hand) == 13:
+        return {"hand": hand, "waits": get_waiting_cards(hand)}
+    if len(hand) == 14:
+        return {"hand": hand, "hu": is_hu(hand)[0]}
+    raise ValueError(f"清一色需要 13 或 14 张，实际 {len(hand)} 张")
+
+
+def format_hz_analysis(hand, analysis, shanten_analysis):
+    """
+    analyze_hand / analyze_shanten 的结果 -> 可序列化的 dict（与 HZ generate_puzzle 的返回值对应）
+    """
+    from HZ.HongZhong import pick_best_discards
+
+    result = {"hand": hand}
+    if analysis:
+        max_score = max(v[0] for v in analysis.values())
+        result["best"] = [k for k, v in analysis.items() if v[0] == max_score]
+        result["analysis"] = {str(k): {"count": c, "ting": t} for k, (c, t) in analysis.items()}
+    else:
+        result["best"], _ = pick_best_discards(shanten_analysis)
+        result["analysis"] = {}
+        result["shanten"] = {str(k): {"shanten": s, "count": c, "tiles": e}
+                             for k, (s, c, e) in shanten_analysis.items()}
+    return result
+
+
+def analyze_chunk(mode, numbered_lines):
+    """
+    进程池任务：分析一块输入行，直接返回 JSON 文本（序列化也放在子进程里做）
+    numbered_lines: [(行号, 文本)]
+    """
+    out = []
+    for line_no, line in numbered_lines:
+        try:
+            result = analyze_line(line, mode)
+        except ValueError as e:
+            result = {"error": str(e)}
+        out.append(json.dumps({"line": line_no, **result}, ensure_ascii=False))
+    return out
+
+
+def _warm_up(mode):
+    """子进程启动时先导入引擎（加载查表/题库），避免算在第一块上"""
+    if mode == "hz":
+        import HZ.HongZhong  # noqa: F401
+    else:
+        import CS.Uniform  # noqa: F401
+
+
+def read_chunks(lines, chunk_size):
+    """逐块读取，跳过空行和注释行；yield: [(行号, 文本)]"""
+    numbered = ((i, line.strip()) for i, line in enumerate(lines, 1))
+    numbered = ((i, line) for i, line in numbered if line and not line.startswith("#"))
+    while True:
+        chunk = list(itertools.islice(numbered, chunk_size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def run(lines, out, mode, workers, chunk_size=DEFAULT_CHUNK):
+    """
+    分析全部输入并按顺序写出
+    return: 处理的手牌数
+    """
+    count = 0
+    chunks = read_chunks(lines, chunk_size)
+    if workers <= 1:
+        for chunk in chunks:
+            for text in analyze_chunk(mode, chunk):
+                out.write(text + "\n")
+            count += len(chunk)
+        return count
+
+    max_in_flight = workers * 4
+    pending = collections.deque()
+    with concurrent.futures.ProcessPoolExecutor(max_workers=workers, initializer=_warm_up,
+                                                initargs=(mode,)) as pool:
+        for chunk in chunks:
+            pending.append((len(chunk), pool.submit(analyze_chunk, mode, chunk)))
+            # 在途的块数达到上限时，先按顺序写出最早的一块，读入随之暂停
+            while len(pending) >= max_in_flight:
+                count += _write_oldest(pending, out)
+        while pending:
+            count += _write_oldest(pending, out)
+    return count
+
+
+def _write_oldest(pending, out):
+    size, future = pending.popleft()
+    for text in future.result():
+        out.write(text + "\n")
+    return size
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="批量分析手牌，输出 JSONL")
+    parser.add_argument("input", nargs="?", help="输入文件，省略时读标准输入")
+    parser.add_argument("--mode", choices=["hz", "cs"], default="hz", help="hz: 红中麻将；cs: 清一色")
+    parser.add_argument("-o", "--output", help="输出文件，省略时写标准输出")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="进程数（1 表示不开进程池）")
+    parser.add_argument("--chunk", type=int, default=DEFAULT_CHUNK, help="每个任务的行数")
+    parser.add_argument("--quiet", action="store_true", help="不在标准错误输出统计")
+    args = parser.parse_args(argv)
+
+    fin = open(args.input, encoding="utf-8") if args.input else sys.stdin
+    fout = open(args.output, "w", encoding="utf-8") if args.output else sys.stdout
+    start = time.perf_counter()
+    try:
+        count = run(fin, fout, args.mode, args.workers, max(1, args.chunk))
+    finally:
+        if args.input:
+            fin.close()
+        if args.output:
+            fout.close()
+    elapsed = time.perf_counter() - start
+    if not args.quiet:
+        print(f"完成 {count} 手牌，{args.workers} 个进程，耗时 {elapsed:.2f}秒，"
+              f"{count / elapsed if elapsed > 0 else 0:,.0f} 手/秒", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
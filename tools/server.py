@@ -0,0 +1,270 @@
+"""
+本地 JSON 服务（asyncio + 标准库，完全离线），给内网网页前端用
+
+接口（请求/响应体均为 JSON，手牌可以是牌ID列表、牌名列表，或空格分隔的字符串）：
+    GET  /health                      {"ok": true}
+    GET  /puzzle?mode=hz|cs           出一道题（带答案），来自后台预生成的题目池
+    POST /hz/analyze   {"hand": ...}  红中麻将 14 张各打法的听牌 / 13 张的听牌，格式同 tools/analyze_batch
+    POST /cs/waits     {"hand": ...}  清一色 13 张听哪些牌 / 14 张是否胡
+    GET  /stats?name=..&mode=..       玩家历史成绩（get_player_stats）
+    GET  /server/stats                请求计数、缓存命中率、题目池状态
+
+引擎计算放在线程池里执行，事件循环只负责收发，不会被阻塞；
+线程共享同一进程内的查表和缓存（启动时把 LRUCache 换成加锁版本）。
+
+用法：
+    python tools/server.py [--host 127.0.0.1] [--port 8765] [--workers 8]
+    --port 0 时由系统分配端口，启动后第一行输出实际监听地址
+"""
+import argparse
+import asyncio
+import concurrent.futures
+import json
+import os
+import sys
+import time
+from urllib.parse import urlsplit, parse_qs
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+project_root = os.path.dirname(current_dir)
+if project_root not in sys.path:
+    sys.path.append(project_root)
+
+from HZ import HongZhong as hz
+from HZ import shanten
+from CS import Uniform as cs
+from CS.waits import memo_waits
+from utils.cache import make_threadsafe
+from utils.logger import get_player_stats
+from utils.prefetch import PuzzlePool
+from tools.analyze_batch import analyze, parse_tiles, format_hz_analysis
+
+MAX_HEADER_BYTES = 64 * 1024
+MAX_BODY_BYTES = 1024 * 1024
+
+REASONS = {200: "OK", 400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed",
+           413: "Payload Too Large", 500: "Internal Server Error"}
+
+
+class HTTPError(Exception):
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+
+class AnalysisServer:
+    """
+    Args:
+        workers: 引擎线程数
+    """
+
+    def __init__(self, workers=8):
+        self.executor = concurrent.futures.ThreadPoolExecutor(max_workers=workers, thread_name_prefix="engine")
+        # 多个线程同时读写同一个缓存
+        self.caches = [make_threadsafe(hz.memo_laizi),
+                       make_threadsafe(shanten.memo_blocks),
+                       make_threadsafe(shanten.memo_block_draws),
+                       make_threadsafe(hz.cached_analyze_hand.cache),
+                       make_threadsafe(hz.cached_analyze_shanten.cache),
+                       make_threadsafe(memo_waits)]
+        self.pools = {
+            "hz": PuzzlePool(hz.generate_puzzle, name="HongZhong"),
+            "cs": PuzzlePool(cs.generate_puzzle, name="Uniform"),
+        }
+        self.requests = {}
+        self.errors = 0
+        self.started = time.time()
+        self.routes = {
+            ("GET", "/health"): self.health,
+            ("GET", "/puzzle"): self.puzzle,
+            ("POST", "/hz/analyze"): self.hz_analyze,
+            ("POST", "/cs/waits"): self.cs_waits,
+            ("GET", "/stats"): self.player_stats,
+            ("GET", "/server/stats"): self.server_stats,
+        }
+
+    def close(self):
+        for pool in self.pools.values():
+            pool.stop()
+        self.executor.shutdown(wait=False, cancel_futures=True)
+
+    async def run_engine(self, func, *args):
+        return await asyncio.get_running_loop().run_in_executor(self.executor, func, *args)
+
+    # ---------- 接口 ----------
+    async def health(self, query, body):
+        return {"ok": True}
+
+    async def puzzle(self, query, body):
+        mode = query.get("mode", "hz")
+        if mode not in self.pools:
+            raise HTTPError(400, f"未知模式: {mode}")
+        puzzle, compute_time = await self.run_engine(self.pools[mode].get_timed)
+        if mode == "hz":
+            hand, analysis, shanten_analysis = puzzle
+            result = format_hz_analysis(hand, analysis, shanten_analysis)
+        else:
+            hand, waits = puzzle
+            result = {"hand": hand, "waits": waits}
+        result["mode"] = mode
+        result["compute_ms"] = compute_time * 1000
+        return result
+
+    async def hz_analyze(self, query, body):
+        return await self.run_engine(analyze, self._hand(body, "hz"), "hz")
+
+    async def cs_waits(self, query, body):
+        return await self.run_engine(analyze, self._hand(body, "cs"), "cs")
+
+    async def player_stats(self, query, body):
+        name = query.get("name")
+        if not name:
+            raise HTTPError(400, "缺少参数 name")
+        total, correct, avg_time = await self.run_engine(get_player_stats, name, query.get("mode"))
+        return {"name": name, "total": total, "correct": correct, "avg_time": avg_time}
+
+    async def server_stats(self, query, body):
+        return {
+            "uptime": time.time() - self.started,
+            "requests": dict(self.requests),
+            "errors": self.errors,
+            "caches": [c.stats() for c in self.caches],
+            "pools": [p.stats() for p in self.pools.values()],
+        }
+
+    @staticmethod
+    def _hand(body, mode):
+        if not isinstance(body, dict) or "hand" not in body:
+            raise HTTPError(400, "请求体需要 {\"hand\": ...}")
+        hand = body["hand"]
+        if isinstance(hand, str):
+            hand = hand.replace(",", " ").split()
+        if not isinstance(hand, list):
+            raise HTTPError(400, "hand 需要是列表或字符串")
+        return parse_tiles(hand, mode)
+
+    # ---------- HTTP ----------
+    async def handle_connection(self, reader, writer):
+        try:
+            while True:
+                try:
+                    request = await self._read_request(reader)
+                except HTTPError as e:
+                    await self._respond(writer, e.status, {"error": str(e)}, keep_alive=False)
+                    break
+                if request is None:
+                    break
+                method, target, headers, raw_body = request
+                status, payload = await self.dispatch(method, target, raw_body)
+                keep_alive = headers.get("connection", "").lower() != "close"
+                await self._respond(writer, status, payload, keep_alive)
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    async def _read_request(self, reader):
+        """return: (method, target, headers, body)；连接关闭时返回 None"""
+        try:
+            head = await reader.readuntil(b"\r\n\r\n")
+        except asyncio.IncompleteReadError as e:
+            if not e.partial.strip():
+                return None
+            raise
+        except asyncio.LimitOverrunError:
+            raise HTTPError(413, "请求头过大")
+        lines = head.decode("latin-1").split("\r\n")
+        try:
+            method, target, _ = lines[0].split(" ", 2)
+        except ValueError:
+            raise HTTPError(400, "请求行格式错误")
+        headers = {}
+        for line in lines[1:]:
+            if ":" in line:
+                key, value = line.split(":", 1)
+                headers[key.strip().lower()] = value.strip()
+        try:
+            length = int(headers.get("content-length", "0") or 0)
+        except ValueError:
+            raise HTTPError(400, "Content-Length 格式错误")
+        if length < 0:
+            raise HTTPError(400, "Content-Length 格式错误")
+        if length > MAX_BODY_BYTES:
+            raise HTTPError(413, "请求体过大")
+        body = await reader.readexactly(length) if length else b""
+        return method.upper(), target, headers, body
+
+    async def dispatch(self, method, target, raw_body):
+        """return: (status, payload)"""
+        url = urlsplit(target)
+        handler = self.routes.get((method, url.path))
+        known_path = handler is not None or any(path == url.path for _, path in self.routes)
+        # 方法和路径都由客户端决定，只按已有接口计数，其余归到 405 / 404，计数表不会无限增长
+        if handler is not None:
+            key = f"{method} {url.path}"
+        else:
+            key = "405" if known_path else "404"
+        self.requests[key] = self.requests.get(key, 0) + 1
+        try:
+            if handler is None:
+                if known_path:
+                    raise HTTPError(405, f"不支持的方法: {method}")
+                raise HTTPError(404, f"没有这个接口: {url.path}")
+            query = {k: v[-1] for k, v in parse_qs(url.query).items()}
+            body = None
+            if raw_body:
+                try:
+                    body = json.loads(raw_body)
+                except ValueError:
+                    raise HTTPError(400, "请求体不是合法的 JSON")
+            return 200, await handler(query, body)
+        except HTTPError as e:
+            self.errors += 1
+            return e.status, {"error": str(e)}
+        except ValueError as e:
+            # 手牌解析 / 张数不对
+            self.errors += 1
+            return 400, {"error": str(e)}
+        except Exception as e:
+            self.errors += 1
+            return 500, {"error": f"{type(e).__name__}: {e}"}
+
+    async def _respond(self, writer, status, payload, keep_alive):
+        body = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+        head = (f"HTTP/1.1 {status} {REASONS.get(status, '')}\r\n"
+                f"Content-Type: application/json; charset=utf-8\r\n"
+                f"Content-Length: {len(body)}\r\n"
+                f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n")
+        writer.write(head.encode("latin-1") + body)
+        await writer.drain()
+
+
+async def serve(host, port, workers):
+    app = AnalysisServer(workers)
+    server = await asyncio.start_server(app.handle_connection, host, port, limit=MAX_HEADER_BYTES)
+    addr = server.sockets[0].getsockname()
+    print(f"listening on http://{addr[0]}:{addr[1]}", flush=True)
+    try:
+        async with server:
+            await server.serve_forever()
+    finally:
+        app.close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="麻将训练本地 JSON 服务")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--workers", type=int, default=8, help="引擎线程数")
+    args = parser.parse_args(argv)
+    try:
+        asyncio.run(serve(args.host, args.port, args.workers))
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,178 @@
+import atexit
+import os
+import pickle
+import threading
+from collections import OrderedDict
+
+
+class LRUCache:
+    """
+    有容量上限的 LRU 缓存，带命中统计
+
+    用法与 dict 类似（in / [] / get / 赋值），超过 maxsize 时淘汰最久未使用的项。
+    统计项：hits, misses, evictions, size
+
+    Args:
+        maxsize: 最大条目数，None 或 <=0 表示不限
+        name: 缓存名称，用于打印统计
+    """
+
+    def __init__(self, maxsize=100000, name="cache"):
+        self.maxsize = maxsize if maxsize and maxsize > 0 else None
+        self.name = name
+        self._data = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._snapshot_path = None
+
+    def __len__(self):
+        return len(self._data)
+
+    @property
+    def size(self):
+        return len(self._data)
+
+    def __contains__(self, key):
+        # 注意：in 判断只看是否存在，不计入命中统计，也不调整顺序
+        return key in self._data
+
+    def get(self, key, default=None):
+        try:
+            value = self._data[key]
+        except KeyError:
+            self.misses += 1
+            return default
+        self._data.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def __getitem__(self, key):
+        value = self.get(key, _MISSING)
+        if value is _MISSING:
+            raise KeyError(key)
+        return value
+
+    def __setitem__(self, key, value):
+        data = self._data
+        if key in data:
+            data.move_to_end(key)
+        data[key] = value
+        if self.maxsize is not None and len(data) > self.maxsize:
+            data.popitem(last=False)
+            self.evictions += 1
+
+    def clear(self):
+        self._data.clear()
+
+    def reset_stats(self):
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def stats(self):
+        """return: dict 统计信息"""
+        lookups = self.hits + self.misses
+        return {
+            "name": self.name,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "size": len(self._data),
+            "maxsize": self.maxsize,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+        }
+
+    def stats_str(self):
+        s = self.stats()
+        return (f"[{s['name']}] 命中 {s['hits']} / 未命中 {s['misses']} "
+                f"({s['hit_rate']:.1%}) | 淘汰 {s['evictions']} | 大小 {s['size']}/{s['maxsize'] or '∞'}")
+
+    # ---------- 持久化 ----------
+    def save(self, path):
+        """把当前内容（按 LRU 顺序）写入磁盘快照"""
+        directory = os.path.dirname(path)
+        if directory and not os.path.exists(directory):
+            os.makedirs(directory, exist_ok=True)
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "wb") as f:
+            pickle.dump(list(self._data.items()), f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, path)
+
+    def load(self, path):
+        """
+        从磁盘快照预热；文件不存在或损坏时忽略
+        return: 载入的条目数
+        """
+        if not os.path.exists(path):
+            return 0
+        try:
+            with open(path, "rb") as f:
+                items = pickle.load(f)
+        except Exception:
+            return 0
+        for key, value in items:
+            self[key] = value
+        return len(items)
+
+    def enable_snapshot(self, path):
+        """启动时从 path 预热，进程退出时自动保存"""
+        if self._snapshot_path is None:
+            atexit.register(self._save_on_exit)
+        self._snapshot_path = path
+        return self.load(path)
+
+    def _save_on_exit(self):
+        if self._snapshot_path:
+            try:
+                self.save(self._snapshot_path)
+            except Exception as e:
+                print(f"保存缓存快照失败({self.name}): {e}")
+
+
+class ThreadSafeLRUCache(LRUCache):
+    """
+    加锁的 LRUCache，供多线程共享（如 tools/server.py 的线程池）
+    单线程的训练程序不需要，普通 LRUCache 没有加锁开销
+    """
+
+    def __init__(self, maxsize=100000, name="cache"):
+        super().__init__(maxsize, name)
+        self._lock = threading.Lock()
+
+    def get(self, key, default=None):
+        with self._lock:
+            return LRUCache.get(self, key, default)
+
+    def __setitem__(self, key, value):
+        with self._lock:
+            LRUCache.__setitem__(self, key, value)
+
+    def clear(self):
+        with self._lock:
+            LRUCache.clear(self)
+
+    def stats(self):
+        with self._lock:
+            return LRUCache.stats(self)
+
+    def save(self, path):
+        with self._lock:
+            items = list(self._data.items())
+        snapshot = LRUCache(None, self.name)
+        snapshot._data.update(items)
+        snapshot.save(path)
+
+
+def make_threadsafe(cache):
+    """
+    把已有的 LRUCache 就地改为 ThreadSafeLRUCache（保留内容和统计）
+    模块里直接引用的缓存对象不变，引用它的函数无需改动
+    """
+    if not isinstance(cache, ThreadSafeLRUCache):
+        cache._lock = threading.Lock()
+        cache.__class__ = ThreadSafeLRUCache
+    return cache
+
+
+_MISSING = object()
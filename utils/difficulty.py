@@ -0,0 +1,108 @@
+"""
+出题难度分级：题库离线给每道题打一个难度分，按分数分成 LEVELS 档，并按档建桶索引
+
+随机发牌出来的大多是简单题，难的牌型（多面听、多种拆法）很少碰到。
+建库时按难度分从低到高把题分成大致等量的几档（同分的题一定在同一档），
+索引里每档的题编号连续存放，“抽一道第 N 档的题”就是一次随机下标，O(1)，不用反复发牌筛选。
+
+索引的二进制布局（紧跟在题库文件的记录之后，uint32 小端）：
+    offsets: (levels + 1) 个，第 l 档（1 起）的题为 items[offsets[l-1]:offsets[l]]
+    items:   offsets[levels] 个，题在题库中的编号
+
+环境变量：
+    MAHJONG_LEVEL=1..5  只出该档的题（档数不足时取最难的一档），默认 0 表示不限难度
+"""
+import os
+import random
+import struct
+
+LEVELS = 5
+LEVEL = int(os.environ.get("MAHJONG_LEVEL", "0"))
+
+_UINT32 = struct.Struct("<I")
+
+
+def assign_levels(scores, levels=LEVELS):
+    """
+    scores: 每道题的难度分
+    return: 每道题的档位（1..levels）；按分数排序后大致等分，同分的题在同一档，
+            档位连续编号（分数种类太少时档数会少于 levels）
+    """
+    n = len(scores)
+    if n == 0:
+        return []
+    by_score = {}
+    for i, s in enumerate(scores):
+        by_score.setdefault(s, []).append(i)
+    result = [0] * n
+    level = 0
+    last = 0
+    before = 0
+    for s in sorted(by_score):
+        target = 1 + levels * before // n
+        if target > last:
+            # 跳过的档位不留空档
+            level += 1
+            last = target
+        for i in by_score[s]:
+            result[i] = level
+        before += len(by_score[s])
+    return result
+
+
+def pack_index(item_levels, items=None):
+    """
+    item_levels: 每道题的档位（assign_levels 的结果，0 表示不参与分档）
+    items: 可选，item_levels[k] 对应的题库编号（默认就是 k）
+    return: 索引的二进制内容（见模块说明），档数为 max(item_levels)
+    """
+    levels = max(item_levels, default=0)
+    buckets = [[] for _ in range(levels + 1)]
+    for k, level in enumerate(item_levels):
+        buckets[level].append(k if items is None else items[k])
+    offsets = [0]
+    flat = []
+    for level in range(1, levels + 1):
+        flat.extend(buckets[level])
+        offsets.append(len(flat))
+    return struct.pack(f"<{len(offsets)}I", *offsets) + struct.pack(f"<{len(flat)}I", *flat)
+
+
+class LevelIndex:
+    """
+    只读的分档索引，直接读题库文件的 mmap（按小端解码，与机器字节序无关）
+        index.size(level)       -> 该档题数
+        index.items(level)      -> 该档全部题的编号
+        index.draw(level, rng)  -> 该档随机一道题的编号
+    """
+
+    def __init__(self, buffer, offset, levels):
+        self.levels = levels
+        # offsets 只有 levels + 1 个，直接读出来；items 按需从 buffer 读
+        self._offsets = struct.unpack_from(f"<{levels + 1}I", buffer, offset)
+        self._buffer = buffer
+        self._start = offset + (levels + 1) * 4
+        # 截断的文件在打开时就报错（struct.error），不等到抽题
+        struct.unpack_from(f"<{self._offsets[levels]}I", buffer, self._start)
+
+    def clamp(self, level):
+        """超出范围的档位取最近的一档"""
+        return min(max(level, 1), self.levels)
+
+    def size(self, level):
+        return self._offsets[level] - self._offsets[level - 1]
+
+    def items(self, level):
+        """该档全部题的编号"""
+        lo = self._offsets[level - 1]
+        return struct.unpack_from(f"<{self._offsets[level] - lo}I", self._buffer, self._start + lo * 4)
+
+    def draw(self, level, rng=random):
+        """level 会先 clamp；return: 题库编号"""
+        level = self.clamp(level)
+        lo = self._offsets[level - 1]
+        k = lo + rng.randrange(self._offsets[level] - lo)
+        return _UINT32.unpack_from(self._buffer, self._start + k * 4)[0]
+
+    def release(self):
+        self._buffer = None
@@ -0,0 +1,193 @@
+import atexit
+import os
+import struct
+import sys
+import threading
+import time
+from collections import namedtuple
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+project_root = os.path.dirname(current_dir)
+if project_root not in sys.path:
+    sys.path.append(project_root)
+
+# 手牌字段与引擎共用 utils.hand 的打包格式（每种牌 3 位）
+from utils.hand import pack, to_tiles
+
+# 逐题事件日志：每答一题记录一条定长二进制记录，便于离线分析哪些牌型慢、容易错
+# 文件：logs/events.bin，可用 MAHJONG_EVENT_LOG=0 关闭
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+EVENT_FILE = os.path.join(BASE_DIR, "logs", "events.bin")
+EVENT_LOG_ENABLED = os.environ.get("MAHJONG_EVENT_LOG", "1") != "0"
+
+MAGIC = b"MJEV"
+VERSION = 1
+FILE_HEADER = struct.Struct("<4sHH")  # magic, version, record_size
+
+# 记录格式（小端、无对齐，50 字节）：
+#   timestamp     float64  答题时刻（Unix 时间）
+#   uid           16s      会话UID（generate_uid，不足补 0）
+#   mode          uint8    见 MODES
+#   hand_lo       uint64   手牌计数向量（utils.hand 的打包格式）：每种牌 3 位，共 28 种（84 位），低 64 位
+#   hand_hi       uint32   高 20 位
+#   answer        uint32   玩家答案：HongZhong 为打出的牌ID；Uniform 为听牌集合位掩码（第 i 位表示 i+1）
+#   correct       uint8    是否答对
+#   think_time    float32  玩家思考时间（秒）
+#   compute_time  float32  引擎出题 + 算答案的耗时（秒）
+RECORD = struct.Struct("<d16sBQIIBff")
+
+MODES = {"Unknown": 0, "Uniform": 1, "HongZhong": 2}
+MODE_NAMES = {v: k for k, v in MODES.items()}
+
+Event = namedtuple("Event", "timestamp uid mode hand answer correct think_time compute_time")
+
+
+def hand_to_packed(hand, mode):
+    """
+    手牌列表 -> 打包的计数向量
+    HongZhong 的牌ID 0-27 直接作为下标；Uniform 的 1-9 映射到下标 0-8
+    """
+    return pack(hand, offset=1 if mode == "Uniform" else 0)
+
+
+def packed_to_hand(packed, mode):
+    return to_tiles(packed, offset=1 if mode == "Uniform" else 0)
+
+
+class EventLog:
+    """
+    追加写入的事件日志（带缓冲，close/flush 时落盘）
+    Args:
+        path: 文件路径
+        buffer_records: 缓冲多少条后写一次磁盘
+    """
+
+    def __init__(self, path=EVENT_FILE, buffer_records=64):
+        self.path = path
+        self.buffer_records = buffer_records
+        self._buffer = []
+        self._lock = threading.Lock()
+        directory = os.path.dirname(path)
+        if directory and not os.path.exists(directory):
+            os.makedirs(directory, exist_ok=True)
+        if not os.path.exists(path) or os.path.getsize(path) == 0:
+            with open(path, "wb") as f:
+                f.write(FILE_HEADER.pack(MAGIC, VERSION, RECORD.size))
+
+    def record(self, uid, mode, hand, answer, correct, think_time, compute_time, timestamp=None):
+        """记录一题"""
+        packed = hand_to_packed(hand, mode)
+        data = RECORD.pack(
+            time.time() if timestamp is None else timestamp,
+            uid.encode("ascii")[:16],
+            MODES.get(mode, 0),
+            packed & 0xFFFFFFFFFFFFFFFF,
+            packed >> 64,
+            answer,
+            1 if correct else 0,
+            think_time,
+            compute_time,
+        )
+        with self._lock:
+            self._buffer.append(data)
+            if len(self._buffer) >= self.buffer_records:
+                self._flush_locked()
+
+    def flush(self):
+        with self._lock:
+            self._flush_locked()
+
+    def _flush_locked(self):
+        if not self._buffer:
+            return
+        with open(self.path, "ab") as f:
+            f.write(b"".join(self._buffer))
+        self._buffer.clear()
+
+    close = flush
+
+
+def iter_events(path=EVENT_FILE, chunk_records=65536):
+    """
+    流式读取事件日志，一次只读 chunk_records 条，内存占用与文件大小无关
+    yield: Event（hand 为手牌列表，mode 为模式名）
+    """
+    for raw in iter_raw_events(path, chunk_records):
+        timestamp, uid, mode_id, lo, hi, answer, correct, think, compute = raw
+        mode = MODE_NAMES.get(mode_id, "Unknown")
+        yield Event(timestamp, uid.rstrip(b"\0").decode("ascii"), mode,
+                    packed_to_hand(lo | (hi << 64), mode), answer, bool(correct), think, compute)
+
+
+def iter_raw_events(path=EVENT_FILE, chunk_records=65536):
+    """
+    流式读取未解码的记录元组（比 iter_events 快，适合大规模扫描）
+    yield: (timestamp, uid_bytes, mode_id, hand_lo, hand_hi, answer, correct, think_time, compute_time)
+    """
+    with open(path, "rb") as f:
+        header = f.read(FILE_HEADER.size)
+        magic, version, record_size = FILE_HEADER.unpack(header)
+        if magic != MAGIC or record_size != RECORD.size:
+            raise ValueError(f"事件日志格式不符: {path}")
+        chunk_bytes = chunk_records * record_size
+        while True:
+            data = f.read(chunk_bytes)
+            if not data:
+                break
+            # 写入中途被打断时可能留下半条记录，忽略
+            usable = len(data) - len(data) % record_size
+            yield from RECORD.iter_unpack(data[:usable])
+            if usable < len(data):
+                break
+
+
+_event_log = None
+_event_lock = threading.Lock()
+
+
+def get_event_log():
+    """进程内共享的事件日志；MAHJONG_EVENT_LOG=0 时返回 None"""
+    global _event_log
+    if not EVENT_LOG_ENABLED:
+        return None
+    with _event_lock:
+        if _event_log is None:
+            _event_log = EventLog()
+            atexit.register(_event_log.flush)
+        return _event_log
+
+
+def record_event(uid, mode, hand, answer, correct, think_time, compute_time):
+    """记录一题（未启用或写入失败时静默跳过，不影响答题）"""
+    try:
+        log = get_event_log()
+        if log is not None:
+            log.record(uid, mode, hand, answer, correct, think_time, compute_time)
+    except Exception as e:
+        print(f"写入事件日志失败: {e}")
+
+
+def flush_event_log():
+    if _event_log is not None:
+        _event_log.flush()
+
+
+if __name__ == "__main__":
+    # python utils/event_log.py [path]  汇总事件日志
+    path = sys.argv[1] if len(sys.argv) > 1 else EVENT_FILE
+    if not os.path.exists(path):
+        print(f"事件日志不存在: {path}")
+        sys.exit(1)
+    start = time.perf_counter()
+    per_mode = {}
+    for _, _, mode_id, _, _, _, correct, think, compute in iter_raw_events(path):
+        s = per_mode.setdefault(MODE_NAMES.get(mode_id, "Unknown"), [0, 0, 0.0, 0.0])
+        s[0] += 1
+        s[1] += correct
+        s[2] += think
+        s[3] += compute
+    elapsed = time.perf_counter() - start
+    total = sum(s[0] for s in per_mode.values())
+    print(f"共 {total} 条事件，扫描耗时 {elapsed:.2f}秒")
+    for mode, (n, c, think, compute) in sorted(per_mode.items()):
+        print(f"  {mode}: {n} 题，正确率 {c / n:.1%}，平均思考 {think / n:.2f}秒，平均计算 {compute / n * 1000:.2f}ms")
@@ -0,0 +1,99 @@
+import os
+import time
+
+# 跨进程文件锁：POSIX 用 fcntl.flock，Windows 用 msvcrt.locking
+# 锁加在单独的 <path>.lock 文件上，而不是数据文件本身：
+# 压缩日志时数据文件会被 os.replace 换成新文件，锁在旧 inode 上就失效了
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+    try:
+        import msvcrt
+    except ImportError:
+        msvcrt = None
+
+
+class FileLock:
+    """
+    基于锁文件的跨进程互斥锁（不可重入，同一实例不要嵌套使用）
+
+    with FileLock(LOG_FILE):            # 独占锁：追加、压缩
+        ...
+    with FileLock(LOG_FILE, shared=True):  # 共享锁：读取（Windows 上退化为独占锁）
+        ...
+
+    Args:
+        path: 被保护的文件路径，实际加锁的是 path + ".lock"
+        shared: 是否为共享锁
+        timeout: 等待锁的最长时间（秒），None 表示一直等；超时抛出 TimeoutError
+    """
+
+    def __init__(self, path, shared=False, timeout=None):
+        self.lock_path = path + ".lock"
+        self.shared = shared
+        self.timeout = timeout
+        self._fd = None
+
+    def acquire(self):
+        directory = os.path.dirname(self.lock_path)
+        if directory and not os.path.exists(directory):
+            os.makedirs(directory, exist_ok=True)
+        fd = os.open(self.lock_path, os.O_RDWR | os.O_CREAT, 0o644)
+        try:
+            if fcntl is not None:
+                self._acquire_fcntl(fd)
+            elif msvcrt is not None:
+                self._acquire_msvcrt(fd)
+        except BaseException:
+            os.close(fd)
+            raise
+        self._fd = fd
+        return self
+
+    def _acquire_fcntl(self, fd):
+        op = fcntl.LOCK_SH if self.shared else fcntl.LOCK_EX
+        if self.timeout is None:
+            fcntl.flock(fd, op)
+            return
+        deadline = time.monotonic() + self.timeout
+        while True:
+            try:
+                fcntl.flock(fd, op | fcntl.LOCK_NB)
+                return
+            except BlockingIOError:
+                if time.monotonic() >= deadline:
+                    raise TimeoutError(f"等待文件锁超时: {self.lock_path}")
+                time.sleep(0.001)
+
+    def _acquire_msvcrt(self, fd):
+        # msvcrt 只有独占锁；LK_NBLCK 失败立即返回，自己轮询以支持 timeout
+        deadline = None if self.timeout is None else time.monotonic() + self.timeout
+        while True:
+            try:
+                os.lseek(fd, 0, os.SEEK_SET)
+                msvcrt.locking(fd, msvcrt.LK_NBLCK, 1)
+                return
+            except OSError:
+                if deadline is not None and time.monotonic() >= deadline:
+                    raise TimeoutError(f"等待文件锁超时: {self.lock_path}")
+                time.sleep(0.001)
+
+    def release(self):
+        fd, self._fd = self._fd, None
+        if fd is None:
+            return
+        try:
+            if fcntl is not None:
+                fcntl.flock(fd, fcntl.LOCK_UN)
+            elif msvcrt is not None:
+                os.lseek(fd, 0, os.SEEK_SET)
+                msvcrt.locking(fd, msvcrt.LK_UNLCK, 1)
+        finally:
+            os.close(fd)
+
+    def __enter__(self):
+        return self.acquire()
+
+    def __exit__(self, exc_type, exc, tb):
+        self.release()
@@ -0,0 +1,126 @@
+"""
+两个引擎共用的紧凑手牌表示：把计数向量打包进一个 int，每种牌占 3 位
+
+    红中麻将: 28 种牌（牌ID 0-27），共 84 位；第 s 门（0 万、1 条、2 筒）占第 27s 位起的 27 位
+    清一色:   9 种牌（1-9 映射到下标 0-8），共 27 位，即单独一门
+
+好处：
+    - 摸/打一张牌是一次加减（packed + ONE[k]），不用复制列表
+    - 单门的计数直接是一个 27 位整数（suit_key），可以当缓存键，不用再拼 tuple
+    - 本身可哈希，整手牌也能直接当键
+    - 单门 -> 5 进制查表编号（HZ/laizi_table 的索引）用 512 项的小表，每 9 位（3 种牌）查一次
+
+每种牌最多 7 张（3 位）；查表只覆盖每种 0-4 张，超过 4 张时 suit_index 返回 -1。
+事件日志（utils/event_log）的手牌字段也是这种格式。
+"""
+
+BITS = 3
+KIND_MASK = (1 << BITS) - 1
+NUM_KINDS = 28
+SUIT_KINDS = 9
+SUIT_BITS = SUIT_KINDS * BITS
+SUIT_MASK = (1 << SUIT_BITS) - 1
+RED_DRAGON = 27
+RED_SHIFT = RED_DRAGON * BITS
+
+# ONE[k]: 第 k 种牌加一张
+ONE = [1 << (BITS * k) for k in range(NUM_KINDS)]
+
+
+def _build_chunk_table():
+    """9 位（3 种牌 × 3 位）-> 这 3 种牌的 5 进制部分编号 c0 + 5*c1 + 25*c2；有超过 4 张的为 -1"""
+    table = []
+    for chunk in range(512):
+        c0, c1, c2 = chunk & 7, (chunk >> 3) & 7, (chunk >> 6) & 7
+        table.append(-1 if max(c0, c1, c2) > 4 else c0 + 5 * c1 + 25 * c2)
+    return table
+
+
+CHUNK_TO_BASE5 = _build_chunk_table()
+
+
+def pack(tiles, offset=0):
+    """牌列表 -> packed；清一色的 1-9 传 offset=1"""
+    packed = 0
+    for t in tiles:
+        packed += ONE[t - offset]
+    return packed
+
+
+def pack_counts(counts):
+    """计数向量 -> packed"""
+    packed = 0
+    for k, c in enumerate(counts):
+        packed |= c << (BITS * k)
+    return packed
+
+
+def unpack_counts(packed, kinds=NUM_KINDS):
+    """packed -> 计数列表（长度 kinds）"""
+    return [(packed >> (BITS * k)) & KIND_MASK for k in range(kinds)]
+
+
+def to_tiles(packed, kinds=NUM_KINDS, offset=0):
+    """packed -> 排序后的牌列表"""
+    tiles = []
+    k = 0
+    while packed and k < kinds:
+        c = packed & KIND_MASK
+        if c:
+            tiles.extend([k + offset] * c)
+        packed >>= BITS
+        k += 1
+    return tiles
+
+
+def count(packed, kind):
+    return (packed >> (BITS * kind)) & KIND_MASK
+
+
+def add(packed, kind):
+    return packed + ONE[kind]
+
+
+def remove(packed, kind):
+    """调用方保证这种牌至少有一张"""
+    return packed - ONE[kind]
+
+
+def tile_total(packed):
+    """总张数"""
+    total = 0
+    while packed:
+        total += packed & KIND_MASK
+        packed >>= BITS
+    return total
+
+
+def suit_key(packed, suit):
+    """第 suit 门的 27 位计数（可直接当缓存键）"""
+    return (packed >> (SUIT_BITS * suit)) & SUIT_MASK
+
+
+def red_count(packed):
+    return (packed >> RED_SHIFT) & KIND_MASK
+
+
+def suit_index(key):
+    """27 位单门计数 -> 5 进制编号（0..5**9-1）；有超过 4 张的牌时返回 -1"""
+    a = CHUNK_TO_BASE5[key & 511]
+    b = CHUNK_TO_BASE5[(key >> 9) & 511]
+    c = CHUNK_TO_BASE5[key >> 18]
+    if a < 0 or b < 0 or c < 0:
+        return -1
+    return a + 125 * b + 15625 * c
+
+
+def suit_tuple(key):
+    """27 位单门计数 -> 长度 9 的 tuple"""
+    return tuple((key >> (BITS * i)) & KIND_MASK for i in range(SUIT_KINDS))
+
+
+def suit_key_from_tuple(counts):
+    key = 0
+    for i, c in enumerate(counts):
+        key |= c << (BITS * i)
+    return key
@@ -1,12 +1,43 @@
 import os
 import datetime
 import hashlib
+import atexit
+import signal
+import sys
+import threading
+from contextlib import nullcontext
+
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if project_root not in sys.path:
+    sys.path.append(project_root)
+
+from utils.filelock import FileLock
 
 # 定义日志文件路径（相对于项目根目录或绝对路径）
 # 假设 utils 在 D:\project\100DIY\006mahjong\utils
 # 日志文件放在 D:\project\100DIY\006mahjong\logs\mahjong_stats.csv
 BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 LOG_FILE = os.path.join(BASE_DIR, "logs", "mahjong_stats.csv")
+LOG_HEADER = "UID,名字,模式,日期,正确率,平均耗时\n"
+
+# 存储后端：csv（默认，logs/mahjong_stats.csv）或 sqlite（logs/mahjong_stats.db，按玩家建索引）
+# 切换到 sqlite 时首次会自动导入已有的 CSV 日志
+LOG_BACKEND = os.environ.get("MAHJONG_LOG_BACKEND", "csv").lower()
+
+# 多个训练进程共用同一个 logs 目录时，追加/压缩/读取都要加跨进程文件锁（logs/mahjong_stats.csv.lock）
+# 只有单进程使用时可设置 MAHJONG_LOG_LOCK=0 关闭
+LOG_LOCKING = os.environ.get("MAHJONG_LOG_LOCK", "1") != "0"
+
+def log_lock(log_file=None, shared=False):
+    """日志文件的跨进程锁（LOG_LOCKING 关闭时为空操作）"""
+    if not LOG_LOCKING:
+        return nullcontext()
+    return FileLock(log_file or LOG_FILE, shared=shared)
+
+def get_store():
+    """sqlite 后端的共享存储对象"""
+    from utils.stats_store import get_stats_store
+    return get_stats_store(legacy_csv=LOG_FILE)
 
 def generate_uid(player_name, timestamp):
     """
@@ -17,15 +48,17 @@ def generate_uid(player_name, timestamp):
     t_hash = hashlib.md5(timestamp.encode('utf-8')).hexdigest()[:6]
     return f"{p_hash}-{t_hash}"
 
-def update_log_file(player_name, total_count, correct_count, total_time, session_start_time=None, mode="Unknown"):
+def update_log_file(player_name, total_count, correct_count, total_time, session_start_time=None, mode="Unknown", log_file=None):
     """
     更新日志文件（追加模式，CSV格式，带UID）
-    每次程序运行（Session）只更新同一条记录
+    每次程序运行（Session）只更新同一条记录：每次更新追加一行，读取时同一UID以最后一行为准
     
     Args:
         session_start_time: 本次会话开始的时间戳（字符串），用于生成固定的UID
         mode: 游戏模式 (Uniform, HongZhong)
+        log_file: 日志路径，默认 LOG_FILE
     """
+    log_file = log_file or LOG_FILE
     if session_start_time is None:
         # 如果未提供（兼容旧代码），使用当前时间
         timestamp = datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
@@ -37,89 +70,130 @@ def update_log_file(player_name, total_count, correct_count, total_time, session
         
     avg_time = total_time / total_count if total_count > 0 else 0.0
     
+    if LOG_BACKEND == "sqlite":
+        try:
+            get_store().record_session(target_uid, player_name, mode, timestamp, correct_count, total_count, avg_time)
+        except Exception as e:
+            print(f"写入成绩数据库失败: {e}")
+        return
+    
     # 构造新的一行内容
     # 格式：UID,Name,Mode,Date,Accuracy,AvgTime
     new_line = f"{target_uid},{player_name},{mode},{timestamp},{correct_count}/{total_count},{avg_time:.2f}\n"
     
     # 确保目录存在
-    log_dir = os.path.dirname(LOG_FILE)
+    log_dir = os.path.dirname(log_file)
     if not os.path.exists(log_dir):
         try:
             os.makedirs(log_dir)
         except:
             pass 
             
-    # 如果文件不存在，直接写入
-    if not os.path.exists(LOG_FILE):
-        try:
-            with open(LOG_FILE, "w", encoding="utf-8") as f:
-                f.write("UID,名字,模式,日期,正确率,平均耗时\n")
-                f.write(new_line)
-        except Exception as e:
-            print(f"写入日志文件失败: {e}")
-        return
-
-    # 读取现有内容
-    lines = []
+    # 只追加一行，不再读出整个文件重写：同一UID的多行以最后一行为准（读取时解析），
+    # 旧行由 compact_log_file 定期/手动清理
+    # 持锁期间判断是否新文件并一次 write 写完，其他进程不会插进半行，也不会和压缩的替换交错
     try:
-        with open(LOG_FILE, "r", encoding="utf-8") as f:
-            lines = f.readlines()
-    except Exception as e:
-        print(f"读取日志文件失败: {e}")
-        return
-
-    # 查找并更新
-    found = False
-    new_lines = []
-    
-    # 处理可能的BOM头或空文件
-    if not lines:
-        new_lines.append("UID,名字,模式,日期,正确率,平均耗时\n")
-    
-    # 遍历查找UID
-    header_checked = False
-    for line in lines:
-        if not header_checked:
-            # 检查是否有 Mode 列，如果没有（旧文件），需要升级Header
-            if "UID" in line and "模式" not in line:
-                new_lines.append("UID,名字,模式,日期,正确率,平均耗时\n")
-                header_checked = True
-                continue
-            header_checked = True
-            
-        parts = line.strip().split(",")
-        if len(parts) >= 1 and parts[0] == target_uid:
-            new_lines.append(new_line) # 替换
-            found = True
-        else:
-            # 兼容旧数据行：如果旧数据只有5列，补全为6列（在Name后插入Mode=Uniform）
-            # UID,Name,Date,Acc,Time -> UID,Name,Uniform,Date,Acc,Time
-            if len(parts) == 5 and "UID" not in parts[0]: # 排除Header
-                 # 简单处理：如果不是Header且只有5列，插入默认Mode
-                 parts.insert(2, "Uniform")
-                 new_lines.append(",".join(parts) + "\n")
-            else:
-                 new_lines.append(line)
-            
-    if not found:
-        # 如果是已有文件但没表头（异常情况），补表头
-        if new_lines and "UID" not in new_lines[0]:
-             new_lines.insert(0, "UID,名字,模式,日期,正确率,平均耗时\n")
-        new_lines.append(new_line)
-        
-    try:
-        with open(LOG_FILE, "w", encoding="utf-8") as f:
-            f.writelines(new_lines)
+        with log_lock(log_file):
+            is_new = not os.path.exists(log_file) or os.path.getsize(log_file) == 0
+            data = (LOG_HEADER + new_line) if is_new else new_line
+            with open(log_file, "a", encoding="utf-8") as f:
+                f.write(data)
     except Exception as e:
         print(f"写入日志文件失败: {e}")
 
+def parse_log_line(line):
+    """
+    解析一行日志，兼容不同版本格式
+    Returns: (uid, name, mode, date, accuracy_str, avg_time_str)，无法识别（含表头）时返回 None
+             最旧格式没有UID，uid 为 None
+    """
+    parts = line.strip().split(",")
+    if len(parts) == 6: # 新格式：UID,Name,Mode,Date,Acc,Time
+        if parts[0] == "UID":
+            return None
+        return parts[0], parts[1], parts[2], parts[3], parts[4], parts[5]
+    elif len(parts) == 5: # 中间格式：UID,Name,Date,Acc,Time（默认旧数据为Uniform）
+        if parts[0] == "UID":
+            return None
+        return parts[0], parts[1], "Uniform", parts[2], parts[3], parts[4]
+    elif len(parts) == 4: # 最旧格式：Name,Date,Acc,Time
+        if parts[0] == "名字":
+            return None
+        return None, parts[0], "Uniform", parts[1], parts[2], parts[3]
+    return None
+
+def read_latest_records(log_file=None):
+    """
+    读取日志，同一UID只保留最后一次追加的记录（保持首次出现的顺序）
+    Returns: list of (uid, name, mode, date, accuracy_str, avg_time_str)
+    """
+    log_file = log_file or LOG_FILE
+    with log_lock(log_file, shared=True), open(log_file, "r", encoding="utf-8") as f:
+        latest, _ = _latest_by_uid(f)
+    return list(latest.values())
+
+def _latest_by_uid(lines):
+    """Returns: ({key: record}, 总行数)"""
+    latest = {}
+    line_count = 0
+    for line_no, line in enumerate(lines):
+        line_count += 1
+        record = parse_log_line(line)
+        if record is None:
+            continue
+        # 没有UID的旧数据每行都是独立记录
+        key = record[0] if record[0] is not None else ("#", line_no)
+        latest[key] = record
+    return latest, line_count
+
+def format_log_record(record):
+    uid, name, mode, date, accuracy_str, avg_time_str = record
+    if uid is None:
+        # 最旧格式没有UID，保持原样（4列）
+        return f"{name},{date},{accuracy_str},{avg_time_str}\n"
+    return f"{uid},{name},{mode},{date},{accuracy_str},{avg_time_str}\n"
+
+def compact_log_file(log_file=None):
+    """
+    压缩日志：每个UID只保留最新的一行，同时把旧表头/5列旧数据升级为新格式
+    先写临时文件再替换，中途出错不会破坏原文件；整个过程持有独占锁，其他进程的追加会等压缩完成
+    Returns: (压缩前行数, 压缩后行数)
+    """
+    log_file = log_file or LOG_FILE
+    with log_lock(log_file):
+        if not os.path.exists(log_file):
+            return 0, 0
+        with open(log_file, "r", encoding="utf-8") as f:
+            latest, before = _latest_by_uid(f)
+        tmp_file = f"{log_file}.{os.getpid()}.tmp"
+        try:
+            with open(tmp_file, "w", encoding="utf-8") as f:
+                f.write(LOG_HEADER)
+                for record in latest.values():
+                    f.write(format_log_record(record))
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_file, log_file)
+        finally:
+            if os.path.exists(tmp_file):
+                os.remove(tmp_file)
+    return before, len(latest) + 1
+
 def get_player_stats(player_name, mode=None):
     """
     从CSV日志中解析玩家历史数据（聚合统计）
+    同一UID有多行（追加写入）时只统计最后一行
     Args:
         mode: 如果提供，只统计该模式的数据
     Returns: (total, correct, avg_time)
     """
+    if LOG_BACKEND == "sqlite":
+        try:
+            return get_store().player_stats(player_name, mode)
+        except Exception as e:
+            print(f"读取成绩数据库出错: {e}")
+            return 0, 0, 0.0
+    
     if not os.path.exists(LOG_FILE):
         return 0, 0, 0.0 # total, correct, avg_time
         
@@ -128,60 +202,210 @@ def get_player_stats(player_name, mode=None):
     sum_time = 0.0
     
     try:
-        with open(LOG_FILE, "r", encoding="utf-8") as f:
-            lines = f.readlines()
+        for _, current_name, current_mode, _, accuracy_str, avg_time_str in read_latest_records():
+            if current_name != player_name:
+                continue
             
-            start_idx = 0
-            if lines and "名字" in lines[0]:
-                start_idx = 1
-                
-            for line in lines[start_idx:]:
-                parts = line.strip().split(",")
-                
-                # 兼容不同版本格式
-                current_name = ""
-                accuracy_str = ""
-                avg_time_str = ""
-                current_mode = "Uniform" # 默认旧数据为Uniform
-                
-                if len(parts) == 6: # 新格式：UID,Name,Mode,Date,Acc,Time
-                    current_name = parts[1]
-                    current_mode = parts[2]
-                    accuracy_str = parts[4]
-                    avg_time_str = parts[5]
-                elif len(parts) == 5: # 中间格式：UID,Name,Date,Acc,Time
-                    current_name = parts[1]
-                    accuracy_str = parts[3]
-                    avg_time_str = parts[4]
-                elif len(parts) == 4: # 最旧格式：Name,Date,Acc,Time
-                    current_name = parts[0]
-                    accuracy_str = parts[2]
-                    avg_time_str = parts[3]
-                else:
-                    continue
+            if mode and current_mode != mode:
+                continue
+            
+            # 解析数据并聚合
+            if "/" in accuracy_str:
+                try:
+                    correct_s, total_s = accuracy_str.split("/")
+                    t = int(total_s)
+                    c = int(correct_s)
+                    avg = float(avg_time_str)
                     
-                if current_name != player_name:
-                    continue
-                
-                if mode and current_mode != mode:
+                    total_games += t
+                    total_correct += c
+                    sum_time += avg * t 
+                except ValueError:
                     continue
-                
-                # 解析数据并聚合
-                if "/" in accuracy_str:
-                    try:
-                        correct_s, total_s = accuracy_str.split("/")
-                        t = int(total_s)
-                        c = int(correct_s)
-                        avg = float(avg_time_str)
-                        
-                        total_games += t
-                        total_correct += c
-                        sum_time += avg * t 
-                    except ValueError:
-                        continue
                         
     except Exception as e:
         print(f"读取日志出错: {e}")
         
     final_avg_time = sum_time / total_games if total_games > 0 else 0.0
     return total_games, total_correct, final_avg_time
+
+def sync_log_file(log_file=None):
+    """对 csv 日志文件 fsync（sqlite 后端由数据库自己落盘，这里不做）"""
+    log_file = log_file or LOG_FILE
+    if LOG_BACKEND != "sqlite" and os.path.exists(log_file):
+        with open(log_file, "a", encoding="utf-8") as f:
+            f.flush()
+            os.fsync(f.fileno())
+
+class AsyncLogWriter:
+    """
+    后台写日志线程：答题循环只把成绩交给它，立即返回，不等待磁盘
+
+    - 有界缓冲：最多缓存 maxsize 个会话的待写成绩，满了才阻塞提交方
+    - 合并写入：同一会话UID在写入前多次更新，只写最后一次
+    - flush()：阻塞直到提交过的成绩全部写完；fsync=True 时再调用 sync_func 强制落盘
+    - close()：flush 后停止线程；进程正常退出（atexit）和收到 SIGTERM/SIGHUP 时自动执行
+
+    Args:
+        write_func: 实际写入函数，参数与 update_log_file 相同
+        maxsize: 最多缓存的会话数
+        sync_func: 把 write_func 写过的内容落盘的函数（无参数）；
+                   默认写入函数配 sync_log_file，自定义 write_func 不传时 flush(fsync=True) 不做落盘
+    """
+
+    def __init__(self, write_func=None, maxsize=1000, sync_func=None):
+        if write_func is None:
+            write_func = update_log_file
+            sync_func = sync_func or sync_log_file
+        self.write_func = write_func
+        self.sync_func = sync_func
+        self.maxsize = max(1, maxsize)
+        self._pending = {}          # uid -> (args, kwargs)，dict 保持提交顺序
+        self._cond = threading.Condition()
+        self._in_flight = 0
+        self._closed = False
+        self.submitted = 0
+        self.written = 0
+        self.coalesced = 0
+        self.errors = 0
+        self.last_error = None
+        self._thread = threading.Thread(target=self._run, name="AsyncLogWriter", daemon=True)
+        self._thread.start()
+
+    def submit(self, player_name, total_count, correct_count, total_time, session_start_time=None, mode="Unknown"):
+        """参数同 update_log_file，立即返回"""
+        if session_start_time is None:
+            # 与 update_log_file 一致：未提供时使用当前时间（先在这里固定下来，保证UID一致）
+            session_start_time = datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        uid = generate_uid(player_name, session_start_time)
+        args = (player_name, total_count, correct_count, total_time, session_start_time)
+        with self._cond:
+            if self._closed:
+                # 已关闭时直接同步写入，不丢数据
+                self.write_func(*args, mode=mode)
+                return
+            if uid in self._pending:
+                self.coalesced += 1
+            else:
+                while len(self._pending) >= self.maxsize and not self._closed:
+                    self._cond.wait()
+            self._pending[uid] = (args, mode)
+            self.submitted += 1
+            self._cond.notify_all()
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while not self._pending and not self._closed:
+                    self._cond.wait()
+                if not self._pending and self._closed:
+                    return
+                batch = list(self._pending.values())
+                self._pending.clear()
+                self._in_flight = len(batch)
+                self._cond.notify_all()
+            for args, mode in batch:
+                try:
+                    self.write_func(*args, mode=mode)
+                    self.written += 1
+                except Exception as e:
+                    self.errors += 1
+                    self.last_error = e
+            with self._cond:
+                self._in_flight = 0
+                self._cond.notify_all()
+
+    def flush(self, timeout=None, fsync=False):
+        """
+        等待已提交的成绩全部写入
+        Args:
+            fsync: 写完后调用 sync_func 落盘，保证断电也不丢
+        Returns: 是否在 timeout 内写完
+        """
+        with self._cond:
+            done = self._cond.wait_for(lambda: not self._pending and self._in_flight == 0, timeout)
+        if done and fsync and self.sync_func is not None:
+            self.sync_func()
+        return done
+
+    def close(self, timeout=None):
+        """写完剩余成绩并停止后台线程（可重复调用）"""
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+        self._thread.join(timeout)
+        return not self._thread.is_alive()
+
+    def stats(self):
+        with self._cond:
+            return {
+                "submitted": self.submitted,
+                "written": self.written,
+                "coalesced": self.coalesced,
+                "pending": len(self._pending),
+                "errors": self.errors,
+            }
+
+_writer = None
+_writer_lock = threading.Lock()
+
+def get_log_writer():
+    """进程内共享的后台写日志线程，首次使用时创建并注册退出/信号时的刷新"""
+    global _writer
+    with _writer_lock:
+        if _writer is None:
+            _writer = AsyncLogWriter()
+            atexit.register(close_log_writer)
+            _install_signal_handlers()
+        return _writer
+
+def update_log_file_async(player_name, total_count, correct_count, total_time, session_start_time=None, mode="Unknown"):
+    """update_log_file 的非阻塞版本，参数相同"""
+    get_log_writer().submit(player_name, total_count, correct_count, total_time, session_start_time, mode=mode)
+
+def flush_log_writer(timeout=None, fsync=False):
+    """等待后台写日志线程写完；没有启用时直接返回 True"""
+    if _writer is None:
+        return True
+    return _writer.flush(timeout, fsync=fsync)
+
+def close_log_writer(timeout=5.0):
+    """写完并关闭后台写日志线程"""
+    if _writer is None:
+        return True
+    return _writer.close(timeout)
+
+def _install_signal_handlers():
+    """SIGTERM / SIGHUP 时先把成绩写完，再交给原来的处理方式（只能在主线程安装）"""
+    if threading.current_thread() is not threading.main_thread():
+        return
+    for name in ("SIGTERM", "SIGHUP"):
+        signum = getattr(signal, name, None)
+        if signum is None:
+            continue
+        previous = signal.getsignal(signum)
+
+        def handler(sig, frame, previous=previous):
+            close_log_writer()
+            if callable(previous):
+                previous(sig, frame)
+            elif previous != signal.SIG_IGN:
+                raise SystemExit(128 + sig)
+
+        try:
+            signal.signal(signum, handler)
+        except (ValueError, OSError):
+            pass
+
+if __name__ == "__main__":
+    # python utils/logger.py compact  压缩日志（每个UID只保留最新一行）
+    # python utils/logger.py import   把 CSV 日志导入 sqlite 成绩库
+    if len(sys.argv) > 1 and sys.argv[1] == "compact":
+        before, after = compact_log_file()
+        print(f"日志压缩完成: {before} 行 -> {after} 行")
+    elif len(sys.argv) > 1 and sys.argv[1] == "import":
+        from utils.stats_store import get_stats_store
+        count = get_stats_store().import_csv(LOG_FILE)
+        print(f"导入完成: {count} 条会话记录")
+    else:
+        print("用法: python utils/logger.py compact|import")
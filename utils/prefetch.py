@@ -0,0 +1,159 @@
+import os
+import queue
+import threading
+import time
+
+# 预生成队列深度，可用环境变量调整
+DEFAULT_POOL_SIZE = int(os.environ.get("MAHJONG_POOL_SIZE", "8"))
+# 设置 MAHJONG_POOL_STATS=1 时，训练程序退出前打印缓冲池统计，便于调整队列深度
+SHOW_POOL_STATS = os.environ.get("MAHJONG_POOL_STATS", "") == "1"
+# 工作线程连续出错这么多次后退出，之后取题改在调用方线程直接生成，异常交给调用方
+MAX_CONSECUTIVE_ERRORS = 5
+
+
+class PuzzlePool:
+    """
+    后台预生成题目的缓冲池
+
+    工作线程不断调用 producer() 生成题目放入有界队列，玩家思考（阻塞在 input）时
+    线程在后台补满队列，下一题直接从队列取，几乎没有等待。
+    工作线程每次调用 producer() 都持有一把互斥锁；调用方线程要做和 producer 共用缓存的计算
+    （训练程序的缓存是不加锁的 LRUCache）时用 run_exclusive，两边不会同时读写缓存。
+
+    Args:
+        producer: 无参函数，返回一道题；返回 None 表示这次生成的题不合格（被拒绝），会自动重试
+        maxsize: 队列深度
+        name: 名称，用于打印统计
+
+    统计（stats()）：
+        depth       当前队列中的题数
+        produced    已生成的题数（不含被拒绝的）
+        rejected    被拒绝的次数
+        served      已取走的题数
+        waits       取题时队列为空、需要等待的次数
+        wait_time   取题累计等待时间（秒）
+        refill_rate 平均生成速度（题/秒，按工作线程实际忙碌时间计算）
+    """
+
+    def __init__(self, producer, maxsize=DEFAULT_POOL_SIZE, name="puzzles"):
+        self.producer = producer
+        self.name = name
+        self.maxsize = max(1, maxsize)
+        self._queue = queue.Queue(maxsize=self.maxsize)
+        self._stop = threading.Event()
+        self._lock = threading.Lock()
+        self._producer_lock = threading.Lock()
+        self.produced = 0
+        self.rejected = 0
+        self.served = 0
+        self.waits = 0
+        self.wait_time = 0.0
+        self.busy_time = 0.0
+        self.errors = 0
+        self.last_error = None
+        self._thread = threading.Thread(target=self._run, name=f"PuzzlePool-{name}", daemon=True)
+        self._thread.start()
+
+    def _run(self):
+        consecutive_errors = 0
+        while not self._stop.is_set():
+            start = time.perf_counter()
+            try:
+                with self._producer_lock:
+                    puzzle = self.producer()
+            except Exception as e:
+                with self._lock:
+                    self.errors += 1
+                    self.last_error = e
+                consecutive_errors += 1
+                if consecutive_errors >= MAX_CONSECUTIVE_ERRORS:
+                    # 一直出错（如题库文件损坏）时不再重试，get_timed 会在调用方线程重现这个异常
+                    return
+                # 避免出错时空转
+                self._stop.wait(0.1)
+                continue
+            consecutive_errors = 0
+            elapsed = time.perf_counter() - start
+            with self._lock:
+                self.busy_time += elapsed
+                if puzzle is None:
+                    self.rejected += 1
+                    continue
+                self.produced += 1
+            # 队列满时阻塞，定期检查是否需要退出
+            while not self._stop.is_set():
+                try:
+                    self._queue.put((puzzle, elapsed), timeout=0.2)
+                    break
+                except queue.Full:
+                    continue
+
+    def get(self, timeout=None):
+        """
+        取一道题；队列为空时等待工作线程生成
+        工作线程异常退出时回退为在当前线程直接生成
+        """
+        return self.get_timed(timeout)[0]
+
+    def get_timed(self, timeout=None):
+        """
+        取一道题，同时返回生成这道题的计算耗时
+        return: (puzzle, compute_seconds)
+        """
+        try:
+            item = self._queue.get_nowait()
+        except queue.Empty:
+            start = time.perf_counter()
+            item = None
+            while item is None:
+                if not self._thread.is_alive():
+                    t0 = time.perf_counter()
+                    puzzle = self.producer()
+                    if puzzle is not None:
+                        item = (puzzle, time.perf_counter() - t0)
+                    continue
+                try:
+                    item = self._queue.get(timeout=0.5 if timeout is None else timeout)
+                except queue.Empty:
+                    if timeout is not None:
+                        raise
+            with self._lock:
+                self.waits += 1
+                self.wait_time += time.perf_counter() - start
+        with self._lock:
+            self.served += 1
+        return item
+
+    def run_exclusive(self, func, *args, **kwargs):
+        """在调用方线程执行 func，期间工作线程不会调用 producer（最多等它做完手上这一题）"""
+        with self._producer_lock:
+            return func(*args, **kwargs)
+
+    @property
+    def depth(self):
+        return self._queue.qsize()
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join(timeout=1.0)
+
+    def stats(self):
+        with self._lock:
+            return {
+                "name": self.name,
+                "depth": self._queue.qsize(),
+                "maxsize": self.maxsize,
+                "produced": self.produced,
+                "rejected": self.rejected,
+                "served": self.served,
+                "waits": self.waits,
+                "wait_time": self.wait_time,
+                "errors": self.errors,
+                "refill_rate": self.produced / self.busy_time if self.busy_time > 0 else 0.0,
+            }
+
+    def stats_str(self):
+        s = self.stats()
+        return (f"[{s['name']}] 队列 {s['depth']}/{s['maxsize']} | 生成 {s['produced']} 拒绝 {s['rejected']} "
+                f"取走 {s['served']} | 等待 {s['waits']} 次共 {s['wait_time']:.3f}秒 | "
+                f"生成速度 {s['refill_rate']:.1f} 题/秒")
@@ -0,0 +1,240 @@
+"""
+可选的热点剖析：给引擎函数套上高精度计时和调用计数，退出时写出按函数汇总的报告
+
+开启方式（默认关闭，关闭时不替换任何函数，零开销）：
+    MAHJONG_PROFILE=1          计时 + 计数 + 缓存命中率
+    MAHJONG_PROFILE=cprofile   另外对出题计算和主线程跑 cProfile
+    或者训练程序加命令行参数 --profile / --profile=cprofile
+
+各模块在定义完函数后调用 instrument(globals(), [...], root="generate_puzzle")：
+    - 替换的是模块全局名字，递归调用（get_laizi_cost / get_hu_structure）也会经过包装，
+      因此“调用次数”包含递归，“顶层调用”只算最外层；耗时只在最外层累计，不会重复计算
+    - root 函数的每次调用视为“一题”，统计每题内各函数被调用的次数（平均/最大）
+    - 计数按线程分开存放（出题在后台线程），汇总时合并，热路径上不加锁
+
+报告写到 logs/profile-<时间>.txt（MAHJONG_PROFILE_DIR 可改目录），同时打印路径。
+"""
+import atexit
+import cProfile
+import functools
+import io
+import os
+import pstats
+import threading
+import time
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+PROFILE_DIR = os.environ.get("MAHJONG_PROFILE_DIR", os.path.join(BASE_DIR, "logs"))
+
+_mode = os.environ.get("MAHJONG_PROFILE", "")
+ENABLED = _mode not in ("", "0")
+USE_CPROFILE = _mode == "cprofile"
+
+_pending = []          # 尚未开启时登记的 (namespace, names, root)
+_caches = []
+_all_stats = []        # 每个线程一份 _ThreadStats
+_all_stats_lock = threading.Lock()
+_local = threading.local()
+_questions = []        # (compute_time, think_time)
+_main_profiler = None
+_atexit_registered = False
+
+
+class _ThreadStats:
+    def __init__(self):
+        self.funcs = {}         # name -> [调用次数, 顶层调用次数, 累计耗时]
+        self.depth = {}         # name -> 当前递归深度
+        self.question = None    # 当前这题内的 {name: 调用次数}
+        self.per_question = {}  # name -> [题数, 总调用次数, 单题最大调用次数]
+        # 主线程由 _main_profiler 覆盖；同一线程只能挂一个 profiler
+        in_main = threading.current_thread() is threading.main_thread()
+        self.profiler = cProfile.Profile() if USE_CPROFILE and not in_main else None
+
+
+def _thread_stats():
+    ts = getattr(_local, "stats", None)
+    if ts is None:
+        ts = _local.stats = _ThreadStats()
+        with _all_stats_lock:
+            _all_stats.append(ts)
+    return ts
+
+
+def _wrap(name, func, root):
+    perf = time.perf_counter
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        ts = _thread_stats()
+        rec = ts.funcs.get(name)
+        if rec is None:
+            rec = ts.funcs[name] = [0, 0, 0.0]
+        rec[0] += 1
+        question = ts.question
+        if question is not None:
+            question[name] = question.get(name, 0) + 1
+        depth = ts.depth.get(name, 0)
+        ts.depth[name] = depth + 1
+        if depth:
+            # 递归调用：只计数，耗时算在最外层
+            try:
+                return func(*args, **kwargs)
+            finally:
+                ts.depth[name] = depth
+        rec[1] += 1
+        if root:
+            ts.question = {name: 1}
+            if ts.profiler is not None:
+                ts.profiler.enable()
+        start = perf()
+        try:
+            return func(*args, **kwargs)
+        finally:
+            rec[2] += perf() - start
+            ts.depth[name] = 0
+            if root:
+                if ts.profiler is not None:
+                    ts.profiler.disable()
+                for fname, calls in ts.question.items():
+                    pq = ts.per_question.get(fname)
+                    if pq is None:
+                        pq = ts.per_question[fname] = [0, 0, 0]
+                    pq[0] += 1
+                    pq[1] += calls
+                    if calls > pq[2]:
+                        pq[2] = calls
+                ts.question = None
+
+    wrapper.__profiled__ = True
+    return wrapper
+
+
+def _apply(namespace, names, root):
+    label = os.path.splitext(os.path.basename(namespace.get("__file__", "")))[0] or namespace.get("__name__")
+    for name in names:
+        func = namespace.get(name)
+        if func is None or getattr(func, "__profiled__", False):
+            continue
+        namespace[name] = _wrap(f"{label}.{name}", func, root=(name == root))
+
+
+def instrument(namespace, names, root=None):
+    """
+    登记需要剖析的函数（namespace 一般传模块的 globals()）
+    已开启时立即替换，否则等 enable() 时再替换
+    """
+    if ENABLED:
+        _apply(namespace, names, root)
+    else:
+        _pending.append((namespace, names, root))
+
+
+def register_cache(cache):
+    """登记 LRUCache，报告里输出命中率"""
+    if cache not in _caches:
+        _caches.append(cache)
+
+
+def enable(cprofile=False):
+    """运行时开启（命令行 --profile），替换所有已登记的函数"""
+    global ENABLED, USE_CPROFILE, _main_profiler, _atexit_registered
+    ENABLED = True
+    USE_CPROFILE = USE_CPROFILE or cprofile
+    for namespace, names, root in _pending:
+        _apply(namespace, names, root)
+    _pending.clear()
+    if USE_CPROFILE and _main_profiler is None:
+        _main_profiler = cProfile.Profile()
+        _main_profiler.enable()
+    if not _atexit_registered:
+        _atexit_registered = True
+        atexit.register(write_report)
+
+
+def enable_from_argv(argv):
+    """识别 --profile / --profile=cprofile，返回去掉这些参数后的 argv"""
+    rest = []
+    for arg in argv:
+        if arg == "--profile":
+            enable()
+        elif arg == "--profile=cprofile":
+            enable(cprofile=True)
+        else:
+            rest.append(arg)
+    return rest
+
+
+def record_question(compute_time, think_time):
+    """训练程序每答完一题调用：出题计算耗时与玩家思考耗时分开记录（未开启时不做任何事）"""
+    if ENABLED:
+        _questions.append((compute_time, think_time))
+
+
+def summary():
+    """return: 汇总报告文本"""
+    funcs = {}
+    per_question = {}
+    with _all_stats_lock:
+        stats_list = list(_all_stats)
+    for ts in stats_list:
+        for name, (calls, top, total) in list(ts.funcs.items()):
+            f = funcs.setdefault(name, [0, 0, 0.0])
+            f[0] += calls
+            f[1] += top
+            f[2] += total
+        for name, (questions, calls, peak) in list(ts.per_question.items()):
+            pq = per_question.setdefault(name, [0, 0, 0])
+            pq[0] += questions
+            pq[1] += calls
+            pq[2] = max(pq[2], peak)
+
+    out = io.StringIO()
+    out.write(f"=== 性能剖析 {time.strftime('%Y-%m-%d %H:%M:%S')} ===\n")
+    if _questions:
+        n = len(_questions)
+        compute = sum(q[0] for q in _questions)
+        think = sum(q[1] for q in _questions)
+        out.write(f"答题 {n} 道 | 引擎计算 共 {compute:.3f}秒（平均 {compute / n * 1000:.2f}ms）"
+                  f" | 玩家思考 共 {think:.1f}秒（平均 {think / n:.2f}秒）\n")
+    out.write("\n按函数（耗时为最外层调用的累计值；每题 = root 函数的一次调用，含预生成但未出的题）\n")
+    out.write(f"{'函数':<44} {'调用次数':>10} {'顶层调用':>10} {'累计(ms)':>10} {'平均(µs)':>10} {'每题调用 平均/最大':>18}\n")
+    for name, (calls, top, total) in sorted(funcs.items(), key=lambda kv: -kv[1][2]):
+        avg = total / top * 1e6 if top else 0.0
+        pq = per_question.get(name)
+        per_q = f"{pq[1] / pq[0]:.1f}/{pq[2]}" if pq else "-"
+        out.write(f"{name:<46} {calls:>12} {top:>12} {total * 1000:>10.1f} {avg:>10.1f} {per_q:>18}\n")
+
+    if _caches:
+        out.write("\n缓存\n")
+        for cache in _caches:
+            out.write(cache.stats_str() + "\n")
+
+    profilers = [ts.profiler for ts in stats_list if ts.profiler is not None]
+    if _main_profiler is not None:
+        _main_profiler.disable()
+        profilers.append(_main_profiler)
+    if profilers:
+        out.write("\ncProfile（前 30 项，按累计耗时）\n")
+        st = pstats.Stats(profilers[0], stream=out)
+        for p in profilers[1:]:
+            st.add(p)
+        st.sort_stats("cumulative").print_stats(30)
+    return out.getvalue()
+
+
+def write_report(path=None):
+    """写出汇总报告，return: 报告路径（没有任何数据时不写，返回 None）"""
+    if not ENABLED or not (_all_stats or _questions):
+        return None
+    text = summary()
+    if path is None:
+        os.makedirs(PROFILE_DIR, exist_ok=True)
+        path = os.path.join(PROFILE_DIR, f"profile-{time.strftime('%Y%m%d-%H%M%S')}.txt")
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(text)
+    print(f"性能剖析报告: {path}")
+    return path
+
+
+if ENABLED:
+    enable(cprofile=USE_CPROFILE)
@@ -0,0 +1,99 @@
+"""
+间隔重复出题调度：按玩家、按牌型类别记住掌握程度，到期的、薄弱的类别优先出题
+
+牌型类别由各训练程序定义（清一色按听牌形状，如 "147"；红中按难度档），
+每个 (玩家, 模式, 类别) 一条掌握状态（Leitner 盒子）：
+    box      0..len(INTERVALS)-1，答对升一格，答错回到 0
+    due      下次该复习的时刻，按该玩家在这个模式下的答题序号计（换一天接着练也能接上）
+    seen, correct  累计答题数 / 答对数
+答完一题后 due = 当前序号 + INTERVALS[box]，所以答错的类别过两题就会再出，掌握得越好间隔越长。
+
+调度：
+    - 会话开始时一次主键范围查询读出该玩家的全部状态，按 (due, 正确率) 建堆
+    - 每题看一眼堆顶（O(log n)，过期条目惰性删除）：已到期就出这个类别的题，否则照常随机出题
+    - 每答一题只更新这一个类别（重新入堆），并写回成绩库（utils.stats_store 的 mastery 表）
+多个玩家共用一个库，读写都是按 (玩家, 模式, 类别) 主键，与玩家数和历史长度无关。
+
+环境变量：
+    MAHJONG_SCHEDULER=0  关闭（默认开启；训练程序需要题库文件才能按类别出题）
+"""
+import heapq
+import os
+import sys
+
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if project_root not in sys.path:
+    sys.path.append(project_root)
+
+SCHEDULER_ENABLED = os.environ.get("MAHJONG_SCHEDULER", "1") != "0"
+
+# 各盒子的复习间隔（题数）
+INTERVALS = (2, 5, 12, 30, 80)
+
+
+class ReviewScheduler:
+    """
+    一个玩家在一个模式下的出题调度
+
+    scheduler = ReviewScheduler(player_name, "Uniform")
+    shape = scheduler.due_shape()      # 到期的类别，没有时为 None
+    scheduler.record(shape, correct)   # 每答一题调用一次
+
+    Args:
+        name, mode: 玩家名和模式，同 get_player_stats
+        store: 提供 load_mastery / save_mastery 的存储（默认为 utils.stats_store 的成绩库）
+    """
+
+    def __init__(self, name, mode, store=None):
+        if store is None:
+            # 不传 legacy_csv：旧 CSV 日志只在切换到 sqlite 日志后端时导入（见 get_stats_store）
+            from utils.stats_store import get_stats_store
+            store = get_stats_store()
+        self.name = name
+        self.mode = mode
+        self.store = store
+        # shape -> [box, due, seen, correct]
+        self._states = {}
+        self._heap = []
+        self.clock = 0
+        for shape, box, due, seen, correct in store.load_mastery(name, mode):
+            self._states[shape] = [box, due, seen, correct]
+            self.clock += seen
+        self._heap = [self._entry(shape) for shape in self._states]
+        heapq.heapify(self._heap)
+
+    def _entry(self, shape):
+        box, due, seen, correct = self._states[shape]
+        # 同时到期时正确率低的先出
+        return due, correct / seen if seen else 0.0, shape
+
+    def due_shape(self):
+        """return: 已到期、最该复习的类别；没有到期的为 None"""
+        heap = self._heap
+        while heap:
+            entry = heap[0]
+            if entry != self._entry(entry[2]):
+                # 该类别之后又答过，这条已过期
+                heapq.heappop(heap)
+                continue
+            return entry[2] if entry[0] <= self.clock else None
+        return None
+
+    def record(self, shape, correct):
+        """答完一道 shape 类别的题，更新掌握状态并写回存储"""
+        self.clock += 1
+        state = self._states.get(shape)
+        if state is None:
+            state = self._states[shape] = [0, 0, 0, 0]
+        box = min(state[0] + 1, len(INTERVALS) - 1) if correct else 0
+        state[0] = box
+        state[1] = self.clock + INTERVALS[box]
+        state[2] += 1
+        state[3] += 1 if correct else 0
+        heapq.heappush(self._heap, self._entry(shape))
+        self.store.save_mastery(self.name, self.mode, shape, *state)
+
+    def weakest(self, n=3, min_seen=3):
+        """return: 正确率最低的 n 个类别 [(shape, seen, correct)]，只算答过 min_seen 题以上的"""
+        rows = [(shape, s[2], s[3]) for shape, s in self._states.items() if s[2] >= min_seen]
+        return heapq.nsmallest(n, rows, key=lambda r: (r[2] / r[1], -r[1]))
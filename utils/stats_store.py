@@ -0,0 +1,197 @@
+import os
+import sqlite3
+import threading
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DB_FILE = os.path.join(BASE_DIR, "logs", "mahjong_stats.db")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS sessions (
+    uid      TEXT PRIMARY KEY,
+    name     TEXT NOT NULL,
+    mode     TEXT NOT NULL,
+    date     TEXT,
+    correct  INTEGER NOT NULL,
+    total    INTEGER NOT NULL,
+    avg_time REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS player_totals (
+    name     TEXT NOT NULL,
+    mode     TEXT NOT NULL,
+    total    INTEGER NOT NULL,
+    correct  INTEGER NOT NULL,
+    sum_time REAL NOT NULL,
+    PRIMARY KEY (name, mode)
+);
+CREATE TABLE IF NOT EXISTS mastery (
+    name     TEXT NOT NULL,
+    mode     TEXT NOT NULL,
+    shape    TEXT NOT NULL,
+    box      INTEGER NOT NULL,
+    due      INTEGER NOT NULL,
+    seen     INTEGER NOT NULL,
+    correct  INTEGER NOT NULL,
+    PRIMARY KEY (name, mode, shape)
+);
+CREATE TABLE IF NOT EXISTS meta (
+    key   TEXT PRIMARY KEY,
+    value TEXT
+);
+"""
+
+
+class StatsStore:
+    """
+    基于 SQLite 的成绩存储
+
+    sessions 表按 UID 保存每次会话的最新成绩；player_totals 表按 (玩家, 模式) 保存汇总，
+    每次写入会话时按“新值 - 旧值”增量更新汇总，所以查询一个玩家的历史成绩只需一次主键查找，
+    与日志总量无关。mastery 表按 (玩家, 模式, 牌型类别) 保存出题调度的掌握状态（utils.scheduler）。
+
+    Args:
+        db_file: 数据库路径
+    """
+
+    def __init__(self, db_file=DB_FILE):
+        self.db_file = db_file
+        db_dir = os.path.dirname(db_file)
+        if db_dir and not os.path.exists(db_dir):
+            os.makedirs(db_dir, exist_ok=True)
+        # 允许后台写线程使用同一连接，串行化由 self._lock 保证
+        self._conn = sqlite3.connect(db_file, timeout=30, check_same_thread=False)
+        self._lock = threading.Lock()
+        with self._lock:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+            self._conn.executescript(SCHEMA)
+            self._conn.commit()
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+    def record_session(self, uid, name, mode, date, correct, total, avg_time):
+        """写入（或覆盖）一次会话的成绩，并增量更新玩家汇总"""
+        with self._lock, self._conn:
+            self._upsert(uid, name, mode, date, correct, total, avg_time)
+
+    def record_sessions(self, rows):
+        """批量写入，rows: iterable of (uid, name, mode, date, correct, total, avg_time)"""
+        with self._lock, self._conn:
+            for row in rows:
+                self._upsert(*row)
+
+    def _upsert(self, uid, name, mode, date, correct, total, avg_time):
+        cur = self._conn.execute(
+            "SELECT name, mode, correct, total, avg_time FROM sessions WHERE uid = ?", (uid,))
+        old = cur.fetchone()
+        if old is not None:
+            old_name, old_mode, old_correct, old_total, old_avg = old
+            self._add_totals(old_name, old_mode, -old_total, -old_correct, -old_avg * old_total)
+        self._conn.execute(
+            "INSERT OR REPLACE INTO sessions (uid, name, mode, date, correct, total, avg_time) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?)",
+            (uid, name, mode, date, correct, total, avg_time))
+        self._add_totals(name, mode, total, correct, avg_time * total)
+
+    def _add_totals(self, name, mode, total, correct, sum_time):
+        self._conn.execute(
+            "INSERT INTO player_totals (name, mode, total, correct, sum_time) VALUES (?, ?, ?, ?, ?) "
+            "ON CONFLICT(name, mode) DO UPDATE SET "
+            "total = total + excluded.total, correct = correct + excluded.correct, "
+            "sum_time = sum_time + excluded.sum_time",
+            (name, mode, total, correct, sum_time))
+
+    def player_stats(self, player_name, mode=None):
+        """
+        Returns: (total, correct, avg_time)，与 logger.get_player_stats 相同
+        """
+        with self._lock:
+            if mode:
+                row = self._conn.execute(
+                    "SELECT total, correct, sum_time FROM player_totals WHERE name = ? AND mode = ?",
+                    (player_name, mode)).fetchone()
+            else:
+                row = self._conn.execute(
+                    "SELECT SUM(total), SUM(correct), SUM(sum_time) FROM player_totals WHERE name = ?",
+                    (player_name,)).fetchone()
+        if not row or not row[0]:
+            return 0, 0, 0.0
+        total, correct, sum_time = row
+        return total, correct, sum_time / total
+
+    def load_mastery(self, player_name, mode):
+        """
+        一个玩家在某模式下各牌型类别的掌握状态（见 utils.scheduler），按主键范围查询
+        Returns: [(shape, box, due, seen, correct), ...]
+        """
+        with self._lock:
+            return self._conn.execute(
+                "SELECT shape, box, due, seen, correct FROM mastery WHERE name = ? AND mode = ?",
+                (player_name, mode)).fetchall()
+
+    def save_mastery(self, player_name, mode, shape, box, due, seen, correct):
+        """写入（或覆盖）一个牌型类别的掌握状态"""
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO mastery (name, mode, shape, box, due, seen, correct) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (player_name, mode, shape, box, due, seen, correct))
+
+    def get_meta(self, key):
+        with self._lock:
+            row = self._conn.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else None
+
+    def set_meta(self, key, value):
+        with self._lock, self._conn:
+            self._conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)", (key, value))
+
+    def import_csv(self, csv_file):
+        """
+        一次性导入旧的 CSV 日志（兼容 4/5/6 列三种格式，同一UID取最后一行）
+        最旧的 4 列格式没有UID，按行号生成一个 legacy UID
+        Returns: 导入的会话数
+        """
+        from utils.logger import read_latest_records
+
+        if not os.path.exists(csv_file):
+            return 0
+        rows = []
+        for i, (uid, name, mode, date, accuracy_str, avg_time_str) in enumerate(read_latest_records(csv_file)):
+            if "/" not in accuracy_str:
+                continue
+            try:
+                correct_s, total_s = accuracy_str.split("/")
+                correct, total, avg = int(correct_s), int(total_s), float(avg_time_str)
+            except ValueError:
+                continue
+            if uid is None:
+                uid = f"legacy-{i}"
+            rows.append((uid, name, mode, date, correct, total, avg))
+        self.record_sessions(rows)
+        return len(rows)
+
+
+_store = None
+_store_lock = threading.Lock()
+# 本进程已检查过导入的旧 CSV 日志
+_legacy_checked = set()
+
+
+def get_stats_store(db_file=None, legacy_csv=None):
+    """
+    进程内共享的 StatsStore；传入 legacy_csv（sqlite 日志后端）时自动导入一次旧 CSV 日志
+    出题调度（utils.scheduler）也用这个库存掌握状态但不传 legacy_csv，所以库可能先于导入被创建，
+    导入与否看 meta 表的 csv_imported 标记，不看库是否新建
+    """
+    global _store
+    with _store_lock:
+        if _store is None:
+            _store = StatsStore(db_file or DB_FILE)
+        if legacy_csv and legacy_csv not in _legacy_checked:
+            _legacy_checked.add(legacy_csv)
+            if _store.get_meta("csv_imported") is None:
+                count = _store.import_csv(legacy_csv)
+                _store.set_meta("csv_imported", str(count))
+        return _store